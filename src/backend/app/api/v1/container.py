@@ -8,22 +8,32 @@ from dotenv import load_dotenv, find_dotenv
 
 from db.database import Database, SessionManager
 from db.repositories import advanced_settings_repository
+from db.repositories.best_parameters_repository import BestParametersRepository
 from db.repositories.calculation_config_repository import CalculationConfigRepository
+from db.repositories.calculation_job_repository import CalculationJobRepository
 from db.repositories.calculation_repository import CalculationRepository
 from db.repositories.calculation_set_repository import CalculationSetRepository
 from db.repositories.user_repository import UserRepository
 from db.repositories.moleculeset_stats_repository import MoleculeSetStatsRepository
+from db.repositories.molecule_charges_repository import MoleculeChargesRepository
+from db.repositories.suitable_methods_repository import SuitableMethodsRepository
+from db.repositories.uploaded_file_repository import UploadedFileRepository
 
 from integrations.chargefw2.chargefw2 import ChargeFW2Local
 from integrations.io.io import IOLocal
 
+from services.calculation_jobs import CalculationJobService
 from services.calculation_storage import CalculationStorageService
 from services.chargefw2 import ChargeFW2Service
 from services.file_storage import FileStorageService
+from services.guest_eviction import GuestEvictionService
 from services.io import IOService
-from services.logging.file_logger import FileLogger
+from services.logging.queue_logger import QueueLogger, parse_sample_rates
+from services.method_registry import MethodRegistry
 from services.mmcif import MmCIFService
 from services.oidc import OIDCService
+from services.storage_maintenance import StorageMaintenanceService
+from services.user_cache import UserCache
 
 
 load_dotenv(find_dotenv())
@@ -34,6 +44,15 @@ class Container(containers.DeclarativeContainer):
 
     wiring_config = containers.WiringConfiguration(packages=["api", "services"])
 
+    # openids of users allowed to see internal metrics
+    admin_openids = providers.Object(
+        frozenset(
+            openid.strip()
+            for openid in os.environ.get("ACC2_ADMIN_OPENIDS", "").split(",")
+            if openid.strip()
+        )
+    )
+
     # integrations
     chargefw2 = providers.Singleton(ChargeFW2Local)
     io = providers.Singleton(IOLocal)
@@ -52,14 +71,34 @@ class Container(containers.DeclarativeContainer):
     )
     user_repository = providers.Factory(UserRepository, session_manager=session_manager)
     stats_repository = providers.Factory(MoleculeSetStatsRepository)
+    file_repository = providers.Factory(UploadedFileRepository)
+    molecule_charges_repository = providers.Factory(
+        MoleculeChargesRepository, chargefw2_version=chargefw2.provided.get_version.call()
+    )
+    suitable_methods_repository = providers.Factory(
+        SuitableMethodsRepository, chargefw2_version=chargefw2.provided.get_version.call()
+    )
+    best_parameters_repository = providers.Factory(
+        BestParametersRepository, chargefw2_version=chargefw2.provided.get_version.call()
+    )
+    job_repository = providers.Factory(CalculationJobRepository)
     advanced_settings_repository = providers.Factory(
         advanced_settings_repository.AdvancedSettingsRepository,
     )
 
     # services
-    logger_service = providers.Singleton(FileLogger)
+    logger_service = providers.Singleton(
+        QueueLogger,
+        level=os.environ.get("ACC2_LOG_LEVEL") or "INFO",
+        sample_rates=parse_sample_rates(os.environ.get("ACC2_LOG_SAMPLE_RATES") or ""),
+    )
     io_service = providers.Singleton(IOService, logger=logger_service, io=io)
-    mmcif_service = providers.Singleton(MmCIFService, logger=logger_service, io=io_service)
+    mmcif_service = providers.Singleton(
+        MmCIFService,
+        logger=logger_service,
+        io=io_service,
+        max_workers=int(os.environ.get("ACC2_MAX_WORKERS") or 4),
+    )
     storage_service = providers.Singleton(
         CalculationStorageService,
         logger=logger_service,
@@ -68,6 +107,9 @@ class Container(containers.DeclarativeContainer):
         config_repository=config_repository,
         stats_repository=stats_repository,
         advanced_settings_repository=advanced_settings_repository,
+        molecule_charges_repository=molecule_charges_repository,
+        suitable_methods_repository=suitable_methods_repository,
+        best_parameters_repository=best_parameters_repository,
         session_manager=session_manager,
     )
     file_storage_service = providers.Singleton(
@@ -76,15 +118,50 @@ class Container(containers.DeclarativeContainer):
         io=io_service,
         session_manager=session_manager,
         storage_service=storage_service,
+        file_repository=file_repository,
     )
+    method_registry = providers.Singleton(MethodRegistry.from_chargefw2, chargefw2=chargefw2)
     chargefw2_service = providers.Singleton(
         ChargeFW2Service,
         chargefw2=chargefw2,
+        method_registry=method_registry,
         logger=logger_service,
         io=io_service,
         mmcif_service=mmcif_service,
         calculation_storage=storage_service,
         max_workers=int(os.environ.get("ACC2_MAX_WORKERS") or 4),
         max_concurrent_calculations=int(os.environ.get("ACC2_MAX_CONCURRENT_CALCULATIONS") or 4),
+        executor_mode=os.environ.get("ACC2_EXECUTOR_MODE") or "thread",
+        web_concurrency=int(os.environ.get("WEB_CONCURRENCY") or 1),
+        molecules_cache_size=int(
+            os.environ.get("ACC2_MOLECULES_CACHE_SIZE_BYTES") or 512 * 1024 * 1024
+        ),
+        chunk_size=int(os.environ.get("ACC2_CALCULATION_CHUNK_SIZE") or 5000),
+    )
+    calculation_job_service = providers.Singleton(
+        CalculationJobService,
+        logger=logger_service,
+        job_repository=job_repository,
+        session_manager=session_manager,
+        chargefw2=chargefw2_service,
+        workers=int(os.environ.get("ACC2_JOB_WORKERS") or 1),
+    )
+    storage_maintenance_service = providers.Singleton(
+        StorageMaintenanceService,
+        logger=logger_service,
+        io=io_service,
+        reconcile_interval=float(os.environ.get("ACC2_USAGE_RECONCILE_INTERVAL_SECONDS") or 3600),
+    )
+    guest_eviction_service = providers.Singleton(
+        GuestEvictionService,
+        logger=logger_service,
+        io=io_service,
+        interval=float(os.environ.get("ACC2_GUEST_EVICTION_INTERVAL_SECONDS") or 30),
+        low_water_mark=float(os.environ.get("ACC2_GUEST_EVICTION_LOW_WATER_MARK") or 0.8),
     )
     oidc_service = providers.Singleton(OIDCService, logger=logger_service)
+    user_cache = providers.Singleton(
+        UserCache,
+        maxsize=int(os.environ.get("ACC2_USER_CACHE_SIZE") or 1024),
+        max_ttl=float(os.environ.get("ACC2_USER_CACHE_TTL_SECONDS") or 300),
+    )
@@ -1,37 +1,74 @@
 """Provides logging middleware for the application."""
 
+import re
+import uuid
+
 from datetime import timedelta
 from timeit import default_timer as timer
-from typing import Awaitable, Callable
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from api.v1.container import Container
 
 from services.logging.base import LoggerBase
+from services.logging.context import request_id
+
+# request ids provided by clients (e.g. a proxy) are reused if they are reasonable
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
 
-RequestResponseEndpoint = Callable[[Request], Awaitable[Response]]
 
+class LoggingMiddleware:
+    """Middleware for logging requests and responses.
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests and responses."""
+    Implemented as pure ASGI middleware, so responses (e.g. large file downloads)
+    are passed through without being wrapped in additional streams.
+    Each request gets an id (from the 'X-Request-ID' header or a new one), which is attached
+    to all records logged while handling the request and returned in the response headers.
+    """
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.logger: LoggerBase = Container.logger_service()
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        self.logger.info(
-            message=f"Request from {request.client.host}: {request.method} {request.url}"
-        )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        status_code = None
+
+        current_id = request.headers.get("x-request-id", "")
+        if not _REQUEST_ID.match(current_id):
+            current_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = current_id
+
+            await send(message)
 
-        start = timer()
-        response = await call_next(request)
-        end = timer()
+        token = request_id.set(current_id)
+        try:
+            self.logger.info(
+                "Request from %s: %s %s", request.client.host, request.method, request.url
+            )
 
-        self.logger.info(
-            message=f"Response for {request.client.host}: {request.method} {request.url} finished with code {response.status_code} in {timedelta(seconds=end - start)}"
-        )
+            start = timer()
+            await self.app(scope, receive, send_wrapper)
+            end = timer()
 
-        return response
+            self.logger.info(
+                "Response for %s: %s %s finished with code %s in %s",
+                request.client.host,
+                request.method,
+                request.url,
+                status_code,
+                timedelta(seconds=end - start),
+            )
+        finally:
+            request_id.reset(token)
@@ -1,43 +1,54 @@
 """Provides user loader middleware for the application."""
 
-from typing import Awaitable, Callable
+import asyncio
 
 
 from api.v1.container import Container
 from db.repositories.user_repository import UserRepository
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from services.logging.base import LoggerBase
 from services.oidc import OIDCService
+from services.user_cache import UserCache
 
-RequestResponseEndpoint = Callable[[Request], Awaitable[Response]]
 
-
-class UserLoaderMiddleware(BaseHTTPMiddleware):
+class UserLoaderMiddleware:
     """Middleware used for
     1. verifying token
     2. loading user from the database
-    3. setting it to the request state."""
+    3. setting it to the request state.
+
+    Users of verified tokens are cached until the token expires."""
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.logger: LoggerBase = Container.logger_service()
         self.oidc_service: OIDCService = Container.oidc_service()
         self.user_repository: UserRepository = Container.user_repository()
+        self.user_cache: UserCache = Container.user_cache()
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # state is stored in the scope, so it is shared with the request of the route handler
+        request = Request(scope)
         request.state.user = None
         cookie = request.cookies.get("access_token")
 
-        if cookie:
+        if cookie and (cached := self.user_cache.get(cookie)) is not None:
+            request.state.user = cached.user
+        elif cookie:
             payload = await self.oidc_service.verify_token(cookie)
             if payload:
                 openid = payload["sub"]
-                self.logger.info(f"Request contains valid token, loading user {openid}.")
-                user = self.user_repository.get(openid)
+                self.logger.info("Request contains valid token, loading user %s.", openid)
+                user = await asyncio.to_thread(self.user_repository.get, openid)
                 request.state.user = user
 
-        response = await call_next(request)
-        return response
+                if user is not None:
+                    self.user_cache.store(cookie, payload, user)
+
+        await self.app(scope, receive, send)
@@ -1,9 +1,9 @@
 """Life Science auth routes implementing the OpenID Connect protocol."""
 
+import asyncio
 import urllib
 import urllib.parse
 
-import httpx
 from api.v1.container import Container
 from api.v1.schemas.response import Response
 from api.v1.schemas.auth import TokenResponse
@@ -14,6 +14,7 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
 from fastapi.routing import APIRouter
 from services.oidc import OIDCService
+from services.user_cache import UserCache
 
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"], include_in_schema=False)
@@ -41,7 +42,9 @@ async def login(oidc_service: OIDCService = Depends(Provide[Container.oidc_servi
 @auth_router.get("/logout", tags=["logout"])
 @inject
 async def logout(
-    request: Request, oidc_service: OIDCService = Depends(Provide[Container.oidc_service])
+    request: Request,
+    oidc_service: OIDCService = Depends(Provide[Container.oidc_service]),
+    user_cache: UserCache = Depends(Provide[Container.user_cache]),
 ):
     """Log out the user."""
 
@@ -49,6 +52,9 @@ async def logout(
     token = request.cookies.get("access_token")
     redirect_uri = oidc_service.base_url
 
+    if token:
+        user_cache.invalidate(token)
+
     response = RedirectResponse(redirect_uri)
 
     # end_session_endpoint prompts user to end the session on the LS side
@@ -79,52 +85,36 @@ async def auth_callback(
 ):
     """Handle the callback from the OIDC provider. This function is triggered after succcessful LS login."""
 
-    config = await oidc_service.get_oidc_config()
-    token_endpoint = config["token_endpoint"]
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            token_endpoint,
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "redirect_uri": oidc_service.redirect_url,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            auth=httpx.BasicAuth(
-                username=oidc_service.client_id,
-                password=oidc_service.client_secret,
-            ),
-        )
+    response = await oidc_service.exchange_code(code)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Failed to get token: {response.text}",
-            )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Failed to get token: {response.text}",
+        )
 
-        tokens = TokenResponse(**response.json())
+    tokens = TokenResponse(**response.json())
 
-        payload = await oidc_service.verify_token(tokens.access_token)
+    payload = await oidc_service.verify_token(tokens.access_token)
 
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Failed to verify token",
-            )
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Failed to verify token",
+        )
 
-        # create user if does not exist
-        openid = payload["sub"]
-        user = user_repository.get(openid)
-        if user is None:
-            user = User(openid=openid)
-            user_repository.store(user)
+    # create user if does not exist
+    openid = payload["sub"]
+    user = await asyncio.to_thread(user_repository.get, openid)
+    if user is None:
+        user = User(openid=openid)
+        await asyncio.to_thread(user_repository.store, user)
 
-        # set session cookie
-        response = RedirectResponse(url=oidc_service.base_url)
-        response.set_cookie("access_token", tokens.access_token, secure=True, httponly=True)
+    # set session cookie
+    response = RedirectResponse(url=oidc_service.base_url)
+    response.set_cookie("access_token", tokens.access_token, secure=True, httponly=True)
 
-        return response
+    return response
 
 
 @auth_router.get("/verify", tags=["verify"])
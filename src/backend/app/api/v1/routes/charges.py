@@ -1,22 +1,21 @@
 """Charge calculation routes."""
 
+import asyncio
 import uuid
 
 
 from typing import Annotated, Literal
 from fastapi import Depends, HTTPException, Path, Query, Request, status
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.routing import APIRouter
 from dependency_injector.wiring import inject, Provide
 
 from api.v1.exceptions import BadRequestError, NotFoundError
 from api.v1.schemas.response import Response, ResponseError
+from api.v1.streaming import stream_calculation_results
 
-from models.calculation import (
-    CalculationConfigDto,
-    CalculationResultDto,
-    CalculationSetPreviewDto,
-)
+from models.calculation import CalculationSetPreviewDto
+from models.calculation_job import CalculationJobDto
 from models.method import Method
 from models.molecule_info import MoleculeSetStats
 from models.paging import PagedList
@@ -36,6 +35,7 @@ from api.v1.schemas.charges import (
 
 from models.setup import AdvancedSettingsDto
 
+from services.calculation_jobs import CalculationJobService
 from services.calculation_storage import CalculationStorageService
 from services.mmcif import MmCIFService
 from services.io import IOService
@@ -125,8 +125,7 @@ async def available_parameters(
 ) -> Response[list[Parameters]]:
     """Returns the list of available parameters for the provided method."""
 
-    methods = chargefw2.get_available_methods()
-    if not any(method.internal_name == method_name for method in methods):
+    if not chargefw2.is_method_available(method_name):
         raise BadRequestError(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Method '{method_name}' not found.",
@@ -177,14 +176,13 @@ async def best_parameters(
         permissiveTypes: Use similar parameters for similar atom/bond types if no exact match is found.
     """
 
-    methods = chargefw2.get_available_methods()
-    if not any(method.internal_name == data.method_name for method in methods):
+    if not chargefw2.is_method_available(data.method_name):
         raise BadRequestError(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Method '{data.method_name}' not found.",
         )
 
-    file_path = io_service.get_filepath(data.file_hash)
+    file_path = await asyncio.to_thread(io_service.get_filepath, data.file_hash)
 
     if file_path is None:
         raise BadRequestError(
@@ -194,7 +192,7 @@ async def best_parameters(
 
     try:
         parameters = await chargefw2.get_best_parameters(
-            data.method_name, file_path, data.permissive_types
+            data.method_name, data.file_hash, file_path, data.permissive_types
         )
         return Response[Parameters](data=parameters)
     except Exception as e:
@@ -242,7 +240,7 @@ async def info(
     user_id = str(request.state.user.id) if request.state.user is not None else None
 
     try:
-        filepath = io_service.get_filepath(data.file_hash, user_id)
+        filepath = await asyncio.to_thread(io_service.get_filepath, data.file_hash, user_id)
 
         if filepath is None:
             raise FileNotFoundError()
@@ -320,9 +318,15 @@ async def calculate_charges(
     response_format: Annotated[
         Literal["charges", "none"], Query(description="Output format.")
     ] = "charges",
+    stream: Annotated[
+        bool,
+        Query(
+            description="Stream the response incrementally. "
+            + "Recommended for large calculations, as the JSON is encoded one molecule at a time."
+        ),
+    ] = False,
     chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
     storage_service: CalculationStorageService = Depends(Provide[Container.storage_service]),
-    mmcif_service: MmCIFService = Depends(Provide[Container.mmcif_service]),
     io_service: IOService = Depends(Provide[Container.io_service]),
 ):
     """
@@ -342,118 +346,128 @@ async def calculate_charges(
     """
 
     user_id = str(request.state.user.id) if request.state.user is not None else None
-
-    if user_id is not None:
-        _, available_b, quota_b = io_service.get_quota(user_id)
-        if available_b <= 0:
-            quota_mb = quota_b / 1024 / 1024
-            raise BadRequestError(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Unable to calculate charges. Quota exceeded. "
-                + f"Maximum storage space is {quota_mb} MB.",
-            )
-
-    computation_id = data.computation_id or str(uuid.uuid4())
-    calculation_set = storage_service.get_calculation_set(computation_id)
-
-    if not data.file_hashes and calculation_set is None:
-        # if no file hashes provided and computation has not been set up
-        raise BadRequestError(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No file hashes provided.",
-        )
-
-    settings = calculation_set.advanced_settings if calculation_set is not None else data.settings
-
-    if settings is None:
-        settings = AdvancedSettingsDto()
+    computation_id, settings = await asyncio.to_thread(
+        _prepare_calculation, data, user_id, storage_service, io_service
+    )
 
     try:
-        io_service.prepare_inputs(user_id, computation_id, data.file_hashes)
-
-        if not data.file_hashes:
-            # get all files if none provided and computation has already been set up
-            inputs_path = io_service.get_inputs_path(computation_id, user_id)
-            data.file_hashes = [
-                io_service.parse_filename(file)[0] for file in io_service.listdir(inputs_path)
-            ]
-
-        if not data.file_hashes:
-            # no files found and provided
-            raise BadRequestError(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No file hashes provided.",
-            )
-
-        data.file_hashes = list(set(data.file_hashes))
-
-        total_size = sum(
-            io_service.get_file_size(file_hash, user_id) or 0 for file_hash in data.file_hashes
+        calculations = await chargefw2.run_calculation(
+            computation_id, settings, data.file_hashes, data.configs, user_id
         )
 
-        if total_size > io_service.max_file_size:
-            max_file_size_mb = io_service.max_file_size / 1024 / 1024
-            raise BadRequestError(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Unable to calculate charges. Calculation is too large. "
-                + f"Maximum allowed size is {max_file_size_mb} MB.",
+        if response_format == "none":
+            return Response(data=computation_id)
+
+        if stream:
+            return StreamingResponse(
+                stream_calculation_results(computation_id, calculations),
+                media_type="application/json",
             )
 
-        configs = data.configs
-        if not configs:
-            # use most suitable method and parameters if none provided
-            suitable = await chargefw2.get_computation_suitable_methods(computation_id, user_id)
+        return Response(data={"computationId": computation_id, "results": calculations})
+    except BadRequestError as e:
+        raise e
+    except Exception as e:
+        raise BadRequestError(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error calculating charges. {str(e)}"
+        ) from e
 
-            if len(suitable.methods) == 0:
-                raise BadRequestError(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail="No suitable methods found."
-                )
 
-            method_name = suitable.methods[0].internal_name
-            parameters = suitable.parameters.get(method_name, [])
-            parameters_name = parameters[0].internal_name if len(parameters) > 0 else None
+@charges_router.post(
+    "/calculate/submit",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        413: {
+            "description": "Unable to calculate charges. Calculation is too large.",
+            "model": ResponseError,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": False,
+                        "message": "Unable to calculate charges. Calculation is too large.",
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "No files provided.",
+            "model": ResponseError,
+            "content": {
+                "application/json": {"example": {"success": False, "message": "No files provided."}}
+            },
+        },
+    },
+)
+@inject
+def submit_calculation(
+    request: Request,
+    data: CalculateChargesRequest,
+    storage_service: CalculationStorageService = Depends(Provide[Container.storage_service]),
+    io_service: IOService = Depends(Provide[Container.io_service]),
+    job_service: CalculationJobService = Depends(Provide[Container.calculation_job_service]),
+) -> Response[CalculationJobDto]:
+    """
+    Submits calculation of partial atomic charges to be run in the background.
+    Returns the queued job, its progress can be polled using GET "/api/v1/charges/{computationId}/status".
+    Accepts the same data as "/api/v1/charges/calculate".
+    """
 
-            configs = [CalculationConfigDto(method=method_name, parameters=parameters_name)]
+    user_id = str(request.state.user.id) if request.state.user is not None else None
+    computation_id, settings = _prepare_calculation(data, user_id, storage_service, io_service)
 
-        # split calculations into those that need to be calculated and those that are cached
-        to_calculate, cached = storage_service.filter_existing_calculations(
-            settings, data.file_hashes, configs
-        )
-        calculations = await chargefw2.calculate_charges(
-            computation_id, settings, to_calculate, user_id
+    try:
+        job = job_service.submit(
+            computation_id, settings, data.file_hashes, data.configs, user_id
         )
+        return Response(data=job)
+    except Exception as e:
+        raise BadRequestError(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Error submitting calculation."
+        ) from e
 
-        # add cached items to results
-        for result in calculations:
-            if result.config in cached:
-                result.calculations.extend(cached[result.config])
 
-        calculations.extend(
-            [
-                CalculationResultDto(config=config, calculations=results)
-                for config, results in cached.items()
-            ]
-        )
-
-        storage_service.store_calculation_results(computation_id, settings, calculations, user_id)
-        await chargefw2.save_charges(settings, computation_id, calculations, user_id)
-        _ = mmcif_service.write_to_mmcif(user_id, computation_id, calculations)
+@charges_router.get(
+    "/{computation_id}/status",
+    responses={
+        404: {
+            "description": "Calculation not found.",
+            "model": ResponseError,
+            "content": {
+                "application/json": {
+                    "example": {"success": False, "message": "Calculation not found."}
+                }
+            },
+        },
+    },
+)
+@inject
+def calculation_status(
+    request: Request,
+    computation_id: Annotated[str, Path(description="UUID of the computation.")],
+    job_service: CalculationJobService = Depends(Provide[Container.calculation_job_service]),
+) -> Response[CalculationJobDto]:
+    """
+    Returns status of the latest calculation submitted for the provided computation.
 
-        if user_id is None:
-            # free guest compute space if needed
-            io_service.free_guest_compute_space()
+        status: One of "queued", "running", "finished" and "failed".
+        processed: Number of processed (file, config) pairs.
+        total: Total number of (file, config) pairs.
+    """
 
-        if response_format == "none":
-            return Response(data=computation_id)
+    user_id = str(request.state.user.id) if request.state.user is not None else None
 
-        return Response(data={"computationId": computation_id, "results": calculations})
-    except BadRequestError as e:
-        raise e
+    try:
+        job = job_service.get_status(computation_id, user_id)
     except Exception as e:
         raise BadRequestError(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error calculating charges. {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Error getting calculation status."
         ) from e
 
+    if job is None:
+        raise NotFoundError(detail="Calculation not found.")
+
+    return Response(data=job)
+
 
 # --- Route handlers used by ACC II Web ---
 
@@ -482,7 +496,7 @@ async def computation_suitable_methods(
 
 @charges_router.post("/setup", include_in_schema=False)
 @inject
-async def setup(
+def setup(
     request: Request,
     config: SetupRequest,
     io_service: IOService = Depends(Provide[Container.io_service]),
@@ -538,22 +552,24 @@ async def get_mmcif(
     request: Request,
     computation_id: Annotated[str, Path(description="UUID of the computation.")],
     molecule: Annotated[str | None, Query(description="Molecule name.")] = None,
-    io: IOService = Depends(Provide[Container.io_service]),
     mmcif_service: MmCIFService = Depends(Provide[Container.mmcif_service]),
     storage_service: CalculationStorageService = Depends(Provide[Container.storage_service]),
+    chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
 ) -> FileResponse:
     """Returns a mmcif file for the provided molecule in the computation."""
 
     user_id = str(request.state.user.id) if request.state.user is not None else None
 
     # this is a workaround because molstar is not able to send cookies when fetching mmcif
-    set_exists = storage_service.get_calculation_set(computation_id)
+    set_exists = await asyncio.to_thread(storage_service.get_calculation_set, computation_id)
     if set_exists is not None and set_exists.user_id is not None:
         user_id = str(set_exists.user_id)
 
     try:
-        charges_path = io.get_charges_path(computation_id, user_id)
-        mmcif_path = mmcif_service.get_molecule_mmcif(charges_path, molecule)
+        charges_path = await chargefw2.ensure_outputs(computation_id, user_id)
+        mmcif_path = await asyncio.to_thread(
+            mmcif_service.get_molecule_mmcif, charges_path, molecule
+        )
         return FileResponse(path=mmcif_path)
     except FileNotFoundError as e:
         raise NotFoundError(detail=f"MMCIF file for molecule '{molecule}' not found.") from e
@@ -566,7 +582,7 @@ async def get_mmcif(
 
 @charges_router.get("/examples/{example_id}/mmcif", include_in_schema=False)
 @inject
-async def get_example_mmcif(
+def get_example_mmcif(
     example_id: Annotated[str, Path(description="ID of the example.", example="phenols")],
     molecule: Annotated[str | None, Query(description="Molecule name.")] = None,
     io: IOService = Depends(Provide[Container.io_service]),
@@ -593,15 +609,14 @@ async def get_example_mmcif(
 async def get_molecules(
     request: Request,
     computation_id: Annotated[str, Path(description="UUID of the computation.")],
-    io: IOService = Depends(Provide[Container.io_service]),
     chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
 ) -> Response[list[str]]:
     """Returns the list of molecules in the provided computation."""
     user_id = str(request.state.user.id) if request.state.user is not None else None
 
     try:
-        charges_path = io.get_charges_path(computation_id, user_id)
-        molecules = chargefw2.get_calculation_molecules(charges_path)
+        charges_path = await chargefw2.ensure_outputs(computation_id, user_id)
+        molecules = await asyncio.to_thread(chargefw2.get_calculation_molecules, charges_path)
         return Response(data=sorted(molecules))
     except FileNotFoundError as e:
         raise NotFoundError(detail=f"Computation '{computation_id}' not found.") from e
@@ -614,7 +629,7 @@ async def get_molecules(
 
 @charges_router.get("/examples/{example_id}/molecules", include_in_schema=False)
 @inject
-async def get_example_molecules(
+def get_example_molecules(
     example_id: Annotated[str, Path(description="Id of the example.", example="phenols")],
     io: IOService = Depends(Provide[Container.io_service]),
     chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
@@ -635,12 +650,16 @@ async def get_example_molecules(
 
 @charges_router.get("/calculations", include_in_schema=False)
 @inject
-async def get_calculations(
+def get_calculations(
     request: Request,
     page: Annotated[int, Query(description="Page number.")] = 1,
     page_size: Annotated[int, Query(description="Number of items per page.")] = 10,
     order_by: Annotated[Literal["created_at"], Query(description="Order by field.")] = "created_at",
     order: Annotated[Literal["asc", "desc"], Query(description="Order direction.")] = "desc",
+    cursor: Annotated[
+        str | None,
+        Query(description="Cursor of the next page ('nextCursor' of the previous page)."),
+    ] = None,
     storage_service: CalculationStorageService = Depends(Provide[Container.storage_service]),
 ) -> Response[PagedList[CalculationSetPreviewDto]]:
     """Returns all calculations stored in the database."""
@@ -654,7 +673,12 @@ async def get_calculations(
 
     try:
         filters = CalculationSetFilters(
-            order=order, order_by=order_by, page=page, page_size=page_size, user_id=user_id
+            order=order,
+            order_by=order_by,
+            page=page,
+            page_size=page_size,
+            user_id=user_id,
+            cursor=cursor,
         )
         calculations = storage_service.get_calculations(filters)
         return Response(data=calculations)
@@ -666,7 +690,7 @@ async def get_calculations(
 
 @charges_router.delete("/{computation_id}", include_in_schema=False)
 @inject
-async def delete_calculation(
+def delete_calculation(
     request: Request,
     computation_id: Annotated[str, Path(description="UUID of the computation.")],
     chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
@@ -694,3 +718,83 @@ async def delete_calculation(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Something went wrong while deleting computation.",
         ) from e
+
+
+# --- Helpers ---
+
+
+def _prepare_calculation(
+    data: CalculateChargesRequest,
+    user_id: str | None,
+    storage_service: CalculationStorageService,
+    io_service: IOService,
+) -> tuple[str, AdvancedSettingsDto]:
+    """Validates calculation request and prepares inputs of the computation.
+
+    Fills in file hashes of an already set up computation if none are provided.
+
+    Returns:
+        tuple[str, AdvancedSettingsDto]: Computation id and advanced settings.
+    """
+
+    if user_id is not None:
+        _, available_b, quota_b = io_service.get_quota(user_id)
+        if available_b <= 0:
+            quota_mb = quota_b / 1024 / 1024
+            raise BadRequestError(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Unable to calculate charges. Quota exceeded. "
+                + f"Maximum storage space is {quota_mb} MB.",
+            )
+
+    computation_id = data.computation_id or str(uuid.uuid4())
+    calculation_set = storage_service.get_calculation_set(computation_id)
+
+    if not data.file_hashes and calculation_set is None:
+        # if no file hashes provided and computation has not been set up
+        raise BadRequestError(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file hashes provided.",
+        )
+
+    settings = calculation_set.advanced_settings if calculation_set is not None else data.settings
+    settings = AdvancedSettingsDto.model_validate(settings or AdvancedSettingsDto())
+
+    try:
+        io_service.prepare_inputs(user_id, computation_id, data.file_hashes)
+
+        if not data.file_hashes:
+            # get all files if none provided and computation has already been set up
+            inputs_path = io_service.get_inputs_path(computation_id, user_id)
+            data.file_hashes = [
+                io_service.parse_filename(file)[0] for file in io_service.listdir(inputs_path)
+            ]
+
+        if not data.file_hashes:
+            # no files found and provided
+            raise BadRequestError(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No file hashes provided.",
+            )
+
+        data.file_hashes = list(set(data.file_hashes))
+
+        total_size = sum(
+            io_service.get_file_size(file_hash, user_id) or 0 for file_hash in data.file_hashes
+        )
+
+        if total_size > io_service.max_file_size:
+            max_file_size_mb = io_service.max_file_size / 1024 / 1024
+            raise BadRequestError(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Unable to calculate charges. Calculation is too large. "
+                + f"Maximum allowed size is {max_file_size_mb} MB.",
+            )
+
+        return computation_id, settings
+    except BadRequestError as e:
+        raise e
+    except Exception as e:
+        raise BadRequestError(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error calculating charges. {str(e)}"
+        ) from e
@@ -7,7 +7,7 @@ import pathlib
 
 from typing import Annotated, Literal
 from fastapi import Depends, Path, Query, Request, UploadFile, status
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.routing import APIRouter
 from dependency_injector.wiring import inject, Provide
 
@@ -21,6 +21,7 @@ from models.paging import PagedList
 
 
 from services.file_storage import FileStorageService
+from services.guest_eviction import GuestEvictionService
 from services.chargefw2 import ChargeFW2Service
 from services.calculation_storage import CalculationStorageService
 from services.io import IOService
@@ -67,13 +68,18 @@ async def upload(
     files: list[UploadFile],
     io: IOService = Depends(Provide[Container.io_service]),
     storage_service: CalculationStorageService = Depends(Provide[Container.storage_service]),
+    file_storage: FileStorageService = Depends(Provide[Container.file_storage_service]),
     chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
 ) -> Response[list[UploadResponse]]:
     """Stores the provided files on disk and returns the computation id."""
 
-    def clear_stored_files(files: list[str]) -> None:
-        for file in files:
-            io.remove_file(file)
+    def clear_stored_files(file_hashes: list[str], user_id: str | None) -> None:
+        for file_hash in file_hashes:
+            file_storage.remove_file(file_hash, user_id)
+
+    def store_files(stored_files: list[tuple[str, str]], user_id: str | None) -> None:
+        for [path, file_hash] in stored_files:
+            file_storage.store_file(file_hash, path, user_id)
 
     try:
         io.ensure_upload_files_provided(files)
@@ -83,28 +89,42 @@ async def upload(
         upload_size_b = sum((file.size or 0) for file in files)
         user_id = str(request.state.user.id) if request.state.user is not None else None
 
-        io.ensure_quota_not_exceeded(upload_size_b, user_id)
+        await asyncio.to_thread(io.ensure_quota_not_exceeded, upload_size_b, user_id)
 
         workdir = io.get_file_storage_path(user_id)
         io.create_dir(workdir)
 
-        stored_files = await asyncio.gather(
-            *[io.store_upload_file(file, workdir) for file in files]
+        uploads = await asyncio.gather(*[io.store_upload_file(file, workdir) for file in files])
+        stored_files = [(path, file_hash) for [path, file_hash, _] in uploads]
+
+        # files the user has already uploaded before must not be removed on errors
+        created_hashes = [file_hash for [_, file_hash, created] in uploads if created]
+
+        # files uploaded before (by anyone) were already parsed successfully
+        known_hashes = await asyncio.to_thread(
+            storage_service.get_stored_file_hashes,
+            [file_hash for [_, file_hash] in stored_files],
         )
 
         for [path, file_hash] in stored_files:
+            if file_hash in known_hashes:
+                continue
+
             try:
                 info = await chargefw2.info(path)
             except RuntimeError:
                 # Remove files that were uploaded if an error occurs
-                clear_stored_files([path for [path, _] in stored_files])
+                await asyncio.to_thread(clear_stored_files, created_hashes, user_id)
                 _, filename = io.parse_filename(pathlib.Path(path).name)
                 raise BadRequestError(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Unable to load molecules from file '{filename}'.",
                 )
 
-            storage_service.store_file_info(file_hash, info)
+            await asyncio.to_thread(storage_service.store_file_info, file_hash, info)
+            chargefw2.precompute_suitable_methods(file_hash, path)
+
+        await asyncio.to_thread(store_files, stored_files, user_id)
 
         data = [
             UploadResponse(file=io.parse_filename(pathlib.Path(name).name)[1], file_hash=file_hash)
@@ -151,19 +171,16 @@ async def download_charges(
     request: Request,
     computation_id: Annotated[str, Path(description="UUID of the computation.")],
     io: IOService = Depends(Provide[Container.io_service]),
+    chargefw2: ChargeFW2Service = Depends(Provide[Container.chargefw2_service]),
 ) -> FileResponse:
     """Returns a zip file with all charges for the provided computation."""
 
     user_id = str(request.state.user.id) if request.state.user is not None else None
 
     try:
-        charges_path = io.get_charges_path(computation_id, user_id)
-        if not io.path_exists(charges_path):
-            raise FileNotFoundError()
-
-        archive_path = io.zip_charges(charges_path)
+        charges_path = await chargefw2.ensure_outputs(computation_id, user_id)
 
-        return FileResponse(path=archive_path, media_type="application/zip")
+        return await asyncio.to_thread(_charges_archive_response, io, charges_path)
     except FileNotFoundError as e:
         raise NotFoundError(detail=f"Computation '{computation_id}' not found.") from e
     except Exception as e:
@@ -194,7 +211,7 @@ async def download_charges(
     },
 )
 @inject
-async def download_file(
+def download_file(
     request: Request,
     file_hash: Annotated[str, Path(description="Hash of the file to download.")],
     io: IOService = Depends(Provide[Container.io_service]),
@@ -222,7 +239,7 @@ async def download_file(
 
 @files_router.get(path="", include_in_schema=False)
 @inject
-async def get_files(
+def get_files(
     request: Request,
     page: Annotated[int, Query(description="Page number", ge=1)] = 1,
     page_size: Annotated[int, Query(description="Number of items per page", ge=1)] = 10,
@@ -263,7 +280,7 @@ async def get_files(
 
 @files_router.get("/download/examples/{example_id}", include_in_schema=False)
 @inject
-async def download_example(
+def download_example(
     example_id: Annotated[str, Path(description="ID of the example.", example="phenols")],
     io: IOService = Depends(Provide[Container.io_service]),
 ) -> FileResponse:
@@ -272,9 +289,7 @@ async def download_example(
         if not io.path_exists(charges_path):
             raise FileNotFoundError()
 
-        archive_path = io.zip_charges(charges_path)
-
-        return FileResponse(path=archive_path, media_type="application/zip")
+        return _charges_archive_response(io, charges_path)
     except FileNotFoundError as e:
         raise NotFoundError(detail=f"Example '{example_id}' not found.") from e
     except Exception as e:
@@ -286,7 +301,7 @@ async def download_example(
 
 @files_router.get("/quota", include_in_schema=False)
 @inject
-async def get_quota(
+def get_quota(
     request: Request,
     io: IOService = Depends(Provide[Container.io_service]),
 ) -> Response[QuotaResponse]:
@@ -310,12 +325,42 @@ async def get_quota(
         ) from e
 
 
+@files_router.get("/quota/guest/metrics", include_in_schema=False)
+@inject
+def get_guest_storage_metrics(
+    request: Request,
+    guest_eviction: GuestEvictionService = Depends(Provide[Container.guest_eviction_service]),
+    admin_openids: frozenset[str] = Depends(Provide[Container.admin_openids]),
+) -> Response[dict]:
+    """Returns usage of guest storage and metrics of its eviction. Only available to admins."""
+
+    if request.state.user is None:
+        raise BadRequestError(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You need to be logged in to see guest storage metrics.",
+        )
+
+    if request.state.user.openid not in admin_openids:
+        raise BadRequestError(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to see guest storage metrics.",
+        )
+
+    try:
+        return Response(data=guest_eviction.get_metrics())
+    except Exception as e:
+        raise BadRequestError(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error getting guest storage metrics.",
+        ) from e
+
+
 @files_router.delete("/{file_hash}", include_in_schema=False)
 @inject
-async def delete_file(
+def delete_file(
     request: Request,
     file_hash: Annotated[str, Path(description="UUID of the file to delete.")],
-    io: IOService = Depends(Provide[Container.io_service]),
+    file_storage: FileStorageService = Depends(Provide[Container.file_storage_service]),
 ) -> Response[None]:
     """Deletes all files uploaded by the user."""
 
@@ -328,10 +373,27 @@ async def delete_file(
         )
 
     try:
-        io.remove_file(file_hash, user_id)
+        file_storage.remove_file(file_hash, user_id)
         return Response(data=None)
     except Exception as e:
         raise BadRequestError(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error deleting files.",
         ) from e
+
+
+# --- Helpers ---
+
+
+def _charges_archive_response(
+    io: IOService, charges_path: str
+) -> FileResponse | StreamingResponse:
+    archive_path, entries = io.get_charges_archive(charges_path)
+
+    if io.path_exists(archive_path):
+        return FileResponse(path=archive_path, media_type="application/zip")
+
+    # archive is built while being sent (in a threadpool) and cached for next downloads
+    return StreamingResponse(
+        io.stream_charges_archive(archive_path, entries), media_type="application/zip"
+    )
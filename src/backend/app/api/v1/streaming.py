@@ -0,0 +1,78 @@
+"""Helpers for streaming large responses."""
+
+from typing import Iterator
+
+from pydantic_core import to_json
+
+from models.calculation import CalculationDto, CalculationResultDto
+
+# Small pieces are joined into chunks of at least this size before being sent
+CHUNK_SIZE = 64 * 1024
+
+
+def stream_calculation_results(
+    computation_id: str, results: list[CalculationResultDto]
+) -> Iterator[bytes]:
+    """Serializes calculation results incrementally.
+
+    Yields the same JSON document as `Response(data={"computationId": ..., "results": ...})`,
+    but charges are encoded one molecule at a time, so that neither the encoded document
+    nor its intermediate `jsonable_encoder` copy is held in memory at once. The results
+    themselves are already in memory, so peak memory is reduced but not bounded.
+    Non-finite charges (NaN, infinity) are encoded as `null`, which the non-streamed
+    response can not encode at all.
+
+    Args:
+        computation_id (str): Computation id.
+        results (list[CalculationResultDto]): Calculation results.
+
+    Yields:
+        Iterator[bytes]: Chunks of the JSON document.
+    """
+
+    buffer = bytearray()
+
+    for piece in _serialize_calculation_results(computation_id, results):
+        buffer += piece
+
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def _serialize_calculation_results(
+    computation_id: str, results: list[CalculationResultDto]
+) -> Iterator[bytes]:
+    yield b'{"success":true,"data":{"computationId":' + to_json(computation_id) + b',"results":['
+
+    for i, result in enumerate(results):
+        if i > 0:
+            yield b","
+
+        yield b'{"config":' + result.config.model_dump_json(by_alias=True).encode()
+        yield b',"calculations":['
+
+        for j, calculation in enumerate(result.calculations):
+            if j > 0:
+                yield b","
+
+            yield from _serialize_calculation(calculation)
+
+        yield b"]}"
+
+    yield b"]}}"
+
+
+def _serialize_calculation(calculation: CalculationDto) -> Iterator[bytes]:
+    yield b'{"file":' + to_json(calculation.file)
+    yield b',"fileHash":' + to_json(calculation.file_hash)
+    yield b',"charges":{'
+
+    for i, (molecule, charges) in enumerate(calculation.charges.items()):
+        prefix = b"," if i > 0 else b""
+        yield prefix + to_json(molecule) + b":" + to_json(charges, inf_nan_mode="null")
+
+    yield b'},"config":' + calculation.config.model_dump_json(by_alias=True).encode() + b"}"
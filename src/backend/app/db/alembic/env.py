@@ -10,8 +10,13 @@ from alembic import context
 
 from db.schemas import Base  # noqa: F401
 
+from db.schemas.best_parameters import *  # noqa: F401
 from db.schemas.calculation import *  # noqa: F401
+from db.schemas.calculation_job import *  # noqa: F401
+from db.schemas.molecule_charges import *  # noqa: F401
 from db.schemas.stats import *  # noqa: F401
+from db.schemas.suitable_methods import *  # noqa: F401
+from db.schemas.uploaded_file import *  # noqa: F401
 from db.schemas.user import *  # noqa: F401
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,114 @@
+"""Calculations binary charges
+
+Revision ID: 5c1f0e7a9b3d
+Revises: 2be8d29189d7
+Create Date: 2026-10-18 10:12:41.381204
+
+"""
+import sys
+
+from array import array
+from typing import Callable, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e7a9b3d'
+down_revision: Union[str, None] = '2be8d29189d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+
+calculations = sa.table(
+    'calculations',
+    sa.column('id', sa.Uuid()),
+    sa.column('charges', sa.JSON()),
+    sa.column('charges_data', sa.LargeBinary()),
+    sa.column('charges_layout', sa.JSON()),
+)
+
+
+def encode_charges(charges: dict[str, list[float]]) -> tuple[bytes, list[list]]:
+    # kept in sync with db.schemas.calculation.encode_charges
+    values = array('d')
+    layout = []
+
+    for molecule, molecule_charges in charges.items():
+        values.extend(molecule_charges)
+        layout.append([molecule, len(molecule_charges)])
+
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values.tobytes(), layout
+
+
+def decode_charges(data: bytes, layout: list[list]) -> dict[str, list[float]]:
+    # kept in sync with db.schemas.calculation.decode_charges
+    values = array('d')
+    values.frombytes(data)
+
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    charges = {}
+    offset = 0
+    for molecule, count in layout:
+        charges[molecule] = values[offset : offset + count].tolist()
+        offset += count
+
+    return charges
+
+
+def convert(source: list[sa.ColumnClause], convert_row: Callable, targets: list[str]) -> None:
+    connection = op.get_bind()
+    last_id = None
+
+    while True:
+        statement = (
+            sa.select(calculations.c.id, *source).order_by(calculations.c.id).limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            statement = statement.where(calculations.c.id > last_id)
+
+        rows = connection.execute(statement).all()
+        if len(rows) == 0:
+            break
+
+        for row in rows:
+            values = dict(zip(targets, convert_row(*row[1:])))
+            connection.execute(
+                calculations.update().where(calculations.c.id == row.id).values(**values)
+            )
+
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('calculations', sa.Column('charges_data', sa.LargeBinary(), nullable=True))
+    op.add_column('calculations', sa.Column('charges_layout', sa.JSON(), nullable=True))
+
+    convert([calculations.c.charges], encode_charges, ['charges_data', 'charges_layout'])
+
+    op.alter_column('calculations', 'charges_data', nullable=False)
+    op.alter_column('calculations', 'charges_layout', nullable=False)
+    op.drop_column('calculations', 'charges')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('calculations', sa.Column('charges', sa.JSON(), nullable=True))
+
+    convert(
+        [calculations.c.charges_data, calculations.c.charges_layout],
+        lambda data, layout: (decode_charges(data, layout),),
+        ['charges'],
+    )
+
+    op.alter_column('calculations', 'charges', nullable=False)
+    op.drop_column('calculations', 'charges_layout')
+    op.drop_column('calculations', 'charges_data')
@@ -0,0 +1,45 @@
+"""ChargeFW2 version of cached results
+
+Revision ID: d2f7b4e9a6c1
+Revises: c6e1a9f3d5b7
+Create Date: 2026-10-18 22:41:07.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7b4e9a6c1'
+down_revision: Union[str, None] = 'c6e1a9f3d5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# primary keys of cached results without the ChargeFW2 version
+PRIMARY_KEYS = {
+    'molecule_charges': ['fingerprint', 'method', 'parameters', 'read_hetatm', 'ignore_water', 'permissive_types'],
+    'suitable_methods': ['file_hash', 'permissive_types'],
+    'best_parameters': ['file_hash', 'method', 'permissive_types'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, columns in PRIMARY_KEYS.items():
+        # version of ChargeFW2 which produced cached results is unknown, they are computed again
+        op.execute(sa.text(f'DELETE FROM {table}'))
+        op.add_column(table, sa.Column('chargefw2_version', sa.VARCHAR(length=64), nullable=False))
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.create_primary_key(f'{table}_pkey', table, [*columns, 'chargefw2_version'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in PRIMARY_KEYS.items():
+        # results of different versions would collide in the original primary key
+        op.execute(sa.text(f'DELETE FROM {table}'))
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.drop_column(table, 'chargefw2_version')
+        op.create_primary_key(f'{table}_pkey', table, columns)
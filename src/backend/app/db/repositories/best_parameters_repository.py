@@ -0,0 +1,74 @@
+"""This module provides a repository for best parameters of files."""
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db.schemas.best_parameters import BestParameters
+
+
+class BestParametersRepository:
+    """Repository for managing best parameters of files."""
+
+    def __init__(self, chargefw2_version: str):
+        """
+        Args:
+            chargefw2_version (str): Version of ChargeFW2 whose parameters are stored
+                and looked up.
+        """
+
+        self.chargefw2_version = chargefw2_version
+
+    def get(
+        self, session: Session, file_hash: str, method: str, permissive_types: bool
+    ) -> BestParameters | None:
+        """Get stored best parameters of a method for a file.
+
+        Args:
+            file_hash (str): Hash of the file.
+            method (str): Internal name of the method.
+            permissive_types (bool): Whether permissive atom types are used.
+
+        Returns:
+            BestParameters | None: Stored best parameters or None if not stored.
+        """
+
+        statement = select(BestParameters).where(
+            BestParameters.file_hash == file_hash,
+            BestParameters.method == method,
+            BestParameters.permissive_types == permissive_types,
+            BestParameters.chargefw2_version == self.chargefw2_version,
+        )
+
+        return (session.execute(statement)).scalars().first()
+
+    def store(self, session: Session, best_parameters: BestParameters) -> None:
+        """Store best parameters of a method for a file. Already stored parameters are replaced.
+
+        Args:
+            best_parameters (BestParameters): Best parameters to store.
+                Stats of the file have to be stored before.
+        """
+
+        # the same file may be queried concurrently
+        statement = (
+            insert(BestParameters)
+            .values(
+                file_hash=best_parameters.file_hash,
+                method=best_parameters.method,
+                permissive_types=best_parameters.permissive_types,
+                chargefw2_version=self.chargefw2_version,
+                parameters=best_parameters.parameters,
+            )
+        )
+        # stored parameters may no longer exist in ChargeFW2, so they are replaced
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                BestParameters.file_hash,
+                BestParameters.method,
+                BestParameters.permissive_types,
+                BestParameters.chargefw2_version,
+            ],
+            set_={"parameters": statement.excluded.parameters},
+        )
+        session.execute(statement)
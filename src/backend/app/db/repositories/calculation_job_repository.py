@@ -0,0 +1,120 @@
+"""This module provides a repository for calculation jobs."""
+
+from datetime import datetime
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+
+from db.schemas.calculation_job import CalculationJob
+
+
+class CalculationJobRepository:
+    """Repository for managing calculation jobs."""
+
+    def get_latest(self, session: Session, computation_id: str) -> CalculationJob | None:
+        """Get the most recently submitted job of a computation.
+
+        Args:
+            computation_id (str): Computation id.
+
+        Returns:
+            CalculationJob | None: Latest job of the computation if exists, otherwise None.
+        """
+
+        statement = (
+            select(CalculationJob)
+            .where(CalculationJob.computation_id == computation_id)
+            .order_by(CalculationJob.created_at.desc())
+            .limit(1)
+        )
+
+        return (session.execute(statement)).scalars().first()
+
+    def claim_next(self, session: Session, now: datetime) -> CalculationJob | None:
+        """Claim the oldest queued job and mark it as running.
+
+        Rows locked by other workers are skipped, so that multiple workers
+        (even in different processes) never claim the same job.
+
+        Args:
+            now (datetime): Current time.
+
+        Returns:
+            CalculationJob | None: Claimed job or None if there is no queued job.
+        """
+
+        statement = (
+            select(CalculationJob)
+            .where(CalculationJob.status == "queued")
+            .order_by(CalculationJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+
+        job = (session.execute(statement)).scalars().first()
+
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+
+        return job
+
+    def update(self, session: Session, job_id: str, **values) -> None:
+        """Update columns of a job.
+
+        Args:
+            job_id (str): Job id.
+            **values: Column values to set.
+        """
+
+        session.execute(update(CalculationJob).where(CalculationJob.id == job_id).values(**values))
+
+    def requeue_stale(
+        self, session: Session, heartbeat_before: datetime, max_attempts: int
+    ) -> int:
+        """Return running jobs without a recent heartbeat (e.g. their worker died) to the queue.
+
+        Jobs which have already been attempted `max_attempts` times are marked as failed.
+
+        Args:
+            heartbeat_before (datetime): Jobs with older heartbeat are considered stale.
+            max_attempts (int): Maximum number of attempts of a job.
+
+        Returns:
+            int: Number of requeued jobs.
+        """
+
+        is_stale = and_(
+            CalculationJob.status == "running", CalculationJob.heartbeat_at < heartbeat_before
+        )
+
+        session.execute(
+            update(CalculationJob)
+            .where(and_(is_stale, CalculationJob.attempts >= max_attempts))
+            .values(status="failed", error="Calculation was interrupted.")
+        )
+        result = session.execute(
+            update(CalculationJob)
+            .where(and_(is_stale, CalculationJob.attempts < max_attempts))
+            .values(status="queued")
+        )
+
+        return result.rowcount
+
+    def store(self, session: Session, job: CalculationJob) -> CalculationJob:
+        """Store a calculation job in the database.
+
+        Args:
+            job (CalculationJob): Job to store.
+
+        Returns:
+            CalculationJob: Stored job.
+        """
+
+        session.add(job)
+
+        return job
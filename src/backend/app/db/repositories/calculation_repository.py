@@ -1,11 +1,12 @@
 """This module provides a repository for calculations."""
 
-from sqlalchemy import and_, Select, func, select
+from sqlalchemy import and_, or_, Select, func, select
 from sqlalchemy.orm import joinedload, Session
 
 
 from models.paging import PagedList
-from models.calculation import CalculationsFilters
+from models.calculation import CalculationConfigDto, CalculationsFilters
+from models.setup import AdvancedSettingsDto
 
 from db.schemas.calculation import AdvancedSettings, Calculation, CalculationConfig
 from db.repositories.calculation_set_repository import CalculationSetRepository
@@ -50,6 +51,61 @@ class CalculationRepository:
         calculation = (session.execute(statement)).unique().scalars().first()
         return calculation
 
+    def get_many(
+        self,
+        session: Session,
+        file_hashes: list[str],
+        configs: list[CalculationConfigDto],
+        settings: AdvancedSettingsDto,
+    ) -> dict[tuple[str, str | None, str | None], Calculation]:
+        """Get all previous calculations of provided files and configs using a single query.
+
+        Args:
+            file_hashes (list[str]): Hashes of files to get calculations for.
+            configs (list[CalculationConfigDto]): Configs to get calculations for.
+            settings (AdvancedSettingsDto): Advanced settings used for the calculations.
+
+        Returns:
+            dict[tuple[str, str | None, str | None], Calculation]: Calculations
+                keyed by (file_hash, method, parameters).
+        """
+
+        if len(file_hashes) == 0 or len(configs) == 0:
+            return {}
+
+        config_pairs = {(config.method, config.parameters) for config in configs}
+
+        statement = (
+            select(Calculation)
+            .join(CalculationConfig)
+            .join(AdvancedSettings)
+            .options(joinedload(Calculation.config), joinedload(Calculation.advanced_settings))
+            .where(
+                and_(
+                    Calculation.file_hash.in_(set(file_hashes)),
+                    or_(
+                        *[
+                            and_(
+                                CalculationConfig.method == method,
+                                CalculationConfig.parameters == parameters,
+                            )
+                            for method, parameters in config_pairs
+                        ]
+                    ),
+                    AdvancedSettings.read_hetatm == settings.read_hetatm,
+                    AdvancedSettings.ignore_water == settings.ignore_water,
+                    AdvancedSettings.permissive_types == settings.permissive_types,
+                )
+            )
+        )
+
+        calculations = {}
+        for calculation in (session.execute(statement)).unique().scalars():
+            key = (calculation.file_hash, calculation.config.method, calculation.config.parameters)
+            calculations.setdefault(key, calculation)
+
+        return calculations
+
     def store(self, session: Session, calculation: Calculation) -> Calculation:
         """Store a single calculation set in the database.
 
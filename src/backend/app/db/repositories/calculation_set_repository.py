@@ -1,15 +1,20 @@
 """This module provides a repository for calculation sets."""
 
+import base64
+import uuid
+
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Literal
 
-from sqlalchemy import Select, func, select, and_
-from sqlalchemy.orm import joinedload, Session
+from sqlalchemy import Select, func, select, and_, tuple_
+from sqlalchemy.orm import joinedload, selectinload, Session
 
 
 from models.paging import PagedList, PagingFilters
 
-from db.schemas.calculation import CalculationSet
+from db.schemas.calculation import CalculationSet, CalculationSetStats
+from db.schemas.stats import MoleculeSetStats
 
 
 @dataclass
@@ -19,6 +24,7 @@ class CalculationSetFilters(PagingFilters):
     order_by: str
     order: Literal["asc", "desc"]
     user_id: str | None = None
+    cursor: str | None = None
 
 
 class CalculationSetRepository:
@@ -29,26 +35,50 @@ class CalculationSetRepository:
     ) -> PagedList[CalculationSet]:
         """Get all previous calculations matching the provided filters.
 
+        Calculation sets ordered by creation time are paged by keyset when a cursor
+        (`next_cursor` of the previous page) is provided, otherwise by offset.
+
         Args:
-            filters (PagingFilters): Filters for paging.
+            filters (CalculationSetFilters): Filters for paging.
+
+        Raises:
+            ValueError: If the provided cursor is invalid.
 
         Returns:
             PagedList[CalculationSet]: Paged list of calculation sets.
         """
 
+        condition = and_(
+            # Return only sets having some calculations
+            CalculationSet.configs.any(),
+            CalculationSet.user_id == filters.user_id,
+        )
+
+        # Related rows are loaded by a constant number of "IN" queries per page
+        # instead of being joined (and duplicated) for every calculation set.
         statement = (
             select(CalculationSet)
-            .options(joinedload(CalculationSet.configs))
-            .options(joinedload(CalculationSet.advanced_settings))
-            .options(joinedload(CalculationSet.molecule_set_stats))
-            .order_by(getattr(getattr(CalculationSet, filters.order_by), filters.order)())
-            # Return only sets having some calculations
-            .where(and_(CalculationSet.configs.any(), CalculationSet.user_id == filters.user_id))
+            .options(
+                selectinload(CalculationSet.configs),
+                selectinload(CalculationSet.advanced_settings),
+                selectinload(CalculationSet.molecule_set_stats_associations)
+                .selectinload(CalculationSetStats.molecule_set)
+                .selectinload(MoleculeSetStats.atom_type_counts),
+            )
+            .where(condition)
         )
 
-        calculations = self._paginate(session, statement, filters.page, filters.page_size)
+        total_statement = select(func.count(CalculationSet.id)).where(condition)
+        total_count = session.execute(total_statement).scalar() or 0
+
+        if filters.order_by == "created_at":
+            return self._paginate_keyset(session, statement, filters, total_count)
+
+        statement = statement.order_by(
+            getattr(getattr(CalculationSet, filters.order_by), filters.order)()
+        )
 
-        return calculations
+        return self._paginate(session, statement, filters.page, filters.page_size, total_count)
 
     def get(self, session: Session, calculation_id: str) -> CalculationSet | None:
         """Get a single previous calculation by id.
@@ -104,14 +134,61 @@ class CalculationSetRepository:
             session.add(calculation_set)
 
     def _paginate(
-        self, session: Session, statement: Select, page: int, page_size: int
+        self, session: Session, statement: Select, page: int, page_size: int, total_count: int
     ) -> PagedList[CalculationSet]:
-        total_statement = select(func.count()).select_from(statement)
         items_statement = statement.limit(page_size).offset((page - 1) * page_size)
-
-        total_count = (session.execute(total_statement)).unique().scalar()
-        items = (session.execute(items_statement)).unique().scalars(CalculationSet).all()
+        items = (session.execute(items_statement)).scalars(CalculationSet).all()
 
         return PagedList[CalculationSet](
             page=page, page_size=page_size, total_count=total_count, items=items
         )
+
+    def _paginate_keyset(
+        self,
+        session: Session,
+        statement: Select,
+        filters: CalculationSetFilters,
+        total_count: int,
+    ) -> PagedList[CalculationSet]:
+        # Sets are ordered by (created_at, id) so that the order is stable for equal timestamps.
+        direction = filters.order
+        statement = statement.order_by(
+            getattr(CalculationSet.created_at, direction)(), getattr(CalculationSet.id, direction)()
+        )
+
+        if filters.cursor is not None:
+            created_at, set_id = self._decode_cursor(filters.cursor)
+            key = tuple_(CalculationSet.created_at, CalculationSet.id)
+            statement = statement.where(
+                key < (created_at, set_id) if direction == "desc" else key > (created_at, set_id)
+            )
+        else:
+            statement = statement.offset((filters.page - 1) * filters.page_size)
+
+        # One extra row tells whether there is a next page
+        items = list(
+            (session.execute(statement.limit(filters.page_size + 1))).scalars(CalculationSet).all()
+        )
+        has_next = len(items) > filters.page_size
+        items = items[: filters.page_size]
+
+        return PagedList[CalculationSet](
+            page=filters.page,
+            page_size=filters.page_size,
+            total_count=total_count,
+            items=items,
+            next_cursor=self._encode_cursor(items[-1]) if has_next else None,
+        )
+
+    @staticmethod
+    def _encode_cursor(calculation_set: CalculationSet) -> str:
+        value = f"{calculation_set.created_at.isoformat()}|{calculation_set.id}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+        try:
+            created_at, set_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), uuid.UUID(set_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor.") from e
@@ -0,0 +1,107 @@
+"""This module provides a repository for charges of individual molecules."""
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.calculation import CalculationConfigDto
+from models.setup import AdvancedSettingsDto
+
+from db.schemas.molecule_charges import MoleculeCharges
+
+
+class MoleculeChargesRepository:
+    """Repository for managing charges of individual molecules."""
+
+    # number of fingerprints looked up or stored by a single statement
+    BATCH_SIZE = 1000
+
+    def __init__(self, chargefw2_version: str):
+        """
+        Args:
+            chargefw2_version (str): Version of ChargeFW2 whose charges are stored and looked up.
+        """
+
+        self.chargefw2_version = chargefw2_version
+
+    def get_many(
+        self,
+        session: Session,
+        fingerprints: list[str],
+        config: CalculationConfigDto,
+        settings: AdvancedSettingsDto,
+    ) -> dict[str, list[float]]:
+        """Get stored charges of molecules calculated with the provided config and settings.
+
+        Args:
+            fingerprints (list[str]): Fingerprints of the molecules.
+            config (CalculationConfigDto): Config used for the calculation.
+            settings (AdvancedSettingsDto): Advanced settings used for the calculation.
+
+        Returns:
+            dict[str, list[float]]: Charges keyed by fingerprints of the molecules.
+                Molecules without stored charges are missing.
+        """
+
+        charges = {}
+
+        for start in range(0, len(fingerprints), self.BATCH_SIZE):
+            statement = select(MoleculeCharges).where(
+                and_(
+                    MoleculeCharges.fingerprint.in_(fingerprints[start : start + self.BATCH_SIZE]),
+                    *self._key(config, settings),
+                )
+            )
+
+            for molecule in (session.execute(statement)).scalars():
+                charges[molecule.fingerprint] = molecule.charges
+
+        return charges
+
+    def store_many(
+        self,
+        session: Session,
+        charges: dict[str, list[float]],
+        config: CalculationConfigDto,
+        settings: AdvancedSettingsDto,
+    ) -> None:
+        """Store charges of molecules. Already stored molecules are skipped.
+
+        Args:
+            charges (dict[str, list[float]]): Charges keyed by fingerprints of the molecules.
+            config (CalculationConfigDto): Config used for the calculation.
+            settings (AdvancedSettingsDto): Advanced settings used for the calculation.
+        """
+
+        rows = [
+            {
+                "fingerprint": fingerprint,
+                "method": config.method,
+                "parameters": config.parameters or "",
+                "read_hetatm": settings.read_hetatm,
+                "ignore_water": settings.ignore_water,
+                "permissive_types": settings.permissive_types,
+                "chargefw2_version": self.chargefw2_version,
+                "charges_data": MoleculeCharges.encode(molecule_charges),
+            }
+            for fingerprint, molecule_charges in charges.items()
+        ]
+
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            # the same molecules may be stored by concurrent calculations
+            statement = (
+                insert(MoleculeCharges)
+                .values(rows[start : start + self.BATCH_SIZE])
+                .on_conflict_do_nothing()
+            )
+            session.execute(statement)
+
+    def _key(self, config: CalculationConfigDto, settings: AdvancedSettingsDto) -> list:
+        return [
+            MoleculeCharges.method == config.method,
+            MoleculeCharges.parameters == (config.parameters or ""),
+            MoleculeCharges.read_hetatm == settings.read_hetatm,
+            MoleculeCharges.ignore_water == settings.ignore_water,
+            MoleculeCharges.permissive_types == settings.permissive_types,
+            MoleculeCharges.chargefw2_version == self.chargefw2_version,
+        ]
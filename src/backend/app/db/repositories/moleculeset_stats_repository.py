@@ -32,6 +32,22 @@ class MoleculeSetStatsRepository:
 
         return info
 
+    def get_existing_hashes(self, session: Session, file_hashes: list[str]) -> set[str]:
+        """Get hashes of files whose info is stored.
+
+        Args:
+            file_hashes (list[str]): Hashes of the files.
+
+        Returns:
+            set[str]: Hashes of the provided files having stored info.
+        """
+
+        statement = select(MoleculeSetStats.file_hash).where(
+            MoleculeSetStats.file_hash.in_(file_hashes)
+        )
+
+        return set((session.execute(statement)).scalars().all())
+
     def store(self, session: Session, info: MoleculeSetStats) -> CalculationConfig:
         """Store info about a file in the database.
            If a given config already exists, it is returned.
@@ -0,0 +1,90 @@
+"""This module provides a repository for methods suitable for files."""
+
+from dataclasses import asdict
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.method import Method
+from models.parameters import Parameters
+
+from db.schemas.suitable_methods import SuitableMethods
+
+
+class SuitableMethodsRepository:
+    """Repository for managing methods suitable for files."""
+
+    def __init__(self, chargefw2_version: str):
+        """
+        Args:
+            chargefw2_version (str): Version of ChargeFW2 whose methods are stored and looked up.
+        """
+
+        self.chargefw2_version = chargefw2_version
+
+    def get_many(
+        self, session: Session, file_hashes: list[str], permissive_types: bool
+    ) -> dict[str, list[tuple[Method, list[Parameters]]]]:
+        """Get stored suitable methods of the provided files.
+
+        Args:
+            file_hashes (list[str]): Hashes of the files.
+            permissive_types (bool): Whether permissive atom types are used.
+
+        Returns:
+            dict[str, list[tuple[Method, list[Parameters]]]]: Suitable methods with their
+                parameters keyed by file hashes. Files without stored methods are missing.
+        """
+
+        statement = select(SuitableMethods).where(
+            SuitableMethods.file_hash.in_(file_hashes),
+            SuitableMethods.permissive_types == permissive_types,
+            SuitableMethods.chargefw2_version == self.chargefw2_version,
+        )
+
+        return {
+            suitable.file_hash: [
+                (
+                    Method(**item["method"]),
+                    [Parameters(**parameters) for parameters in item["parameters"]],
+                )
+                for item in suitable.methods
+            ]
+            for suitable in (session.execute(statement)).scalars()
+        }
+
+    def store(
+        self,
+        session: Session,
+        file_hash: str,
+        permissive_types: bool,
+        methods: list[tuple[Method, list[Parameters]]],
+    ) -> None:
+        """Store suitable methods of a file. Already stored methods are kept.
+
+        Args:
+            file_hash (str): Hash of the file. Stats of the file have to be stored before.
+            permissive_types (bool): Whether permissive atom types are used.
+            methods (list[tuple[Method, list[Parameters]]]): Suitable methods
+                with their parameters.
+        """
+
+        # the same file may be uploaded or queried concurrently
+        statement = (
+            insert(SuitableMethods)
+            .values(
+                file_hash=file_hash,
+                permissive_types=permissive_types,
+                chargefw2_version=self.chargefw2_version,
+                methods=[
+                    {
+                        "method": asdict(method),
+                        "parameters": [asdict(p) for p in parameters or []],
+                    }
+                    for method, parameters in methods
+                ],
+            )
+            .on_conflict_do_nothing()
+        )
+        session.execute(statement)
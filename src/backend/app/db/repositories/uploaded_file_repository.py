@@ -0,0 +1,146 @@
+"""This module provides a repository for uploaded files."""
+
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.orm import selectinload, Session
+
+from models.paging import PagedList, PagingFilters
+
+from db.schemas.stats import MoleculeSetStats
+from db.schemas.uploaded_file import UploadedFile
+
+
+@dataclass
+class UploadedFileFilters(PagingFilters):
+    """Filters for uploaded files."""
+
+    order_by: Literal["name", "size", "uploaded_at"]
+    order: Literal["asc", "desc"]
+    user_id: str
+    search: str = ""
+
+
+class UploadedFileRepository:
+    """Repository for managing metadata of uploaded files."""
+
+    _ORDER_COLUMNS = {
+        "name": UploadedFile.file_name,
+        "size": UploadedFile.size,
+        "uploaded_at": UploadedFile.uploaded_at,
+    }
+
+    def get_all(self, session: Session, filters: UploadedFileFilters) -> PagedList[UploadedFile]:
+        """Get files of a user matching the provided filters.
+
+        Args:
+            filters (UploadedFileFilters): Filters for paging, ordering and searching.
+
+        Returns:
+            PagedList[UploadedFile]: Paged list of uploaded files with preloaded stats.
+        """
+
+        condition = UploadedFile.user_id == filters.user_id
+
+        if filters.search != "":
+            condition = and_(
+                condition,
+                UploadedFile.file_name.ilike(f"%{self._escape_like(filters.search)}%", escape="\\"),
+            )
+
+        column = self._ORDER_COLUMNS.get(filters.order_by, UploadedFile.uploaded_at)
+        statement = (
+            select(UploadedFile)
+            .options(
+                selectinload(UploadedFile.stats).selectinload(MoleculeSetStats.atom_type_counts)
+            )
+            .where(condition)
+            .order_by(getattr(column, filters.order)(), getattr(UploadedFile.id, filters.order)())
+            .limit(filters.page_size)
+            .offset((filters.page - 1) * filters.page_size)
+        )
+
+        total_statement = select(func.count(UploadedFile.id)).where(condition)
+
+        total_count = (session.execute(total_statement)).scalar() or 0
+        items = (session.execute(statement)).scalars(UploadedFile).all()
+
+        return PagedList[UploadedFile](
+            page=filters.page, page_size=filters.page_size, total_count=total_count, items=items
+        )
+
+    def get(self, session: Session, user_id: str, file_hash: str) -> UploadedFile | None:
+        """Get metadata of a single file of a user.
+
+        Args:
+            user_id (str): User id.
+            file_hash (str): Hash of the file.
+
+        Returns:
+            UploadedFile | None: Uploaded file or None if not found.
+        """
+
+        statement = select(UploadedFile).where(
+            and_(UploadedFile.user_id == user_id, UploadedFile.file_hash == file_hash)
+        )
+
+        return (session.execute(statement)).scalars().first()
+
+    def get_hashes(self, session: Session, user_id: str) -> set[str]:
+        """Get hashes of all files of a user.
+
+        Args:
+            user_id (str): User id.
+
+        Returns:
+            set[str]: Hashes of the files.
+        """
+
+        statement = select(UploadedFile.file_hash).where(UploadedFile.user_id == user_id)
+
+        return set((session.execute(statement)).scalars().all())
+
+    def store(self, session: Session, uploaded_file: UploadedFile) -> UploadedFile:
+        """Store metadata of an uploaded file.
+           If the user already uploaded the same file, its metadata are updated.
+
+        Args:
+            uploaded_file (UploadedFile): Uploaded file.
+
+        Returns:
+            UploadedFile: Stored uploaded file.
+        """
+
+        exists = self.get(session, uploaded_file.user_id, uploaded_file.file_hash)
+
+        if exists is None:
+            session.add(uploaded_file)
+            return uploaded_file
+
+        exists.file_name = uploaded_file.file_name
+        exists.size = uploaded_file.size
+        exists.uploaded_at = uploaded_file.uploaded_at
+        exists.molecule_set_id = uploaded_file.molecule_set_id
+
+        return exists
+
+    def delete(self, session: Session, user_id: str, file_hashes: list[str]) -> None:
+        """Delete metadata of files of a user.
+
+        Args:
+            user_id (str): User id.
+            file_hashes (list[str]): Hashes of the files to delete.
+        """
+
+        if not file_hashes:
+            return
+
+        session.execute(
+            delete(UploadedFile).where(
+                and_(UploadedFile.user_id == user_id, UploadedFile.file_hash.in_(file_hashes))
+            )
+        )
+
+    def _escape_like(self, value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
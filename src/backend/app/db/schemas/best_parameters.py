@@ -0,0 +1,24 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.schemas import Base
+
+
+class BestParameters(Base):
+    """Best parameters of a method for the molecules of a file (identified by file_hash)."""
+
+    __tablename__ = "best_parameters"
+
+    file_hash: Mapped[str] = mapped_column(
+        sa.VARCHAR(100), sa.ForeignKey("molecule_set_stats.file_hash"), primary_key=True
+    )
+    method: Mapped[str] = mapped_column(sa.VARCHAR(20), primary_key=True)
+    permissive_types: Mapped[bool] = mapped_column(sa.Boolean, primary_key=True)
+    # results of other ChargeFW2 versions (or parameter files) are not reused
+    chargefw2_version: Mapped[str] = mapped_column(sa.VARCHAR(64), primary_key=True)
+
+    # internal name of the parameters, None if no parameters are suitable
+    parameters: Mapped[str | None] = mapped_column(sa.VARCHAR(50), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<BestParameters file_hash={self.file_hash}, method={self.method}, parameters={self.parameters}>"
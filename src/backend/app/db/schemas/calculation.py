@@ -1,5 +1,7 @@
+import sys
 import uuid
 
+from array import array
 from datetime import datetime
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, relationship, mapped_column
@@ -7,6 +9,57 @@ from sqlalchemy.orm import Mapped, relationship, mapped_column
 from db.schemas import Base
 
 
+def encode_charges(charges: dict[str, list[float]]) -> tuple[bytes, list[list]]:
+    """Encodes charges to a blob of little-endian doubles and a layout.
+
+    Args:
+        charges (dict[str, list[float]]): Dictionary with molecule names as keys
+            and list of charges as values.
+
+    Returns:
+        tuple[bytes, list[list]]: Charges of all molecules stored as a contiguous
+            array of doubles and layout holding [molecule name, number of charges] pairs.
+    """
+
+    values = array("d")
+    layout = []
+
+    for molecule, molecule_charges in charges.items():
+        values.extend(molecule_charges)
+        layout.append([molecule, len(molecule_charges)])
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values.tobytes(), layout
+
+
+def decode_charges(data: bytes, layout: list[list]) -> dict[str, list[float]]:
+    """Decodes charges encoded by `encode_charges`.
+
+    Args:
+        data (bytes): Charges stored as a contiguous array of little-endian doubles.
+        layout (list[list]): [molecule name, number of charges] pairs.
+
+    Returns:
+        dict[str, list[float]]: Dictionary with molecule names as keys and list of charges as values.
+    """
+
+    values = array("d")
+    values.frombytes(data)
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    charges = {}
+    offset = 0
+    for molecule, count in layout:
+        charges[molecule] = values[offset : offset + count].tolist()
+        offset += count
+
+    return charges
+
+
 class CalculationSet(Base):
     """Calculation set database model. It is a collection of calculations."""
 
@@ -42,6 +95,10 @@ class CalculationSet(Base):
     def __repr__(self) -> str:
         return f"<CalculationSet id={self.id}, created_at={self.created_at}>"
 
+    __table_args__ = (
+        sa.Index("ix_calculation_sets_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
 
 class CalculationSetConfig(Base):
     """M:N relationship table between CalculationSet and CalculationConfig"""
@@ -117,7 +174,9 @@ class Calculation(Base):
     id: Mapped[str] = mapped_column(sa.Uuid, primary_key=True, default=uuid.uuid4)
     file_name: Mapped[str] = mapped_column(sa.VARCHAR(255), nullable=False)
     file_hash: Mapped[str] = mapped_column(sa.VARCHAR(100), nullable=False)
-    charges: Mapped[dict] = mapped_column(sa.JSON, nullable=False)
+    # charges are stored as an array of doubles, see encode_charges
+    charges_data: Mapped[bytes] = mapped_column(sa.LargeBinary, nullable=False)
+    charges_layout: Mapped[list] = mapped_column(sa.JSON, nullable=False)
 
     config_id: Mapped[str] = mapped_column(
         sa.Uuid, sa.ForeignKey("calculation_configs.id"), nullable=False
@@ -129,6 +188,21 @@ class Calculation(Base):
     config = relationship("CalculationConfig", back_populates="calculations")
     advanced_settings = relationship("AdvancedSettings", back_populates="calculations")
 
+    @property
+    def charges(self) -> dict[str, list[float]]:
+        """Charges decoded on first access."""
+
+        if (charges := self.__dict__.get("_charges")) is None:
+            charges = decode_charges(self.charges_data, self.charges_layout)
+            self.__dict__["_charges"] = charges
+
+        return charges
+
+    @charges.setter
+    def charges(self, charges: dict[str, list[float]]) -> None:
+        self.charges_data, self.charges_layout = encode_charges(charges)
+        self.__dict__["_charges"] = charges
+
     def __repr__(self) -> str:
         return f"<Calculation id={self.id}, file_name={self.file_name}, file_hash={self.file_hash}>"
 
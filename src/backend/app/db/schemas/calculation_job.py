@@ -0,0 +1,44 @@
+import uuid
+
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.schemas import Base
+
+
+class CalculationJob(Base):
+    """Calculation job database model. Queued calculation of a computation."""
+
+    __tablename__ = "calculation_jobs"
+
+    id: Mapped[str] = mapped_column(sa.Uuid, primary_key=True, default=uuid.uuid4)
+    computation_id: Mapped[str] = mapped_column(sa.Uuid, nullable=False, index=True)
+    user_id: Mapped[str] = mapped_column(sa.Uuid, sa.ForeignKey("users.id"), nullable=True)
+
+    # queued, running, finished or failed
+    status: Mapped[str] = mapped_column(sa.VARCHAR(20), nullable=False, default="queued")
+    settings: Mapped[dict] = mapped_column(sa.JSON, nullable=False)
+    file_hashes: Mapped[list] = mapped_column(sa.JSON, nullable=False)
+    configs: Mapped[list | None] = mapped_column(sa.JSON, nullable=True)
+
+    processed: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    attempts: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True),
+        nullable=False,
+        default=sa.func.timezone("UTC", sa.func.current_timestamp()),
+    )
+    started_at: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<CalculationJob id={self.id}, computation_id={self.computation_id}, status={self.status}>"
+
+    __table_args__ = (sa.Index("ix_calculation_jobs_status_created_at", "status", "created_at"),)
@@ -0,0 +1,55 @@
+import sys
+
+from array import array
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.schemas import Base
+
+
+class MoleculeCharges(Base):
+    """Charges of a single molecule, shared by all files containing the molecule.
+    Molecules are identified by the fingerprint of their record (see `split_molecules`).
+    """
+
+    __tablename__ = "molecule_charges"
+
+    fingerprint: Mapped[str] = mapped_column(sa.VARCHAR(64), primary_key=True)
+    method: Mapped[str] = mapped_column(sa.VARCHAR(20), primary_key=True)
+    # empty string if method has no parameters (primary key can not contain nulls)
+    parameters: Mapped[str] = mapped_column(sa.VARCHAR(50), primary_key=True)
+    read_hetatm: Mapped[bool] = mapped_column(sa.Boolean, primary_key=True)
+    ignore_water: Mapped[bool] = mapped_column(sa.Boolean, primary_key=True)
+    permissive_types: Mapped[bool] = mapped_column(sa.Boolean, primary_key=True)
+    # results of other ChargeFW2 versions (or parameter files) are not reused
+    chargefw2_version: Mapped[str] = mapped_column(sa.VARCHAR(64), primary_key=True)
+
+    # charges are stored as an array of little-endian doubles
+    charges_data: Mapped[bytes] = mapped_column(sa.LargeBinary, nullable=False)
+
+    @staticmethod
+    def encode(charges: list[float]) -> bytes:
+        """Encodes charges of a molecule to a blob of little-endian doubles."""
+
+        values = array("d", charges)
+
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        return values.tobytes()
+
+    @property
+    def charges(self) -> list[float]:
+        """Decoded charges of the molecule."""
+
+        values = array("d")
+        values.frombytes(self.charges_data)
+
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        return values.tolist()
+
+    def __repr__(self) -> str:
+        return f"<MoleculeCharges fingerprint={self.fingerprint}, method={self.method}, parameters={self.parameters}>"
@@ -0,0 +1,26 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.schemas import Base
+
+
+class SuitableMethods(Base):
+    """Methods and parameters suitable for the molecules of a file.
+    Suitability depends only on the contents of the file (identified by file_hash)
+    and on whether permissive atom types are used.
+    """
+
+    __tablename__ = "suitable_methods"
+
+    file_hash: Mapped[str] = mapped_column(
+        sa.VARCHAR(100), sa.ForeignKey("molecule_set_stats.file_hash"), primary_key=True
+    )
+    permissive_types: Mapped[bool] = mapped_column(sa.Boolean, primary_key=True)
+    # results of other ChargeFW2 versions (or parameter files) are not reused
+    chargefw2_version: Mapped[str] = mapped_column(sa.VARCHAR(64), primary_key=True)
+
+    # list of {"method": {...}, "parameters": [{...}, ...]} objects
+    methods: Mapped[list[dict]] = mapped_column(sa.JSON, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SuitableMethods file_hash={self.file_hash}, permissive_types={self.permissive_types}>"
@@ -0,0 +1,47 @@
+import uuid
+
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, relationship, mapped_column
+
+from db.schemas import Base
+
+
+class UploadedFile(Base):
+    """Uploaded file database model. Metadata of a file uploaded by a user."""
+
+    __tablename__ = "uploaded_files"
+
+    id: Mapped[str] = mapped_column(sa.Uuid, primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[str] = mapped_column(sa.Uuid, sa.ForeignKey("users.id"), nullable=False)
+    file_hash: Mapped[str] = mapped_column(sa.VARCHAR(100), nullable=False)
+    file_name: Mapped[str] = mapped_column(sa.VARCHAR(255), nullable=False)
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    uploaded_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True),
+        nullable=False,
+        default=sa.func.timezone("UTC", sa.func.current_timestamp()),
+    )
+
+    # stats may be missing for files uploaded before they were stored
+    molecule_set_id: Mapped[str | None] = mapped_column(
+        sa.VARCHAR(100), sa.ForeignKey("molecule_set_stats.file_hash"), nullable=True
+    )
+
+    user = relationship("User")
+    stats = relationship("MoleculeSetStats")
+
+    def __repr__(self) -> str:
+        return f"<UploadedFile id={self.id}, file_hash={self.file_hash}, file_name={self.file_name}>"
+
+    __table_args__ = (
+        sa.UniqueConstraint("user_id", "file_hash", name="uq_uploaded_files_user_id_file_hash"),
+        sa.Index("ix_uploaded_files_user_id_uploaded_at", "user_id", "uploaded_at"),
+        # speeds up case-insensitive substring search (ILIKE '%term%')
+        sa.Index(
+            "ix_uploaded_files_file_name_trgm",
+            "file_name",
+            postgresql_using="gin",
+            postgresql_ops={"file_name": "gin_trgm_ops"},
+        ),
+    )
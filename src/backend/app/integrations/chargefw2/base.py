@@ -33,6 +33,15 @@ class ChargeFW2Base(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def get_version(self) -> str:
+        """Get version identifying the installed ChargeFW2, including its parameter files.
+
+        Returns:
+            str: Version which changes whenever results of ChargeFW2 may change.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def get_available_methods(
         self,
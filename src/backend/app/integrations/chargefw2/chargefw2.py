@@ -1,5 +1,8 @@
 """ChargeFW2 service for a direct interaction (via bindings) with the ChargeFW2 framework."""
 
+import hashlib
+
+from pathlib import Path
 from typing import Dict
 import chargefw2
 
@@ -12,6 +15,9 @@ from integrations.chargefw2.base import ChargeFW2Base
 class ChargeFW2Local(ChargeFW2Base):
     """Service for a direct interaction (via bindings) with the ChargeFW2 framework."""
 
+    def __init__(self):
+        self._version: str | None = None
+
     def molecules(
         self,
         file_path: str,
@@ -28,6 +34,39 @@ class ChargeFW2Local(ChargeFW2Base):
         """
         return chargefw2.Molecules(file_path, read_hetatm, ignore_water, permissive_types)
 
+    def get_version(self) -> str:
+        """Get version identifying the installed ChargeFW2, including its parameter files.
+
+        The version is a SHA-256 of the bindings and of files installed to the 'share'
+        directory of ChargeFW2 (next to the 'lib' directory with the bindings), so it changes
+        with every upgrade or change of parameter files. It is computed only once.
+
+        Returns:
+            str: Version of ChargeFW2.
+        """
+
+        if self._version is not None:
+            return self._version
+
+        hasher = hashlib.sha256(getattr(chargefw2, "__version__", "").encode())
+
+        if (bindings := getattr(chargefw2, "__file__", None)) is not None:
+            bindings_path = Path(bindings).resolve()
+            share_path = bindings_path.parent.parent / "share"
+            paths = [bindings_path]
+
+            if share_path.is_dir():
+                paths += sorted(path for path in share_path.rglob("*") if path.is_file())
+
+            for path in paths:
+                with open(path, "rb") as file:
+                    hasher.update(f"{path.name}\0".encode())
+                    hasher.update(hashlib.file_digest(file, "sha256").digest())
+
+        self._version = hasher.hexdigest()
+
+        return self._version
+
     def get_available_methods(self) -> list[Method]:
         """Get all available methods.
 
@@ -0,0 +1,176 @@
+"""ChargeFW2 calculations executed in separate worker processes.
+
+Molecules loaded by the bindings can not be pickled, so both parsing and calculation
+have to happen inside of the worker process. Calculated charges are handed back
+to the parent process via shared memory instead of pickling the whole dictionary.
+"""
+
+import multiprocessing
+import os
+
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+from models.calculation import Charges
+
+from integrations.chargefw2.chargefw2 import ChargeFW2Local
+
+
+@dataclass(frozen=True)
+class SharedCharges:
+    """Charges stored in a shared memory block.
+
+    Charges of all molecules are stored as a single contiguous array of doubles,
+    `layout` holds molecule names and number of charges of each molecule (in order).
+    """
+
+    name: str | None
+    layout: tuple[tuple[str, int], ...]
+
+    @staticmethod
+    def dump(charges: Charges) -> "SharedCharges":
+        """Stores charges in a new shared memory block.
+
+        Args:
+            charges (Charges): Dictionary with molecule names as keys and list of charges as values.
+
+        Returns:
+            SharedCharges: Handle which can be sent to a different process.
+        """
+
+        values = array("d")
+        layout = []
+
+        for molecule, molecule_charges in charges.items():
+            values.extend(molecule_charges)
+            layout.append((molecule, len(molecule_charges)))
+
+        if len(values) == 0:
+            return SharedCharges(name=None, layout=tuple(layout))
+
+        size = len(values) * values.itemsize
+        block = shared_memory.SharedMemory(create=True, size=size)
+
+        try:
+            block.buf[:size] = memoryview(values).cast("B")
+        finally:
+            block.close()
+
+        return SharedCharges(name=block.name, layout=tuple(layout))
+
+    def load(self) -> Charges:
+        """Reads charges from the shared memory block and releases it.
+
+        Returns:
+            Charges: Dictionary with molecule names as keys and list of charges as values.
+        """
+
+        if self.name is None:
+            return {molecule: [] for molecule, _ in self.layout}
+
+        block = shared_memory.SharedMemory(name=self.name)
+
+        try:
+            total = sum(count for _, count in self.layout)
+            values = block.buf[: total * array("d").itemsize].cast("d")
+
+            charges = {}
+            offset = 0
+            for molecule, count in self.layout:
+                charges[molecule] = values[offset : offset + count].tolist()
+                offset += count
+
+            values.release()
+            return charges
+        finally:
+            block.close()
+            block.unlink()
+
+    def release(self) -> None:
+        """Releases the shared memory block without reading the charges."""
+
+        if self.name is None:
+            return
+
+        try:
+            block = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+
+        block.close()
+        block.unlink()
+
+
+def release_discarded(future: Future) -> None:
+    """Done-callback releasing charges of a calculation whose result is not going to be loaded
+    (e.g. the awaiting coroutine was cancelled), so the shared memory block does not leak.
+
+    Args:
+        future (Future): Future of `calculate_charges` submitted to a process pool.
+    """
+
+    if future.cancelled() or future.exception() is not None:
+        return
+
+    future.result().release()
+
+
+def calculate_charges(
+    file_path: str,
+    read_hetatm: bool,
+    ignore_water: bool,
+    permissive_types: bool,
+    method_name: str,
+    parameters_name: str | None = None,
+    chg_out_dir: str | None = None,
+) -> SharedCharges:
+    """Loads molecules from a file and calculates their charges. Runs in a worker process.
+
+    Args:
+        file_path (str): File path from which to load molecules.
+        read_hetatm (bool): Read HETATM records from PDB/mmCIF files.
+        ignore_water (bool): Discard water molecules from PDB/mmCIF files.
+        permissive_types (bool): Use similar parameters for similar atom/bond types if no exact match is found.
+        method_name (str): Method name to be used.
+        parameters_name (str | None, optional): Parameters to be used with provided method. Defaults to None.
+        chg_out_dir (str | None, optional): Directory where to store the output files. Defaults to None.
+
+    Returns:
+        SharedCharges: Handle to the calculated charges.
+    """
+
+    chargefw2 = ChargeFW2Local()
+    molecules = chargefw2.molecules(file_path, read_hetatm, ignore_water, permissive_types)
+    charges = chargefw2.calculate_charges(molecules, method_name, parameters_name, chg_out_dir)
+
+    return SharedCharges.dump(charges)
+
+
+def available_cores() -> int:
+    """Returns the number of cores this process is allowed to run on."""
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def create_process_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Creates a process pool using the 'forkserver' start method.
+
+    The forkserver preloads the ChargeFW2 bindings, so that every new worker
+    does not have to import them again.
+
+    Args:
+        max_workers (int): Maximum number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: Process pool executor.
+    """
+
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["chargefw2"])
+
+    return ProcessPoolExecutor(max_workers, mp_context=context)
@@ -5,6 +5,8 @@ import datetime
 import os
 import uuid
 
+from typing import Callable, Iterator
+
 from fastapi import UploadFile
 
 
@@ -90,6 +92,16 @@ class IOBase(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def move(self, path_src: str, path_dst: str) -> None:
+        """Atomically moves file from 'path_src' to 'path_dst', replacing existing file.
+
+        Args:
+            path_src (str): Location of a file to move.
+            path_dst (str): Where to move the file.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def symlink(self, path_src: str, path_dst: str) -> None:
         """Creates a symlink from path_src to path_dst.
@@ -100,6 +112,50 @@ class IOBase(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def replace_symlink(self, path_src: str, path_dst: str) -> None:
+        """Atomically creates or replaces a symlink at path_dst pointing to path_src.
+
+        Args:
+            path_src (str): Target of the symlink.
+            path_dst (str): Where to create the symlink.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def link(self, path_src: str, path_dst: str) -> None:
+        """Atomically creates or replaces a hard link at path_dst pointing to path_src.
+
+        Args:
+            path_src (str): Location of a file to link.
+            path_dst (str): Where to create the link.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def link_count(self, path: str) -> int:
+        """Returns the number of hard links to a file.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            int: Number of hard links, 0 if the file does not exist.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def readlink(self, path: str) -> str | None:
+        """Returns the target of a symlink.
+
+        Args:
+            path (str): Path to the symlink.
+
+        Returns:
+            str | None: Target of the symlink or None if the path is not a symlink.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def zip(self, path: str, destination: str) -> str:
         """Zips the provided directory.
@@ -113,6 +169,48 @@ class IOBase(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def zip_stream(
+        self, entries: list[tuple[str, str]], destination: str | None = None
+    ) -> Iterator[bytes]:
+        """Zips the provided files, yielding the archive in chunks while it is being built.
+
+        Args:
+            entries (list[tuple[str, str]]): Paths to files and their names in the archive.
+            destination (str | None, optional): Where to also store the archive once it is
+                complete. Defaults to None.
+
+        Returns:
+            Iterator[bytes]: Chunks of the archive.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read_json(self, path: str) -> dict | None:
+        """Reads a json file written by 'update_json'.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            dict | None: Content of the file or None if it does not exist.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_json(self, path: str, update: Callable[[dict | None], dict]) -> dict:
+        """Atomically updates a json file, holding an exclusive lock shared by all processes.
+
+        Args:
+            path (str): Path to the file.
+            update (Callable[[dict | None], dict]): Called with the current content
+                (None if the file does not exist), returns the new content.
+
+        Returns:
+            dict: New content of the file.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def listdir(self, directory: str = ".") -> list[str]:
         """Lists contents of the provided directory.
@@ -126,15 +224,28 @@ class IOBase(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def store_upload_file(self, file: UploadFile, directory: str) -> tuple[str, str]:
-        """Stores the provided file on disk.
+    async def store_blob(self, file: UploadFile, directory: str) -> tuple[str, str]:
+        """Stores the provided file in a content-addressed blob store.
+        Contents already present in the store are not written again.
 
         Args:
             file (UploadFile): File to be stored.
-            directory (str): Path to an existing directory.
+            directory (str): Path to the blob store.
+
+        Returns:
+            tuple[str, str]: Tuple containing path to the blob and hash of the file contents.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read_lines(self, path: str) -> Iterator[bytes]:
+        """Lazily reads lines of a file, without reading the whole file into memory.
+
+        Args:
+            path (str): Path to the file.
 
         Returns:
-            tuple[str, str]: Tuple containing path to the file and hash of the file contents.
+            Iterator[bytes]: Lines of the file (including line endings).
         """
         raise NotImplementedError()
 
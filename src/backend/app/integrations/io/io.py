@@ -1,10 +1,16 @@
 """Module for IO operations."""
 
 import datetime
+import fcntl
 import hashlib
+import json
 import os
 import pathlib
 import shutil
+import uuid
+import zipfile
+
+from typing import Callable, Iterator
 
 
 import aiofiles
@@ -15,6 +21,31 @@ from .base import IOBase
 
 load_dotenv()
 
+# size of chunks read from zipped files and yielded from the archive
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _ZipBuffer:
+    """Write-only stream collecting the archive until it is yielded."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
 
 class IOLocal(IOBase):
     """Local IO operations."""
@@ -32,9 +63,38 @@ class IOLocal(IOBase):
     def cp(self, path_src: str, path_dst: str) -> str:
         return shutil.copy(path_src, path_dst)
 
+    def move(self, path_src: str, path_dst: str) -> None:
+        os.replace(path_src, path_dst)
+
     def symlink(self, path_src: str, path_dst: str) -> None:
         os.symlink(path_src, path_dst)
 
+    def replace_symlink(self, path_src: str, path_dst: str) -> None:
+        tmp_path = f"{path_dst}.{uuid.uuid4()}.tmp"
+        os.symlink(path_src, tmp_path)
+        os.replace(tmp_path, path_dst)
+
+    def link(self, path_src: str, path_dst: str) -> None:
+        # rename does nothing if both paths are links to the same file
+        if os.path.exists(path_dst) and os.path.samefile(path_src, path_dst):
+            return
+
+        tmp_path = f"{path_dst}.{uuid.uuid4()}.tmp"
+        os.link(path_src, tmp_path)
+        os.replace(tmp_path, path_dst)
+
+    def link_count(self, path: str) -> int:
+        try:
+            return os.stat(path).st_nlink
+        except FileNotFoundError:
+            return 0
+
+    def readlink(self, path: str) -> str | None:
+        try:
+            return os.readlink(path)
+        except OSError:
+            return None
+
     def last_modified(self, path: str) -> datetime.datetime:
         ppath = pathlib.Path(path)
         if ppath.exists():
@@ -55,29 +115,111 @@ class IOLocal(IOBase):
     def zip(self, path: str, destination: str) -> str:
         return shutil.make_archive(destination, "zip", path)
 
+    def zip_stream(
+        self, entries: list[tuple[str, str]], destination: str | None = None
+    ) -> Iterator[bytes]:
+        buffer = _ZipBuffer()
+        tmp_path = f"{destination}.{uuid.uuid4()}.tmp" if destination is not None else None
+        cache = open(tmp_path, "wb") if tmp_path is not None else None
+
+        def pop() -> bytes:
+            data = buffer.pop()
+            if cache is not None:
+                cache.write(data)
+            return data
+
+        try:
+            # buffer is not seekable, so sizes and checksums are written after the data
+            with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for path, name in entries:
+                    info = zipfile.ZipInfo.from_file(path, name)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+
+                    with open(path, "rb") as src, archive.open(info, "w") as dst:
+                        while chunk := src.read(ZIP_CHUNK_SIZE):
+                            dst.write(chunk)
+
+                            if buffer.size >= ZIP_CHUNK_SIZE:
+                                yield pop()
+
+            yield pop()
+
+            if cache is not None:
+                cache.close()
+                os.replace(tmp_path, destination)
+        finally:
+            if cache is not None and not cache.closed:
+                # archive was not completed (e.g. client disconnected)
+                cache.close()
+                os.remove(tmp_path)
+
+    def read_json(self, path: str) -> dict | None:
+        try:
+            with open(path, "r") as in_file:
+                return json.load(in_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def update_json(self, path: str, update: Callable[[dict | None], dict]) -> dict:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # separate lock file, the json file itself is replaced on every update
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                content = update(self.read_json(path))
+
+                tmp_path = f"{path}.{uuid.uuid4()}.tmp"
+                with open(tmp_path, "w") as out_file:
+                    json.dump(content, out_file)
+                os.replace(tmp_path, path)
+
+                return content
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
     def listdir(self, directory: str = ".") -> list[str]:
         try:
             return os.listdir(directory)
         except FileNotFoundError:
             return []
 
-    async def store_upload_file(self, file: UploadFile, directory: str) -> tuple[str, str]:
-        tmp_path: str = os.path.join(directory, IOBase.get_unique_filename(file.filename or "file"))
+    async def store_blob(self, file: UploadFile, directory: str) -> tuple[str, str]:
         hasher = hashlib.sha256()
         chunk_size = 1024 * 1024  # 1 MB
 
-        async with aiofiles.open(tmp_path, "wb") as out_file:
-            while content := await file.read(chunk_size):
-                unix_content = content.replace(b"\r", b"")
-                await out_file.write(unix_content)
-                hasher.update(unix_content)
+        # uploaded files are already spooled, so contents are hashed before writing anything
+        while content := await file.read(chunk_size):
+            hasher.update(content.replace(b"\r", b""))
 
-        # add hash to file name
         file_hash = hasher.hexdigest()
-        new_filename = os.path.join(directory, f"{file_hash}_{file.filename}")
-        os.rename(tmp_path, new_filename)
+        blob_path = os.path.join(directory, file_hash[:2], file_hash)
 
-        return new_filename, file_hash
+        if os.path.exists(blob_path):
+            return blob_path, file_hash
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{uuid.uuid4()}.tmp"
+        await file.seek(0)
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out_file:
+                while content := await file.read(chunk_size):
+                    await out_file.write(content.replace(b"\r", b""))
+
+            # keep the blob stored by a concurrent upload, links may already point to it
+            os.link(tmp_path, blob_path)
+        except FileExistsError:
+            pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return blob_path, file_hash
+
+    def read_lines(self, path: str) -> Iterator[bytes]:
+        with open(path, "rb") as in_file:
+            yield from in_file
 
     async def write_file(self, path: str, content: str) -> None:
         """Writes content to a file.
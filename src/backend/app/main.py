@@ -3,6 +3,8 @@
 import os
 import shutil
 
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -45,10 +47,26 @@ def create_app() -> FastAPI:
     # Create DI container
     container = Container()
 
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        job_service = container.calculation_job_service()
+        storage_maintenance_service = container.storage_maintenance_service()
+        guest_eviction_service = container.guest_eviction_service()
+        await job_service.start()
+        await storage_maintenance_service.start()
+        await guest_eviction_service.start()
+        yield
+        await guest_eviction_service.stop()
+        await storage_maintenance_service.stop()
+        await job_service.stop()
+        await container.chargefw2_service().close()
+        await container.oidc_service().close()
+
     app = FastAPI(
         title="Atomic Charge Calculator II API",
         root_path="/api",
         swagger_ui_parameters={"syntaxHighlight": False},
+        lifespan=lifespan,
     )
 
     container.wire()
@@ -0,0 +1,24 @@
+"""Calculation job models"""
+
+from datetime import datetime
+from typing import Literal
+import uuid
+
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
+
+class CalculationJobDto(BaseModel):
+    """Calculation job data transfer object"""
+
+    id: uuid.UUID
+    computation_id: uuid.UUID
+    status: Literal["queued", "running", "finished", "failed"]
+    processed: int
+    total: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, from_attributes=True)
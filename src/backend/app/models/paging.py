@@ -20,6 +20,7 @@ class PagedList[T](BaseModel):  # add BaseModel
     Turns a query into a paged list of items.
     If no (or <= 0) page or page_size are provided,
     it defaults to PagedList.DEFAULT_PAGE and PagedList.DEFAULT_PAGE_SIZE.
+    Lists supporting keyset pagination provide next_cursor for fetching the next page.
     """
 
     _DEFAULT_PAGE: int = 1
@@ -30,6 +31,7 @@ class PagedList[T](BaseModel):  # add BaseModel
     page_size: int
     total_count: int
     total_pages: int
+    next_cursor: str | None = None
 
     model_config = ConfigDict(
         alias_generator=to_camel,
@@ -45,6 +47,7 @@ class PagedList[T](BaseModel):  # add BaseModel
         page_size: int = _DEFAULT_PAGE_SIZE,
         total_count: int = 0,
         total_pages: int = 0,
+        next_cursor: str | None = None,
     ) -> None:
         page = page if page > 0 else PagedList._DEFAULT_PAGE
         page_size = page_size if page_size > 0 else PagedList._DEFAULT_PAGE_SIZE
@@ -57,6 +60,7 @@ class PagedList[T](BaseModel):  # add BaseModel
             page_size=page_size,
             total_count=total_count,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         )
 
     @staticmethod
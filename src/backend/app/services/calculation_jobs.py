@@ -0,0 +1,278 @@
+"""Service for queueing and running calculations in the background."""
+
+import asyncio
+import traceback
+import uuid
+
+from datetime import datetime, timedelta, timezone
+
+from models.calculation import CalculationConfigDto
+from models.calculation_job import CalculationJobDto
+from models.setup import AdvancedSettingsDto
+
+from db.database import SessionManager
+from db.repositories.calculation_job_repository import CalculationJobRepository
+from db.schemas.calculation_job import CalculationJob
+
+from services.chargefw2 import ChargeFW2Service
+from services.logging.base import LoggerBase
+
+
+class CalculationJobService:
+    """Service for queueing and running calculations in the background.
+
+    Jobs are stored in the database, which acts as a queue shared by all web server
+    processes. Every process runs `workers` asyncio tasks claiming and running queued jobs.
+    Running jobs periodically update their heartbeat, jobs without a recent heartbeat
+    (e.g. their process was killed) are returned to the queue.
+    """
+
+    def __init__(
+        self,
+        logger: LoggerBase,
+        job_repository: CalculationJobRepository,
+        session_manager: SessionManager,
+        chargefw2: ChargeFW2Service,
+        workers: int = 1,
+        poll_interval: float = 2.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+        max_attempts: int = 3,
+    ):
+        self.logger = logger
+        self.job_repository = job_repository
+        self.session_manager = session_manager
+        self.chargefw2 = chargefw2
+
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._last_requeue: datetime | None = None
+
+    def submit(
+        self,
+        computation_id: str,
+        settings: AdvancedSettingsDto,
+        file_hashes: list[str],
+        configs: list[CalculationConfigDto] | None,
+        user_id: str | None,
+    ) -> CalculationJobDto:
+        """Add calculation of a computation with prepared inputs to the queue.
+
+        Args:
+            computation_id (str): Computation id.
+            settings (AdvancedSettingsDto): Advanced settings of the calculation.
+            file_hashes (list[str]): Hashes of files to calculate charges for.
+            configs (list[CalculationConfigDto] | None): Configs to use.
+                The most suitable method and parameters are used if not provided.
+            user_id (str | None): User id making the calculation.
+
+        Returns:
+            CalculationJobDto: Queued job.
+        """
+
+        try:
+            self.logger.info("Submitting calculation job for computation %s.", computation_id)
+
+            with self.session_manager.session() as session:
+                job = CalculationJob(
+                    id=uuid.uuid4(),
+                    computation_id=computation_id,
+                    user_id=user_id,
+                    status="queued",
+                    settings=settings.model_dump(),
+                    file_hashes=file_hashes,
+                    configs=[config.model_dump() for config in configs] if configs else None,
+                    processed=0,
+                    total=len(file_hashes) * len(configs) if configs else 0,
+                    attempts=0,
+                    created_at=self._now(),
+                )
+                self.job_repository.store(session, job)
+                result = CalculationJobDto.model_validate(job)
+
+            # submit is called from threadpool threads, events are not thread-safe
+            if self._wakeup is not None:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+
+            return result
+        except Exception as e:
+            self.logger.error(
+                "Error submitting calculation job for computation %s: %s",
+                computation_id,
+                traceback.format_exc(),
+            )
+            raise e
+
+    def get_status(self, computation_id: str, user_id: str | None) -> CalculationJobDto | None:
+        """Get status of the latest job of a computation.
+
+        Args:
+            computation_id (str): Computation id.
+            user_id (str | None): User id requesting the status.
+
+        Returns:
+            CalculationJobDto | None: Latest job of the computation or None
+                if it does not exist or belongs to a different user.
+        """
+
+        try:
+            with self.session_manager.session() as session:
+                job = self.job_repository.get_latest(session, computation_id)
+
+                if job is None:
+                    return None
+
+                if job.user_id is not None and str(job.user_id) != user_id:
+                    return None
+
+                return CalculationJobDto.model_validate(job)
+        except Exception as e:
+            self.logger.error(
+                "Error getting status of computation %s: %s",
+                computation_id,
+                traceback.format_exc(),
+            )
+            raise e
+
+    async def start(self) -> None:
+        """Start worker tasks. Has to be called from a running event loop."""
+
+        self.logger.info("Starting %s calculation job workers.", self.workers)
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop worker tasks. Jobs being run are returned to the queue."""
+
+        self.logger.info("Stopping calculation job workers.")
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._requeue_stale_jobs)
+                job = await asyncio.to_thread(self._claim_job)
+            except Exception:
+                self.logger.error("Unable to claim calculation job: %s", traceback.format_exc())
+                job = None
+
+            if job is not None:
+                await self._run_job(job)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                self._wakeup.clear()
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job: CalculationJob) -> None:
+        self.logger.info(
+            "Running calculation job %s of computation %s.", job.id, job.computation_id
+        )
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+
+        # progress is written from a thread, at most one write is in flight
+        # and only the latest progress is written once it finishes
+        progress: dict[str, int] = {}
+        progress_writer: asyncio.Task | None = None
+
+        async def write_progress() -> None:
+            while progress:
+                values = progress.copy()
+                progress.clear()
+
+                try:
+                    await asyncio.to_thread(self._update_job, job.id, **values)
+                except Exception:
+                    self.logger.warn("Unable to update progress of job %s.", job.id)
+
+        def on_progress(processed: int, total: int) -> None:
+            nonlocal progress_writer
+
+            progress.update(processed=processed, total=total)
+            if progress_writer is None or progress_writer.done():
+                progress_writer = asyncio.create_task(write_progress())
+
+        try:
+            await self.chargefw2.run_calculation(
+                str(job.computation_id),
+                AdvancedSettingsDto.model_validate(job.settings),
+                job.file_hashes,
+                [CalculationConfigDto.model_validate(config) for config in job.configs or []],
+                str(job.user_id) if job.user_id is not None else None,
+                on_progress=on_progress,
+            )
+            if progress_writer is not None:
+                await progress_writer
+            await asyncio.to_thread(
+                self._update_job, job.id, status="finished", finished_at=self._now()
+            )
+        except asyncio.CancelledError:
+            # worker is being stopped, let another worker run the job
+            await asyncio.to_thread(self._update_job, job.id, status="queued")
+            raise
+        except Exception as e:
+            self.logger.error("Calculation job %s failed: %s", job.id, traceback.format_exc())
+            await asyncio.to_thread(
+                self._update_job,
+                job.id,
+                status="failed",
+                error=getattr(e, "detail", None) or f"Error calculating charges. {str(e)}",
+                finished_at=self._now(),
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+
+            try:
+                await asyncio.to_thread(self._update_job, job_id, heartbeat_at=self._now())
+            except Exception:
+                self.logger.warn("Unable to update heartbeat of job %s.", job_id)
+
+    def _claim_job(self) -> CalculationJob | None:
+        with self.session_manager.session() as session:
+            return self.job_repository.claim_next(session, self._now())
+
+    def _requeue_stale_jobs(self) -> None:
+        now = self._now()
+
+        if self._last_requeue is not None and now - self._last_requeue < timedelta(
+            seconds=self.stale_after
+        ):
+            return
+
+        self._last_requeue = now
+
+        with self.session_manager.session() as session:
+            requeued = self.job_repository.requeue_stale(
+                session, now - timedelta(seconds=self.stale_after), self.max_attempts
+            )
+
+        if requeued > 0:
+            self.logger.warn("Returned %s interrupted calculation jobs to the queue.", requeued)
+
+    def _update_job(self, job_id: str, **values) -> None:
+        with self.session_manager.session() as session:
+            self.job_repository.update(session, job_id, **values)
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
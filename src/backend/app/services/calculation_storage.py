@@ -8,10 +8,12 @@ from models.calculation import (
     CalculationDto,
     CalculationResultDto,
     CalculationSetPreviewDto,
-    CalculationsFilters,
 )
+from models.method import Method
 from models.paging import PagedList
+from models.parameters import Parameters
 from models.molecule_info import MoleculeSetStats
+from db.schemas.best_parameters import BestParameters
 from db.schemas.calculation import (
     AdvancedSettings,
     Calculation,
@@ -21,6 +23,7 @@ from db.schemas.calculation import (
 )
 from db.schemas.stats import AtomTypeCount, MoleculeSetStats as MoleculeSetStatsModel
 
+from db.repositories.best_parameters_repository import BestParametersRepository
 from db.repositories.calculation_config_repository import CalculationConfigRepository
 from db.repositories.calculation_repository import CalculationRepository
 from db.repositories.calculation_set_repository import (
@@ -28,6 +31,8 @@ from db.repositories.calculation_set_repository import (
     CalculationSetRepository,
 )
 from db.repositories.moleculeset_stats_repository import MoleculeSetStatsRepository
+from db.repositories.molecule_charges_repository import MoleculeChargesRepository
+from db.repositories.suitable_methods_repository import SuitableMethodsRepository
 
 from models.setup import AdvancedSettingsDto
 from db.repositories.advanced_settings_repository import AdvancedSettingsRepository
@@ -46,6 +51,9 @@ class CalculationStorageService:
         config_repository: CalculationConfigRepository,
         stats_repository: MoleculeSetStatsRepository,
         advanced_settings_repository: AdvancedSettingsRepository,
+        molecule_charges_repository: MoleculeChargesRepository,
+        suitable_methods_repository: SuitableMethodsRepository,
+        best_parameters_repository: BestParametersRepository,
         session_manager: SessionManager,
     ):
         self.set_repository = set_repository
@@ -53,6 +61,9 @@ class CalculationStorageService:
         self.config_repository = config_repository
         self.stats_repository = stats_repository
         self.advanced_settings_repository = advanced_settings_repository
+        self.molecule_charges_repository = molecule_charges_repository
+        self.suitable_methods_repository = suitable_methods_repository
+        self.best_parameters_repository = best_parameters_repository
         self.session_manager = session_manager
         self.logger = logger
 
@@ -61,6 +72,11 @@ class CalculationStorageService:
 
         info = self.stats_repository.get(session, file_hash)
 
+        return self.to_stats(info)
+
+    def to_stats(self, info: MoleculeSetStatsModel | None) -> MoleculeSetStats | None:
+        """Convert loaded stats (including atom type counts) of a file to a DTO."""
+
         if info is None:
             return None
 
@@ -85,10 +101,9 @@ class CalculationStorageService:
                     CalculationSetPreviewDto.model_validate(
                         {
                             "id": calculation_set.id,
+                            # stats are preloaded together with calculation sets
                             "files": {
-                                stats_assoc.file_name: self.get_info(
-                                    session, stats_assoc.molecule_set_id
-                                )
+                                stats_assoc.file_name: self.to_stats(stats_assoc.molecule_set)
                                 for stats_assoc in calculation_set.molecule_set_stats_associations
                             },
                             "configs": calculation_set.configs,
@@ -103,28 +118,40 @@ class CalculationStorageService:
 
             return PagedList[CalculationSetPreviewDto].model_validate(calculations_list)
         except Exception as e:
-            self.logger.error(f"Error getting calculations from database: {traceback.format_exc()}")
+            self.logger.error(
+                "Error getting calculations from database: %s", traceback.format_exc()
+            )
             raise e
 
     def get_calculation_set(self, computation_id: str) -> CalculationSet | None:
         """Get calculation set from database."""
 
         try:
-            self.logger.info(f"Getting calculation set {computation_id}.")
+            self.logger.info("Getting calculation set %s.", computation_id)
             with self.session_manager.session() as session:
                 return self.set_repository.get(session, computation_id)
         except Exception as e:
             self.logger.error(
-                f"Error getting calculation set {computation_id}: {traceback.format_exc()}"
+                "Error getting calculation set %s: %s", computation_id, traceback.format_exc()
             )
             raise e
 
+    def get_stored_file_hashes(self, file_hashes: list[str]) -> set[str]:
+        """Get hashes of files whose info is already stored in database."""
+
+        try:
+            with self.session_manager.session() as session:
+                return self.stats_repository.get_existing_hashes(session, file_hashes)
+        except Exception as e:
+            self.logger.error("Error getting stored file hashes: %s", traceback.format_exc())
+            raise e
+
     def store_file_info(self, file_hash: str, info: MoleculeSetStats) -> MoleculeSetStats:
         """Store file info to database."""
 
         try:
             with self.session_manager.session() as session:
-                self.logger.info(f"Storing stats of file with hash '{file_hash}'.")
+                self.logger.info("Storing stats of file with hash '%s'.", file_hash)
                 info_model = MoleculeSetStatsModel(
                     file_hash=file_hash,
                     total_molecules=info.total_molecules,
@@ -138,8 +165,7 @@ class CalculationStorageService:
                 return self.stats_repository.store(session, info_model)
         except Exception as e:
             self.logger.error(
-                f"Error storing stats of file with hash '{file_hash}': "
-                + f"{traceback.format_exc()}"
+                "Error storing stats of file with hash '%s': %s", file_hash, traceback.format_exc()
             )
             raise e
 
@@ -151,7 +177,7 @@ class CalculationStorageService:
         user_id: str | None,
     ) -> None:
         try:
-            self.logger.info(f"Storing calculation results for computation {computation_id}.")
+            self.logger.info("Storing calculation results for computation %s.", computation_id)
 
             with self.session_manager.session() as session:
                 settings_entity = self._get_or_create_advanced_settings(session, settings)
@@ -162,13 +188,26 @@ class CalculationStorageService:
                 calculations = []
                 added_stats = set()
 
+                existing_calculations = self.calculation_repository.get_many(
+                    session,
+                    list(
+                        {
+                            calculation.file_hash
+                            for result in results
+                            for calculation in result.calculations
+                        }
+                    ),
+                    [result.config for result in results],
+                    settings,
+                )
+
                 for result in results:
                     config_entity = self._get_or_create_config(
                         session, result.config, calculation_set
                     )
 
                     new_calculations, files = self._process_calculations(
-                        session, result, config_entity, settings_entity
+                        result, config_entity, settings_entity, existing_calculations
                     )
                     calculations.extend(new_calculations)
 
@@ -181,7 +220,7 @@ class CalculationStorageService:
 
         except Exception as e:
             self.logger.error(
-                f"Error storing calculation results for computation {computation_id}."
+                "Error storing calculation results for computation %s.", computation_id
             )
             raise e
 
@@ -213,7 +252,7 @@ class CalculationStorageService:
 
                 self.set_repository.store(session, calculation_set)
         except Exception as e:
-            self.logger.error(f"Error setting up calculation: {traceback.format_exc()}")
+            self.logger.error("Error setting up calculation: %s", traceback.format_exc())
             raise e
 
     def filter_existing_calculations(
@@ -233,18 +272,15 @@ class CalculationStorageService:
             self.logger.info("Filtering existing calculations.")
 
             with self.session_manager.session() as session:
+                existing_calculations = self.calculation_repository.get_many(
+                    session, file_hashes, configs, settings
+                )
+
                 for config in configs:
                     for file_hash in file_hashes:
-                        filters = CalculationsFilters(
-                            hash=file_hash,
-                            method=config.method,
-                            parameters=config.parameters,
-                            read_hetatm=settings.read_hetatm,
-                            ignore_water=settings.ignore_water,
-                            permissive_types=settings.permissive_types,
+                        existing_calculation = existing_calculations.get(
+                            (file_hash, config.method, config.parameters)
                         )
-
-                        existing_calculation = self.calculation_repository.get(session, filters)
                         if existing_calculation is None:
                             if config not in to_calculate:
                                 to_calculate[config] = []
@@ -254,8 +290,9 @@ class CalculationStorageService:
                             if config not in cached:
                                 cached[config] = []
 
+                            # charges were validated before being stored
                             cached[config].append(
-                                CalculationDto(
+                                CalculationDto.model_construct(
                                     file=existing_calculation.file_name,
                                     file_hash=existing_calculation.file_hash,
                                     charges=existing_calculation.charges,
@@ -263,19 +300,130 @@ class CalculationStorageService:
                                 ),
                             )
                             self.logger.info(
-                                f"Existing calculation found for file '{file_hash}', skipping."
+                                "Existing calculation found for file '%s', skipping.", file_hash
                             )
 
             return to_calculate, cached
         except Exception as e:
-            self.logger.error(f"Error filtering existing calculations: {traceback.format_exc()}")
+            self.logger.error("Error filtering existing calculations: %s", traceback.format_exc())
+            raise e
+
+    def get_molecule_charges(
+        self,
+        fingerprints: list[str],
+        config: CalculationConfigDto,
+        settings: AdvancedSettingsDto,
+    ) -> dict[str, list[float]]:
+        """Get stored charges of individual molecules keyed by their fingerprints."""
+
+        try:
+            with self.session_manager.session() as session:
+                return self.molecule_charges_repository.get_many(
+                    session, fingerprints, config, settings
+                )
+        except Exception as e:
+            self.logger.error("Error getting molecule charges: %s", traceback.format_exc())
+            raise e
+
+    def store_molecule_charges(
+        self,
+        charges: dict[str, list[float]],
+        config: CalculationConfigDto,
+        settings: AdvancedSettingsDto,
+    ) -> None:
+        """Store charges of individual molecules keyed by their fingerprints."""
+
+        if not charges:
+            return
+
+        try:
+            with self.session_manager.session() as session:
+                self.logger.info("Storing charges of %s molecules.", len(charges))
+                self.molecule_charges_repository.store_many(session, charges, config, settings)
+        except Exception as e:
+            self.logger.error("Error storing molecule charges: %s", traceback.format_exc())
+            raise e
+
+    def get_suitable_methods(
+        self, file_hashes: list[str], permissive_types: bool
+    ) -> dict[str, list[tuple[Method, list[Parameters]]]]:
+        """Get stored suitable methods of files keyed by their hashes."""
+
+        try:
+            with self.session_manager.session() as session:
+                return self.suitable_methods_repository.get_many(
+                    session, file_hashes, permissive_types
+                )
+        except Exception as e:
+            self.logger.error("Error getting suitable methods: %s", traceback.format_exc())
+            raise e
+
+    def store_suitable_methods(
+        self,
+        file_hash: str,
+        permissive_types: bool,
+        methods: list[tuple[Method, list[Parameters]]],
+    ) -> None:
+        """Store suitable methods of a file. Stats of the file have to be stored before."""
+
+        try:
+            with self.session_manager.session() as session:
+                self.logger.info("Storing suitable methods of file with hash '%s'.", file_hash)
+                self.suitable_methods_repository.store(
+                    session, file_hash, permissive_types, methods
+                )
+        except Exception as e:
+            self.logger.error(
+                "Error storing suitable methods of file with hash '%s': %s",
+                file_hash,
+                traceback.format_exc(),
+            )
+            raise e
+
+    def get_best_parameters(
+        self, file_hash: str, method: str, permissive_types: bool
+    ) -> BestParameters | None:
+        """Get stored best parameters of a method for a file."""
+
+        try:
+            with self.session_manager.session() as session:
+                return self.best_parameters_repository.get(
+                    session, file_hash, method, permissive_types
+                )
+        except Exception as e:
+            self.logger.error("Error getting best parameters: %s", traceback.format_exc())
+            raise e
+
+    def store_best_parameters(
+        self, file_hash: str, method: str, permissive_types: bool, parameters: str | None
+    ) -> None:
+        """Store best parameters of a method for a file (None if no parameters are suitable)."""
+
+        try:
+            with self.session_manager.session() as session:
+                self.logger.info("Storing best parameters for file with hash '%s'.", file_hash)
+                self.best_parameters_repository.store(
+                    session,
+                    BestParameters(
+                        file_hash=file_hash,
+                        method=method,
+                        permissive_types=permissive_types,
+                        parameters=parameters,
+                    ),
+                )
+        except Exception as e:
+            self.logger.error(
+                "Error storing best parameters for file with hash '%s': %s",
+                file_hash,
+                traceback.format_exc(),
+            )
             raise e
 
     def get_calculation_results(self, computation_id: str) -> list[CalculationResultDto]:
         """Get calculation results from database."""
 
         try:
-            self.logger.info(f"Getting calculation results for computation {computation_id}.")
+            self.logger.info("Getting calculation results for computation %s.", computation_id)
             with self.session_manager.session() as session:
                 calculation_set = self.set_repository.get(session, computation_id)
 
@@ -298,7 +446,9 @@ class CalculationStorageService:
 
         except Exception as e:
             self.logger.error(
-                f"Error getting calculation results for computation {computation_id}: {traceback.format_exc()}"
+                "Error getting calculation results for computation %s: %s",
+                computation_id,
+                traceback.format_exc(),
             )
             raise e
 
@@ -306,12 +456,12 @@ class CalculationStorageService:
         """Delete calculation set from database."""
 
         try:
-            self.logger.info(f"Deleting calculation set {computation_id}.")
+            self.logger.info("Deleting calculation set %s.", computation_id)
             with self.session_manager.session() as session:
                 self.set_repository.delete(session, computation_id)
         except Exception as e:
             self.logger.error(
-                f"Error deleting calculation set {computation_id}: {traceback.format_exc()}"
+                "Error deleting calculation set %s: %s", computation_id, traceback.format_exc()
             )
             raise e
 
@@ -369,10 +519,10 @@ class CalculationStorageService:
 
     def _process_calculations(
         self,
-        session: Session,
         result: CalculationResultDto,
         config_entity: CalculationConfig,
         settings_entity: AdvancedSettings,
+        existing_calculations: dict[tuple[str, str | None, str | None], Calculation],
     ) -> tuple[list[Calculation], dict[str, str]]:
         """Process calculation results and return new calculations and files (file_hash -> file)."""
 
@@ -382,19 +532,9 @@ class CalculationStorageService:
         for calculation in result.calculations:
             files[calculation.file_hash] = calculation.file
 
-            calculation_exists = self.calculation_repository.get(
-                session,
-                CalculationsFilters(
-                    hash=calculation.file_hash,
-                    method=calculation.config.method,
-                    parameters=calculation.config.parameters,
-                    read_hetatm=settings_entity.read_hetatm,
-                    ignore_water=settings_entity.ignore_water,
-                    permissive_types=settings_entity.permissive_types,
-                ),
-            )
+            key = (calculation.file_hash, calculation.config.method, calculation.config.parameters)
 
-            if calculation_exists is None:
+            if key not in existing_calculations:
                 new_calculations.append(
                     Calculation(
                         file_name=calculation.file,
@@ -1,22 +1,25 @@
 """ChargeFW2 service module."""
 
 import asyncio
-import os
 from pathlib import Path
 import traceback
+import uuid
+import weakref
 
 from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Literal, Tuple
 
 
 # Temporary solution to get Molecules class
 from chargefw2 import Molecules
+from fastapi import status
 
 from models.calculation import (
     CalculationDto,
     CalculationConfigDto,
     CalculationResultDto,
+    Charges,
 )
 from models.molecule_info import MoleculeSetStats
 from models.method import Method
@@ -24,14 +27,25 @@ from models.parameters import Parameters
 from models.setup import AdvancedSettingsDto
 from models.suitable_methods import SuitableMethods
 
+from integrations.chargefw2 import process
 from integrations.chargefw2.base import ChargeFW2Base
 
 from api.v1.constants import CHARGES_OUTPUT_EXTENSION
+from api.v1.exceptions import BadRequestError
 
 
 from services.io import IOService
 from services.logging.base import LoggerBase
 from services.mmcif import MmCIFService
+from services.method_registry import MethodRegistry
+from services.molecule_records import (
+    MoleculeRecord,
+    SharedRecords,
+    has_multiple_blocks,
+    join_molecules,
+    split_molecules,
+)
+from services.molecules_cache import CachedMolecules, MoleculesCache
 from services.calculation_storage import CalculationStorageService
 
 
@@ -41,20 +55,63 @@ class ChargeFW2Service:
     def __init__(
         self,
         chargefw2: ChargeFW2Base,
+        method_registry: MethodRegistry,
         logger: LoggerBase,
         io: IOService,
         mmcif_service: MmCIFService,
         calculation_storage: CalculationStorageService,
         max_workers: int = 4,
         max_concurrent_calculations: int = 4,
+        executor_mode: Literal["thread", "process"] = "thread",
+        web_concurrency: int = 1,
+        molecules_cache_size: int = 512 * 1024 * 1024,
+        chunk_size: int = 5000,
     ):
         self.chargefw2 = chargefw2
+        self.method_registry = method_registry
         self.logger = logger
         self.io = io
         self.mmcif_service = mmcif_service
         self.calculation_storage = calculation_storage
         self.executor = ThreadPoolExecutor(max_workers)
+        self.process_executor: ProcessPoolExecutor | None = None
         self.semaphore = asyncio.Semaphore(max_concurrent_calculations)
+        self.molecules_cache = MoleculesCache(molecules_cache_size)
+        self.max_workers = max_workers
+        self.chunk_size = max(chunk_size, 1)
+        # locks are removed once no request is generating outputs of the computation
+        self._outputs_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        # suitable methods of uploaded files found in the background, by file hash
+        self._precompute_tasks: dict[str, asyncio.Task] = {}
+        self._precompute_limit = asyncio.Semaphore(max_workers)
+
+        if executor_mode == "process":
+            # max_workers is shared by all web server workers and limited by available cores
+            process_workers = max(
+                1, min(max_workers, process.available_cores()) // max(web_concurrency, 1)
+            )
+            self.logger.info("Using process pool with %s workers.", process_workers)
+            self.max_workers = process_workers
+            self.process_executor = process.create_process_executor(process_workers)
+
+    async def close(self) -> None:
+        """Cancel background tasks and shut down executors.
+
+        Waits for calculations already running in worker processes to finish,
+        so shared memory of discarded results is released.
+        """
+
+        tasks = list(self._precompute_tasks.values())
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.process_executor is not None:
+            await asyncio.to_thread(self.process_executor.shutdown, wait=True, cancel_futures=True)
 
     async def _run_in_executor(self, func, *args, executor=None):
         loop = asyncio.get_event_loop()
@@ -66,14 +123,14 @@ class ChargeFW2Service:
     def get_available_methods(self) -> list[Method]:
         """Get available methods for charge calculation."""
 
-        try:
-            self.logger.info("Getting available methods.")
-            methods = self.chargefw2.get_available_methods()
+        self.logger.info("Getting available methods.")
 
-            return methods
-        except Exception as e:
-            self.logger.error(f"Error getting available methods: {e}")
-            raise e
+        return self.method_registry.methods
+
+    def is_method_available(self, method: str) -> bool:
+        """Check whether the method with the provided internal name is available."""
+
+        return self.method_registry.has_method(method)
 
     async def get_suitable_methods(
         self, file_hashes: list[str], permissive_types: bool = True, user_id: str | None = None
@@ -81,12 +138,12 @@ class ChargeFW2Service:
         """Get suitable methods for charge calculation based on file hashes."""
 
         try:
-            self.logger.info(f"Getting suitable methods for file hashes '{file_hashes}'")
+            self.logger.info("Getting suitable methods for file hashes '%s'", file_hashes)
 
             return await self._find_suitable_methods(file_hashes, permissive_types, user_id)
         except Exception as e:
             self.logger.error(
-                f"Error getting suitable methods for file hashes '{file_hashes}': {e}"
+                "Error getting suitable methods for file hashes '%s': %s", file_hashes, e
             )
             raise e
 
@@ -96,58 +153,111 @@ class ChargeFW2Service:
         """Get suitable methods for charge calculation based on files in the provided directory."""
 
         try:
-            self.logger.info(f"Getting suitable methods for computation '{computation_id}'")
+            self.logger.info("Getting suitable methods for computation '%s'", computation_id)
 
-            calculation_set = self.calculation_storage.get_calculation_set(computation_id)
+            calculation_set = await asyncio.to_thread(
+                self.calculation_storage.get_calculation_set, computation_id
+            )
 
             settings = AdvancedSettingsDto()
             if calculation_set is not None:
                 settings = calculation_set.advanced_settings
 
             workdir = self.io.get_inputs_path(computation_id, user_id)
-            file_hashes = [self.io.parse_filename(file)[0] for file in self.io.listdir(workdir)]
+            file_hashes = [
+                self.io.parse_filename(file)[0]
+                for file in await asyncio.to_thread(self.io.listdir, workdir)
+            ]
 
             return await self._find_suitable_methods(
                 file_hashes, settings.permissive_types, user_id
             )
         except Exception as e:
             self.logger.error(
-                f"Error getting suitable methods for computation '{computation_id}': {e}"
+                "Error getting suitable methods for computation '%s': %s", computation_id, e
             )
             raise e
 
+    def precompute_suitable_methods(self, file_hash: str, file_path: str) -> None:
+        """Find and store suitable methods of a newly uploaded file for default settings
+        in the background. Has to be called from a running event loop.
+
+        At most `max_workers` files are processed at once. Failures are only logged,
+        methods are then found on the first request.
+
+        Args:
+            file_hash (str): Hash of the file. Stats of the file have to be stored before.
+            file_path (str): Path to the file.
+        """
+
+        if file_hash in self._precompute_tasks:
+            return
+
+        task = asyncio.create_task(self._precompute_suitable_methods(file_hash, file_path))
+        self._precompute_tasks[file_hash] = task
+        task.add_done_callback(lambda _: self._precompute_tasks.pop(file_hash, None))
+
+    async def _precompute_suitable_methods(
+        self, file_hash: str, file_path: str
+    ) -> list[tuple[Method, list[Parameters]]] | None:
+        try:
+            async with self._precompute_limit:
+                return await self._compute_suitable_methods(
+                    file_hash, file_path, AdvancedSettingsDto().permissive_types
+                )
+        except Exception:
+            self.logger.warn(
+                "Unable to precompute suitable methods for file with hash '%s': %s",
+                file_hash,
+                traceback.format_exc(),
+            )
+            return None
+
     async def _find_suitable_methods(
         self, file_hashes: list[str], permissive_types: bool, user_id: str | None
     ) -> SuitableMethods:
         """Helper method to find suitable methods for calculation."""
 
-        suitable_methods = Counter()
-        workdir = self.io.get_file_storage_path(user_id)
-
-        dir_contents = self.io.listdir(workdir)
-        for file_hash in file_hashes:
-            file = next(
-                (f for f in dir_contents if self.io.parse_filename(f)[0] == file_hash), None
-            )
-            if file is None:
-                self.logger.warn(f"File with hash {file_hash} not found in {workdir}, skipping.")
-                continue
-
-            input_file = os.path.join(workdir, file)
-            molecules = await self.read_molecules(input_file, True, False, permissive_types)
-            methods: list[tuple[Method, list[Parameters]]] = await self._run_in_executor(
-                self.chargefw2.get_suitable_methods, molecules
-            )
+        stored = await asyncio.to_thread(
+            self.calculation_storage.get_suitable_methods, file_hashes, permissive_types
+        )
+        limit = asyncio.Semaphore(self.max_workers)
+        # (method,) or (method, parameters) pairs suitable for all files processed so far
+        remaining: set[tuple] | None = None
+
+        async def find(file_hash: str) -> list[tuple]:
+            nonlocal remaining
+
+            input_file = await asyncio.to_thread(self.io.get_filepath, file_hash, user_id)
+            if input_file is None:
+                self.logger.warn("File with hash %s not found, skipping.", file_hash)
+                methods = []
+            elif (methods := stored.get(file_hash)) is None and (
+                methods := await self._get_precomputed_methods(file_hash, permissive_types)
+            ) is None:
+                async with limit:
+                    # all methods were already eliminated by other files
+                    if remaining is not None and len(remaining) == 0:
+                        return []
+
+                    methods = await self._compute_suitable_methods(
+                        file_hash, input_file, permissive_types
+                    )
+
+            pairs = []
             for method, parameters in methods:
                 if not parameters or len(parameters) == 0:
-                    suitable_methods[(method,)] += 1
+                    pairs.append((method,))
                 else:
-                    for p in parameters:
-                        suitable_methods[(method, p)] += 1
+                    pairs.extend((method, p) for p in parameters)
 
-        all_valid = [
-            pair for pair in suitable_methods if suitable_methods[pair] == len(file_hashes)
-        ]
+            remaining = set(pairs) if remaining is None else remaining & set(pairs)
+            return pairs
+
+        found = await asyncio.gather(*[find(file_hash) for file_hash in file_hashes])
+
+        # keep the order of methods of the first file
+        all_valid = [pair for pair in found[0] if pair in remaining] if remaining else []
 
         # Remove duplicates from methods
         tmp = {}
@@ -166,36 +276,97 @@ class ChargeFW2Service:
         }
         return SuitableMethods(methods=methods, parameters=parameters_with_metadata)
 
-    async def get_available_parameters(self, method: str) -> list[Parameters]:
-        """Get available parameters for charge calculation method."""
+    async def _get_precomputed_methods(
+        self, file_hash: str, permissive_types: bool
+    ) -> list[tuple[Method, list[Parameters]]] | None:
+        # waits for suitable methods being found in the background instead of finding them again
+
+        task = self._precompute_tasks.get(file_hash)
+        if task is None or permissive_types != AdvancedSettingsDto().permissive_types:
+            return None
+
+        return await asyncio.shield(task)
+
+    async def _compute_suitable_methods(
+        self, file_hash: str, file_path: str, permissive_types: bool
+    ) -> list[tuple[Method, list[Parameters]]]:
+        """Find suitable methods of a file using ChargeFW2 and store them for later requests."""
+
+        cached = await self._get_cached_molecules(
+            file_hash, file_path, True, False, permissive_types
+        )
+        async with cached.lock:
+            methods: list[tuple[Method, list[Parameters]]] = await self._run_in_executor(
+                self.chargefw2.get_suitable_methods, cached.molecules
+            )
 
         try:
-            self.logger.info(f"Getting available parameters for method {method}.")
-            parameters = await self._run_in_executor(
-                self.chargefw2.get_available_parameters, method
+            await asyncio.to_thread(
+                self.calculation_storage.store_suitable_methods,
+                file_hash,
+                permissive_types,
+                methods,
             )
+        except Exception:
+            # methods are found again on the next request
+            self.logger.warn("Unable to store suitable methods for file with hash '%s'.", file_hash)
 
-            return parameters
-        except Exception as e:
-            self.logger.error(f"Error getting available parameters for method {method}: {e}")
-            raise e
+        return methods
+
+    async def get_available_parameters(self, method: str) -> list[Parameters]:
+        """Get available parameters for charge calculation method."""
+
+        self.logger.info("Getting available parameters for method %s.", method)
+
+        return self.method_registry.get_parameters(method)
 
     async def get_best_parameters(
-        self, method: str, file_path: str, permissive_types: bool = True
-    ) -> Parameters:
-        """Get best parameters for charge calculation method."""
+        self, method: str, file_hash: str, file_path: str, permissive_types: bool = True
+    ) -> Parameters | None:
+        """Get best parameters for charge calculation method.
+
+        Best parameters are found once for each file and stored in the database.
+        """
 
         try:
+            stored = await asyncio.to_thread(
+                self.calculation_storage.get_best_parameters, file_hash, method, permissive_types
+            )
+
+            if stored is not None:
+                if stored.parameters is None:
+                    return None
+
+                # parameters may be missing if they were removed from ChargeFW2
+                if (
+                    parameters := self.method_registry.find_parameters(method, stored.parameters)
+                ) is not None:
+                    return parameters
+
             molecules = await self.read_molecules(file_path)
 
-            self.logger.info(f"Getting best parameters for method {method}.")
+            self.logger.info("Getting best parameters for method %s.", method)
             parameters = await self._run_in_executor(
                 self.chargefw2.get_best_parameters, molecules, method, permissive_types
             )
 
+            try:
+                await asyncio.to_thread(
+                    self.calculation_storage.store_best_parameters,
+                    file_hash,
+                    method,
+                    permissive_types,
+                    parameters.internal_name if parameters is not None else None,
+                )
+            except Exception:
+                # parameters are found again on the next request
+                self.logger.warn(
+                    "Unable to store best parameters for file with hash '%s'.", file_hash
+                )
+
             return parameters
         except Exception as e:
-            self.logger.error(f"Error getting best parameters for method {method}: {e}")
+            self.logger.error("Error getting best parameters for method %s: %s", method, e)
             raise e
 
     async def read_molecules(
@@ -207,22 +378,39 @@ class ChargeFW2Service:
     ) -> Molecules:
         """Load molecules from a file"""
         try:
-            self.logger.info(f"Loading molecules from file {file_path}.")
+            self.logger.info("Loading molecules from file %s.", file_path)
             molecules = await self._run_in_executor(
                 self.chargefw2.molecules, file_path, read_hetatm, ignore_water, permissive_types
             )
 
             return molecules
         except Exception as e:
-            self.logger.error(f"Error loading molecules from file {file_path}: {e}")
+            self.logger.error("Error loading molecules from file %s: %s", file_path, e)
             raise e
 
+    async def _get_cached_molecules(
+        self,
+        file_hash: str,
+        file_path: str,
+        read_hetatm: bool,
+        ignore_water: bool,
+        permissive_types: bool,
+    ) -> CachedMolecules:
+        """Load molecules from a file, reusing already parsed molecules if possible."""
+
+        return await self.molecules_cache.get(
+            (file_hash, read_hetatm, ignore_water, permissive_types),
+            await asyncio.to_thread(self.io.file_size, file_path),
+            lambda: self.read_molecules(file_path, read_hetatm, ignore_water, permissive_types),
+        )
+
     async def calculate_charges(
         self,
         computation_id: str,
         settings: AdvancedSettingsDto,
         data: Tuple[CalculationConfigDto, list[str]],
         user_id: str | None,
+        on_file_processed: Callable[[], None] | None = None,
     ) -> list[CalculationResultDto]:
         """Calculate charges for provided files.
 
@@ -230,15 +418,31 @@ class ChargeFW2Service:
             computation_id (str): Computation id.
             data (Tuple[CalculationConfigDto, list[str]]): Dictionary of configs and file_hashes.
             user_id (str): User id making the calculation.
+            on_file_processed (Callable[[], None] | None, optional): Called after
+                each file is processed with one of the configs. Defaults to None.
 
         Returns:
             ChargeCalculationResult: List of successful calculations.
                 Failed calculations are skipped.
         """
 
+        # files are split into molecules once for all configs
+        records = SharedRecords(
+            self._split_molecules,
+            Counter(file_hash for file_hashes in data.values() for file_hash in file_hashes),
+        )
+
         calculations = await asyncio.gather(
             *[
-                self._calculate_charges(user_id, computation_id, settings, config, file_hashes)
+                self._calculate_charges(
+                    user_id,
+                    computation_id,
+                    settings,
+                    config,
+                    file_hashes,
+                    on_file_processed,
+                    records,
+                )
                 for config, file_hashes in data.items()
             ],
             return_exceptions=False,
@@ -246,6 +450,7 @@ class ChargeFW2Service:
         configs = [calculation.config for calculation in calculations]
 
         await self.io.store_configs(computation_id, configs, user_id)
+        self.logger.info("Molecules cache statistics: %s", self.molecules_cache.stats())
 
         return calculations
 
@@ -256,51 +461,50 @@ class ChargeFW2Service:
         settings: AdvancedSettingsDto,
         config: CalculationConfigDto,
         file_hashes: list[str],
+        on_file_processed: Callable[[], None] | None = None,
+        records: SharedRecords | None = None,
     ) -> CalculationResultDto:
         """Calculate charges for provided files."""
 
         self.logger.info(
-            f"Calculating charges with method {config.method} and parameters {config.parameters}."
+            "Calculating charges with method %s and parameters %s.",
+            config.method,
+            config.parameters,
         )
 
-        workdir = self.io.get_file_storage_path(user_id)
-
         async def process_file(
             file_hash: str, config: CalculationConfigDto
         ) -> CalculationDto | None:
-            file_name = next(
-                (
-                    file
-                    for file in self.io.listdir(workdir)
-                    if self.io.parse_filename(file)[0] == file_hash
-                ),
-                None,
-            )
+            try:
+                return await calculate_file(file_hash, config)
+            finally:
+                if on_file_processed is not None:
+                    on_file_processed()
 
-            if file_name is None:
-                self.logger.warn(f"File with hash {file_hash} not found in {workdir}, skipping.")
+        async def calculate_file(
+            file_hash: str, config: CalculationConfigDto
+        ) -> CalculationDto | None:
+            full_path = await asyncio.to_thread(self.io.get_filepath, file_hash, user_id)
+
+            if full_path is None:
+                self.logger.warn("File with hash %s not found, skipping.", file_hash)
                 return
 
             async with self.semaphore:
                 charges_dir = self.io.get_charges_path(computation_id, user_id)
-                self.io.create_dir(charges_dir)
+                await asyncio.to_thread(self.io.create_dir, charges_dir)
 
-                full_path = os.path.join(workdir, file_name)
-                file_name = self.io.parse_filename(file_name)[1]
+                file_name = self.io.parse_filename(Path(full_path).name)[1]
 
-                molecules = await self.read_molecules(
+                charges = await self._calculate_file_charges(
+                    computation_id,
+                    user_id,
+                    settings,
+                    config,
+                    file_hash,
                     full_path,
-                    settings.read_hetatm,
-                    settings.ignore_water,
-                    settings.permissive_types,
-                )
-
-                charges = await self._run_in_executor(
-                    self.chargefw2.calculate_charges,
-                    molecules,
-                    config.method,
-                    config.parameters,
                     charges_dir,
+                    records,
                 )
 
                 result = CalculationDto(
@@ -328,51 +532,484 @@ class ChargeFW2Service:
                 calculations=calculations,
             )
         except Exception as e:
-            self.logger.error(f"Error calculating charges: {traceback.format_exc()}")
+            self.logger.error("Error calculating charges: %s", traceback.format_exc())
+            raise e
+
+    async def _calculate_file_charges(
+        self,
+        computation_id: str,
+        user_id: str | None,
+        settings: AdvancedSettingsDto,
+        config: CalculationConfigDto,
+        file_hash: str,
+        file_path: str,
+        charges_dir: str,
+        shared_records: SharedRecords | None = None,
+    ) -> Charges:
+        """Calculate charges of a file, reusing stored charges of individual molecules.
+
+        Multi-molecule files (SDF, MOL2, multi-block mmCIF) are split into molecules and only
+        molecules without stored charges (calculated with the same config and settings)
+        are calculated, in chunks if there are many of them. Other files are always
+        calculated as a whole. Files are split using `shared_records` if provided.
+        """
+
+        if shared_records is not None:
+            records = await shared_records.get(file_hash, file_path)
+        else:
+            records = await self._split_molecules(file_path)
+
+        if records is None:
+            return await self._calculate_molecules(
+                settings, config, file_path, charges_dir, file_hash
+            )
+
+        stored = await asyncio.to_thread(
+            self.calculation_storage.get_molecule_charges,
+            [record.fingerprint for record in records],
+            config,
+            settings,
+        )
+        missing = [record for record in records if record.fingerprint not in stored]
+
+        self.logger.info(
+            "Reusing stored charges of %s of %s molecules of file %s.",
+            len(records) - len(missing),
+            len(records),
+            file_hash,
+        )
+
+        if len(missing) == len(records) and len(records) <= self.chunk_size:
+            charges = await self._calculate_molecules(
+                settings, config, file_path, charges_dir, file_hash
+            )
+        elif len(missing) > 0:
+            charges = await self._calculate_records(
+                computation_id, user_id, settings, config, file_path, missing
+            )
+        else:
+            charges = {}
+
+        if set(charges) != {record.name for record in missing}:
+            # molecules are not named by their titles, charges can not be matched to records
+            self.logger.warn("Unable to match charges to molecules of file %s.", file_hash)
+
+            if len(missing) == len(records):
+                return charges
+
+            return await self._calculate_molecules(
+                settings, config, file_path, charges_dir, file_hash
+            )
+
+        await asyncio.to_thread(
+            self.calculation_storage.store_molecule_charges,
+            {record.fingerprint: charges[record.name] for record in missing},
+            config,
+            settings,
+        )
+
+        return {
+            record.name: (
+                charges[record.name] if record.name in charges else stored[record.fingerprint]
+            )
+            for record in records
+        }
+
+    async def _calculate_records(
+        self,
+        computation_id: str,
+        user_id: str | None,
+        settings: AdvancedSettingsDto,
+        config: CalculationConfigDto,
+        file_path: str,
+        records: list[MoleculeRecord],
+    ) -> Charges:
+        """Calculate charges of provided molecule records of a file.
+
+        Records are calculated in chunks of at most `chunk_size` molecules, which run
+        in parallel in the executor. At most `max_workers` chunks are parsed at once, which
+        bounds memory used by parsed molecules. Text of all records is still held in memory
+        and output files of the chunks are discarded (they are generated by `ensure_outputs`).
+        """
+
+        chunks = [
+            records[start : start + self.chunk_size]
+            for start in range(0, len(records), self.chunk_size)
+        ]
+        limit = asyncio.Semaphore(self.max_workers)
+        done = 0
+
+        # the same file may be calculated with other configs concurrently
+        computation_dir = self.io.get_computation_path(computation_id, user_id)
+        partial_dir = str(Path(computation_dir) / f"partial.{uuid.uuid4()}.tmp")
+        await asyncio.to_thread(self.io.create_dir, partial_dir)
+
+        async def calculate_chunk(index: int, chunk: list[MoleculeRecord]) -> Charges:
+            nonlocal done
+
+            async with limit:
+                chunk_dir = str(Path(partial_dir) / str(index))
+                chunk_path = str(Path(chunk_dir) / Path(file_path).name)
+                # chunks share the file name, so their output files must not be written
+                # to the charges directory
+                output_dir = str(Path(chunk_dir) / "output")
+                await asyncio.to_thread(self.io.create_dir, output_dir)
+
+                try:
+                    await self.io.write_file(chunk_path, join_molecules(chunk))
+                    charges = await self._calculate_molecules(
+                        settings, config, chunk_path, output_dir
+                    )
+                finally:
+                    await asyncio.to_thread(self.io.remove_dir, chunk_dir)
+
+            done += 1
+            if len(chunks) > 1:
+                self.logger.info(
+                    "Calculated %s of %s chunks of file %s.",
+                    done,
+                    len(chunks),
+                    Path(file_path).name,
+                )
+
+            return charges
+
+        try:
+            results = await asyncio.gather(
+                *[calculate_chunk(index, chunk) for index, chunk in enumerate(chunks)]
+            )
+        finally:
+            await asyncio.to_thread(self.io.remove_dir, partial_dir)
+
+        charges = {}
+        for chunk_charges in results:
+            charges.update(chunk_charges)
+
+        return charges
+
+    async def _split_molecules(self, file_path: str) -> list[MoleculeRecord] | None:
+        extension = Path(file_path).suffix.removeprefix(".")
+
+        if extension.lower() not in ["sdf", "mol2", "cif", "mmcif"]:
+            return None
+
+        # single structures (e.g. proteins) are not split, the file is not read into memory
+        if extension.lower() in ["cif", "mmcif"] and not await asyncio.to_thread(
+            has_multiple_blocks, self.io.read_lines(file_path)
+        ):
+            return None
+
+        try:
+            content = await self.io.read_file(file_path)
+        except UnicodeDecodeError:
+            return None
+
+        return await asyncio.to_thread(split_molecules, content, extension)
+
+    async def _calculate_molecules(
+        self,
+        settings: AdvancedSettingsDto,
+        config: CalculationConfigDto,
+        file_path: str,
+        charges_dir: str,
+        file_hash: str | None = None,
+    ) -> Charges:
+        """Calculate charges of all molecules in a file.
+        Parsed molecules are cached only for stored files (i.e. if file_hash is provided)."""
+
+        if self.process_executor is not None:
+            future = self.process_executor.submit(
+                process.calculate_charges,
+                file_path,
+                settings.read_hetatm,
+                settings.ignore_water,
+                settings.permissive_types,
+                config.method,
+                config.parameters,
+                charges_dir,
+            )
+
+            try:
+                shared_charges = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # calculation already running in a worker can not be cancelled,
+                # shared memory of its result is released once it finishes
+                future.add_done_callback(process.release_discarded)
+                raise
+
+            return shared_charges.load()
+
+        if file_hash is None:
+            molecules = await self.read_molecules(
+                file_path, settings.read_hetatm, settings.ignore_water, settings.permissive_types
+            )
+
+            return await self._run_in_executor(
+                self.chargefw2.calculate_charges,
+                molecules,
+                config.method,
+                config.parameters,
+                charges_dir,
+            )
+
+        cached = await self._get_cached_molecules(
+            file_hash,
+            file_path,
+            settings.read_hetatm,
+            settings.ignore_water,
+            settings.permissive_types,
+        )
+
+        async with cached.lock:
+            return await self._run_in_executor(
+                self.chargefw2.calculate_charges,
+                cached.molecules,
+                config.method,
+                config.parameters,
+                charges_dir,
+            )
+
+    async def run_calculation(
+        self,
+        computation_id: str,
+        settings: AdvancedSettingsDto,
+        file_hashes: list[str],
+        configs: list[CalculationConfigDto] | None,
+        user_id: str | None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> list[CalculationResultDto]:
+        """Runs the whole calculation of a computation with prepared inputs.
+
+        Calculates charges which are not cached yet and stores results in the database.
+
+        Args:
+            computation_id (str): Computation id.
+            settings (AdvancedSettingsDto): Advanced settings of the calculation.
+            file_hashes (list[str]): Hashes of files to calculate charges for.
+            configs (list[CalculationConfigDto] | None): Configs to use.
+                The most suitable method and parameters are used if not provided.
+            user_id (str | None): User id making the calculation.
+            on_progress (Callable[[int, int], None] | None, optional): Called with the number
+                of processed and total (file, config) pairs whenever a file is processed.
+                Defaults to None.
+
+        Raises:
+            BadRequestError: If no configs are provided and no suitable method exists.
+
+        Returns:
+            list[CalculationResultDto]: Calculation results.
+        """
+
+        if not configs:
+            # use most suitable method and parameters if none provided
+            suitable = await self.get_computation_suitable_methods(computation_id, user_id)
+
+            if len(suitable.methods) == 0:
+                raise BadRequestError(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="No suitable methods found."
+                )
+
+            method_name = suitable.methods[0].internal_name
+            parameters = suitable.parameters.get(method_name, [])
+            parameters_name = parameters[0].internal_name if len(parameters) > 0 else None
+
+            configs = [CalculationConfigDto(method=method_name, parameters=parameters_name)]
+
+        # split calculations into those that need to be calculated and those that are cached
+        to_calculate, cached = await asyncio.to_thread(
+            self.calculation_storage.filter_existing_calculations, settings, file_hashes, configs
+        )
+
+        total = len(file_hashes) * len(configs)
+        processed = total - sum(len(hashes) for hashes in to_calculate.values())
+
+        def on_file_processed() -> None:
+            nonlocal processed
+            processed += 1
+            on_progress(processed, total)
+
+        if on_progress is not None:
+            on_progress(processed, total)
+
+        calculations = await self.calculate_charges(
+            computation_id,
+            settings,
+            to_calculate,
+            user_id,
+            on_file_processed if on_progress is not None else None,
+        )
+
+        # add cached items to results
+        cached_by_config = {
+            (config.method, config.parameters): (config, results)
+            for config, results in cached.items()
+        }
+        for result in calculations:
+            if (key := (result.config.method, result.config.parameters)) in cached_by_config:
+                result.calculations.extend(cached_by_config.pop(key)[1])
+
+        calculations.extend(
+            [
+                CalculationResultDto(config=config, calculations=results)
+                for config, results in cached_by_config.values()
+            ]
+        )
+
+        async with self._get_outputs_lock(computation_id):
+            await asyncio.to_thread(
+                self.calculation_storage.store_calculation_results,
+                computation_id,
+                settings,
+                calculations,
+                user_id,
+            )
+
+            # results were added to the computation, previously generated outputs are outdated
+            await asyncio.to_thread(self.io.invalidate_outputs, computation_id, user_id)
+
+        # output files are generated on first request, see 'ensure_outputs'
+        if user_id is None:
+            await asyncio.to_thread(self.io.record_guest_access, "computations", computation_id)
+
+        return calculations
+
+    async def ensure_outputs(self, computation_id: str, user_id: str | None) -> str:
+        """Generates output files (e.g. mmCIF with charges) of a computation if needed.
+
+        Output files are generated from stored charges and input files on first request
+        and stored on disk until new results of the computation are stored (see `run_calculation`).
+
+        Args:
+            computation_id (str): Computation id.
+            user_id (str | None): User id owning the computation.
+
+        Raises:
+            FileNotFoundError: If the computation does not exist or belongs to a different user.
+
+        Returns:
+            str: Path to directory with output files.
+        """
+
+        charges_dir = self.io.get_charges_path(computation_id, user_id)
+
+        if user_id is None:
+            await asyncio.to_thread(self.io.record_guest_access, "computations", computation_id)
+
+        if await asyncio.to_thread(self.io.outputs_generated, computation_id, user_id):
+            return charges_dir
+
+        try:
+            async with self._get_outputs_lock(computation_id):
+                if await asyncio.to_thread(self.io.outputs_generated, computation_id, user_id):
+                    return charges_dir
+
+                calculation_set = await asyncio.to_thread(
+                    self.calculation_storage.get_calculation_set, computation_id
+                )
+                owner_id = (
+                    str(calculation_set.user_id)
+                    if calculation_set is not None and calculation_set.user_id is not None
+                    else None
+                )
+                if calculation_set is None or owner_id != user_id:
+                    raise FileNotFoundError()
+
+                self.logger.info("Generating output files for computation %s.", computation_id)
+
+                settings = AdvancedSettingsDto.model_validate(calculation_set.advanced_settings)
+                results = await asyncio.to_thread(
+                    self.calculation_storage.get_calculation_results, computation_id
+                )
+
+                # write to a temporary directory first, so that files being served
+                # are never partially written (other workers may generate them concurrently)
+                tmp_dir = str(
+                    Path(self.io.get_computation_path(computation_id, user_id))
+                    / f"charges.{uuid.uuid4()}.tmp"
+                )
+
+                try:
+                    await self.save_charges(settings, computation_id, results, user_id, tmp_dir)
+                    await self.mmcif_service.write_to_mmcif(
+                        user_id, computation_id, results, tmp_dir
+                    )
+
+                    await asyncio.to_thread(self._store_outputs, tmp_dir, charges_dir, user_id)
+                finally:
+                    if await asyncio.to_thread(self.io.path_exists, tmp_dir):
+                        await asyncio.to_thread(self.io.remove_dir, tmp_dir)
+
+                await self.io.mark_outputs_generated(computation_id, user_id)
+
+            return charges_dir
+        except Exception as e:
+            self.logger.error(
+                "Error generating output files for computation %s: %s",
+                computation_id,
+                traceback.format_exc(),
+            )
             raise e
 
+    def _get_outputs_lock(self, computation_id: str) -> asyncio.Lock:
+        # locks are shared by requests generating or invalidating outputs of the computation
+        if (lock := self._outputs_locks.get(computation_id)) is None:
+            lock = self._outputs_locks[computation_id] = asyncio.Lock()
+
+        return lock
+
+    def _store_outputs(self, tmp_dir: str, charges_dir: str, user_id: str | None) -> None:
+        # moves generated output files to the charges directory and records their size
+
+        size_before = self.io.dir_size(charges_dir)
+        self.io.move_dir_contents(tmp_dir, charges_dir)
+        self.io.record_usage(user_id, computations=self.io.dir_size(charges_dir) - size_before)
+
     async def save_charges(
         self,
         settings: AdvancedSettingsDto,
         computation_id: str,
         results: list[CalculationResultDto],
         user_id: str | None,
+        output_dir: str | None = None,
     ) -> None:
-        workdir = self.io.get_file_storage_path(user_id)
-        charges_dir = self.io.get_charges_path(computation_id, user_id)
-        self.io.create_dir(charges_dir)
+        # inputs of the computation are pinned, so they exist even if files were removed
+        workdir = self.io.get_inputs_path(computation_id, user_id)
+        charges_dir = output_dir or self.io.get_charges_path(computation_id, user_id)
+        await asyncio.to_thread(self.io.create_dir, charges_dir)
 
         for result in results:
             for calculation in result.calculations:
                 file_path = str(Path(workdir) / f"{calculation.file_hash}_{calculation.file}")
-                molecules = await self.read_molecules(
+                cached = await self._get_cached_molecules(
+                    calculation.file_hash,
                     file_path,
                     settings.read_hetatm,
                     settings.ignore_water,
                     settings.permissive_types,
                 )
                 config = calculation.config
-                await self._run_in_executor(
-                    self.chargefw2.save_charges,
-                    calculation.charges,
-                    molecules,
-                    config.method,
-                    config.parameters,
-                    charges_dir,
-                )
+                async with cached.lock:
+                    await self._run_in_executor(
+                        self.chargefw2.save_charges,
+                        calculation.charges,
+                        cached.molecules,
+                        config.method,
+                        config.parameters,
+                        charges_dir,
+                    )
 
     async def info(self, path: str) -> MoleculeSetStats:
         """Get information about the provided file."""
 
         try:
-            self.logger.info(f"Getting info for file {path}.")
+            self.logger.info("Getting info for file %s.", path)
 
             molecules = await self.read_molecules(path)
             info = molecules.info()
 
             return MoleculeSetStats(info.to_dict())
         except Exception as e:
-            self.logger.error(f"Error getting info for file {path}: {traceback.format_exc()}")
+            self.logger.error("Error getting info for file %s: %s", path, traceback.format_exc())
             raise e
 
     def get_calculation_molecules(self, path: str) -> list[str]:
@@ -412,6 +1049,6 @@ class ChargeFW2Service:
             self.io.delete_computation(computation_id, user_id)
         except Exception as e:
             self.logger.error(
-                f"Error deleting computation {computation_id}: {traceback.format_exc()}"
+                "Error deleting computation %s: %s", computation_id, traceback.format_exc()
             )
             raise e
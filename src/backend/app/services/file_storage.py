@@ -1,7 +1,14 @@
-from datetime import datetime
+import traceback
+
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Literal
+
+from sqlalchemy.orm import Session
+
 from db.database import SessionManager
+from db.repositories.uploaded_file_repository import UploadedFileFilters, UploadedFileRepository
+from db.schemas.uploaded_file import UploadedFile
 from api.v1.schemas.file import FileResponse
 from models.paging import PagedList
 from models.molecule_info import MoleculeSetStats
@@ -11,7 +18,11 @@ from services.logging.base import LoggerBase
 
 
 class FileStorageService:
-    """Service for manipulating files in the database and filesystem."""
+    """Service for manipulating files in the database and filesystem.
+
+    Metadata of files uploaded by logged in users are stored in the database,
+    so that listing, searching and ordering files does not touch the filesystem.
+    """
 
     def __init__(
         self,
@@ -19,10 +30,12 @@ class FileStorageService:
         io: IOService,
         session_manager: SessionManager,
         storage_service: CalculationStorageService,
+        file_repository: UploadedFileRepository,
     ):
         self.io = io
         self.storage_service = storage_service
         self.session_manager = session_manager
+        self.file_repository = file_repository
         self.logger = logger
 
     def get_files(
@@ -34,39 +47,140 @@ class FileStorageService:
         search: str,
         user_id: str,
     ) -> PagedList[FileResponse]:
-        workdir = self.io.get_file_storage_path(user_id)
-        files = [self.io.parse_filename(Path(name).name) for name in self.io.listdir(workdir)]
-
-        is_reverse = order == "desc"
-
-        match order_by:
-            case "name":
-                files.sort(key=lambda x: x[-1], reverse=is_reverse)
-            case "size":
-                files.sort(key=lambda x: self.io.get_file_size(x[0], user_id), reverse=is_reverse)
-            case "uploaded_at" | _:
-                files.sort(
-                    key=lambda x: self.io.get_last_modification(x[0], user_id), reverse=is_reverse
-                )
+        filters = UploadedFileFilters(
+            page=page,
+            page_size=page_size,
+            order_by=order_by,
+            order=order,
+            user_id=user_id,
+            search=search,
+        )
 
-        if search != "":
-            files = [file for file in files if search.casefold() in file[1].casefold()]
+        marker_path = self.io.get_files_synced_marker_path(user_id)
+        if not self.io.path_exists(marker_path):
+            with self.session_manager.session() as session:
+                synced = self._sync_files(session, user_id)
 
-        page_start = (page - 1) * page_size
-        page_end = page * page_size
+            # marked only once metadata are committed, so that failed syncs are retried
+            if synced:
+                self.io.update_json(
+                    marker_path, lambda _: {"synced_at": datetime.now(timezone.utc).isoformat()}
+                )
 
         with self.session_manager.session() as session:
+            files = self.file_repository.get_all(session, filters)
+
             items = [
                 FileResponse(
-                    file_name=name,
-                    file_hash=file_hash,
-                    size=self.io.get_file_size(file_hash, user_id) or 0,
-                    stats=self.storage_service.get_info(session, file_hash)
-                    or MoleculeSetStats.default(),
-                    uploaded_at=self.io.get_last_modification(file_hash, user_id) or datetime.min,
+                    file_name=file.file_name,
+                    file_hash=file.file_hash,
+                    size=file.size,
+                    stats=self.storage_service.to_stats(file.stats) or MoleculeSetStats.default(),
+                    uploaded_at=file.uploaded_at,
                 )
-                for [file_hash, name] in files[page_start:page_end]
+                for file in files.items
             ]
 
-            data = PagedList(page=page, page_size=page_size, total_count=len(files), items=items)
-            return data
+            return PagedList(
+                page=files.page,
+                page_size=files.page_size,
+                total_count=files.total_count,
+                items=items,
+            )
+
+    def store_file(self, file_hash: str, path: str, user_id: str | None) -> None:
+        """Store metadata of an uploaded file. Stats of the file have to be stored before.
+
+        Args:
+            file_hash (str): Hash of the file.
+            path (str): Path to the stored file.
+            user_id (str | None): User id. Metadata of guest files are not stored.
+        """
+
+        if user_id is None:
+            return
+
+        try:
+            _, file_name = self.io.parse_filename(Path(path).name)
+
+            with self.session_manager.session() as session:
+                self.logger.info("Storing metadata of file with hash '%s'.", file_hash)
+                self.file_repository.store(
+                    session,
+                    UploadedFile(
+                        user_id=user_id,
+                        file_hash=file_hash,
+                        file_name=file_name,
+                        size=self.io.file_size(path),
+                        uploaded_at=datetime.now(timezone.utc),
+                        molecule_set_id=file_hash,
+                    ),
+                )
+        except Exception as e:
+            self.logger.error(
+                "Error storing metadata of file with hash '%s': %s",
+                file_hash,
+                traceback.format_exc(),
+            )
+            raise e
+
+    def remove_file(self, file_hash: str, user_id: str | None) -> None:
+        """Remove file with provided hash together with its metadata.
+
+        Args:
+            file_hash (str): Hash of the file.
+            user_id (str | None): User id.
+        """
+
+        self.io.remove_file(file_hash, user_id)
+
+        if user_id is None:
+            return
+
+        try:
+            with self.session_manager.session() as session:
+                self.file_repository.delete(session, user_id, [file_hash])
+        except Exception as e:
+            self.logger.error(
+                "Error removing metadata of file with hash '%s': %s",
+                file_hash,
+                traceback.format_exc(),
+            )
+            raise e
+
+    def _sync_files(self, session: Session, user_id: str) -> bool:
+        # Stores metadata of files uploaded before metadata were stored in the database.
+        # Returns whether files of the user were synced (i.e. the file storage exists).
+
+        workdir = self.io.get_file_storage_path(user_id)
+        if not self.io.path_exists(workdir):
+            return False
+
+        known = self.file_repository.get_hashes(session, user_id)
+        stored = False
+
+        for name in self.io.listdir(workdir):
+            file_hash, file_name = self.io.parse_filename(name)
+            if file_hash in known:
+                continue
+
+            path = str(Path(workdir) / name)
+            stats = self.storage_service.get_info(session, file_hash)
+            self.file_repository.store(
+                session,
+                UploadedFile(
+                    user_id=user_id,
+                    file_hash=file_hash,
+                    file_name=file_name,
+                    size=self.io.file_size(path),
+                    uploaded_at=self.io.last_modified(path),
+                    molecule_set_id=file_hash if stats is not None else None,
+                ),
+            )
+            known.add(file_hash)
+            stored = True
+
+        if stored:
+            self.logger.info("Stored metadata of existing files of user '%s'.", user_id)
+
+        return True
@@ -0,0 +1,243 @@
+"""Service for evicting least recently used guest files and computations."""
+
+import asyncio
+import time
+import traceback
+
+from pathlib import Path
+from typing import Literal
+
+from services.io import IOService
+from services.logging.base import LoggerBase
+
+
+EntryKind = Literal["files", "computations"]
+
+
+class GuestEvictionService:
+    """Service for evicting least recently used guest files and computations.
+
+    Guest storage is shared by all guests. Once space used by guest files or computations
+    exceeds its quota, least recently used entries are removed in batches until the used
+    space drops below `low_water_mark` of the quota.
+
+    Accesses are recorded in memory by `IOService` and periodically merged into an LRU index
+    (`lru.json` in the guest storage directory) shared by all web server processes.
+    Entries missing from the index (e.g. created before the index existed) fall back
+    to their modification time. Only one process evicts at a time, which is ensured
+    by a lease stored in the index.
+    """
+
+    def __init__(
+        self,
+        logger: LoggerBase,
+        io: IOService,
+        interval: float = 30.0,
+        low_water_mark: float = 0.8,
+        batch_size: int = 50,
+    ):
+        self.logger = logger
+        self.io = io
+        self.interval = interval
+        self.low_water_mark = low_water_mark
+        self.batch_size = batch_size
+
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start eviction task. Has to be called from a running event loop."""
+
+        self.logger.info("Starting guest storage eviction.")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop eviction task. Accesses recorded since the last run are stored."""
+
+        self.logger.info("Stopping guest storage eviction.")
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        try:
+            self._update_index(self.io.pop_guest_accesses(), acquire_lease=False)
+        except Exception:
+            self.logger.warn("Unable to store guest accesses: %s", traceback.format_exc())
+
+    def get_metrics(self) -> dict:
+        """Get eviction metrics shared by all web server processes.
+
+        Returns:
+            dict: Cumulative eviction counters, information about the last run
+                and current usage of guest storage.
+        """
+
+        index = self.io.read_json(self._get_index_path()) or self._empty_index()
+        usage = self.io.get_usage()
+
+        return {
+            **index["metrics"],
+            "tracked_files": len(index["files"]),
+            "tracked_computations": len(index["computations"]),
+            "files_bytes": usage["files"],
+            "files_quota_bytes": self.io.guest_file_quota,
+            "computations_bytes": usage["computations"],
+            "computations_quota_bytes": self.io.guest_compute_quota,
+        }
+
+    def run_once(self) -> None:
+        """Merge recorded accesses into the LRU index and evict entries if needed."""
+
+        started_at = time.time()
+        index = self._update_index(self.io.pop_guest_accesses(), acquire_lease=True)
+
+        if index is None:
+            # another process is evicting
+            return
+
+        evicted = {"files": 0, "computations": 0}
+        freed = 0
+
+        try:
+            for kind in ("files", "computations"):
+                count, size = self._evict(kind, index[kind])
+                evicted[kind] += count
+                freed += size
+        finally:
+
+            def release(current: dict | None) -> dict:
+                current = current or self._empty_index()
+                metrics = current["metrics"]
+                metrics["runs"] += 1
+                metrics["evicted_files"] += evicted["files"]
+                metrics["evicted_computations"] += evicted["computations"]
+                metrics["freed_bytes"] += freed
+                metrics["last_run_at"] = started_at
+                metrics["last_run_seconds"] = time.time() - started_at
+                current["lease_until"] = 0
+
+                return current
+
+            self.io.update_json(self._get_index_path(), release)
+
+        if freed > 0:
+            self.logger.info(
+                "Evicted %s guest files and %s guest computations (%s bytes).",
+                evicted["files"],
+                evicted["computations"],
+                freed,
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                self.logger.error("Unable to evict guest storage: %s", traceback.format_exc())
+
+            await asyncio.sleep(self.interval)
+
+    def _evict(self, kind: EntryKind, last_accesses: dict[str, float]) -> tuple[int, int]:
+        path = (
+            self.io.get_file_storage_path()
+            if kind == "files"
+            else self.io.get_computations_path()
+        )
+        entries = self.io.listdir(path)
+
+        # forget entries removed by other means
+        if stale := set(last_accesses) - set(entries):
+            self._forget(kind, stale)
+
+        quota = self.io.guest_file_quota if kind == "files" else self.io.guest_compute_quota
+        used = self.io.get_usage()[kind]
+
+        if used <= quota:
+            return 0, 0
+
+        amount_to_free = used - int(quota * self.low_water_mark)
+        self.logger.info("Freeing %s bytes of guest %s space.", amount_to_free, kind)
+
+        candidates = sorted(
+            entries,
+            key=lambda entry: last_accesses.get(entry)
+            or self.io.last_modified(str(Path(path) / entry)).timestamp(),
+        )
+
+        count = 0
+        freed = 0
+        while amount_to_free > 0 and candidates:
+            batch, candidates = candidates[: self.batch_size], candidates[self.batch_size :]
+            removed = []
+
+            for entry in batch:
+                if amount_to_free <= 0:
+                    break
+
+                size = (
+                    self.io.remove_guest_file(entry)
+                    if kind == "files"
+                    else self.io.remove_guest_computation(entry)
+                )
+                amount_to_free -= size
+                freed += size
+                removed.append(entry)
+
+            count += len(removed)
+            self._forget(kind, set(removed))
+
+        return count, freed
+
+    def _forget(self, kind: EntryKind, entries: set[str]) -> None:
+        def forget(current: dict | None) -> dict:
+            current = current or self._empty_index()
+            for entry in entries:
+                current[kind].pop(entry, None)
+
+            return current
+
+        self.io.update_json(self._get_index_path(), forget)
+
+    def _update_index(
+        self, accesses: dict[str, dict[str, float]], acquire_lease: bool
+    ) -> dict | None:
+        acquired = False
+        now = time.time()
+
+        def update(current: dict | None) -> dict:
+            nonlocal acquired
+
+            current = current or self._empty_index()
+            for kind, last_accesses in accesses.items():
+                for entry, accessed_at in last_accesses.items():
+                    current[kind][entry] = max(current[kind].get(entry, 0), accessed_at)
+
+            if acquire_lease and current["lease_until"] < now:
+                # lease expires if the process holding it is killed
+                current["lease_until"] = now + max(self.interval, 60) * 10
+                acquired = True
+
+            return current
+
+        index = self.io.update_json(self._get_index_path(), update)
+
+        return index if acquired else None
+
+    def _get_index_path(self) -> str:
+        return str(Path(self.io.get_storage_path(None)) / "lru.json")
+
+    def _empty_index(self) -> dict:
+        return {
+            "files": {},
+            "computations": {},
+            "lease_until": 0,
+            "metrics": {
+                "runs": 0,
+                "evicted_files": 0,
+                "evicted_computations": 0,
+                "freed_bytes": 0,
+                "last_run_at": None,
+                "last_run_seconds": None,
+            },
+        }
@@ -1,11 +1,13 @@
 """Service for handling file operations."""
 
 import datetime
+import hashlib
 import json
 import os
 from pathlib import Path
+import time
 import traceback
-from typing import Tuple
+from typing import Callable, Iterator, Literal, Tuple
 
 from dotenv import load_dotenv
 from fastapi import UploadFile, status
@@ -37,6 +39,8 @@ class IOService:
         self.max_file_size = int(os.environ.get("ACC2_MAX_FILE_SIZE_BYTES", 0))
         self.max_upload_size = int(os.environ.get("ACC2_MAX_UPLOAD_SIZE_BYTES", 0))
 
+        self._guest_accesses: dict[str, dict[str, float]] = {"files": {}, "computations": {}}
+
         self._ensure_env_set()
 
     def create_dir(self, path: str) -> None:
@@ -45,36 +49,103 @@ class IOService:
         if self.io.path_exists(path):
             return
 
-        self.logger.info(f"Creating directory {path}")
+        self.logger.info("Creating directory %s", path)
 
         try:
             self.io.mkdir(path)
         except Exception as e:
-            self.logger.error(f"Unable to create directory '{path}': {traceback.format_exc()}")
+            self.logger.error("Unable to create directory '%s': %s", path, traceback.format_exc())
+            raise e
+
+    def remove_dir(self, path: str) -> None:
+        """Remove directory with all its contents."""
+
+        self.logger.info("Removing directory %s", path)
+
+        try:
+            self.io.rmdir(path)
+        except Exception as e:
+            self.logger.error("Unable to remove directory '%s': %s", path, traceback.format_exc())
             raise e
 
     def cp(self, path_from: str, path_to: str) -> str:
         """Copy file from source to destination."""
 
-        self.logger.info(f"Copying from {path_from} to {path_to}.")
+        self.logger.info("Copying from %s to %s.", path_from, path_to)
 
         try:
             path = self.io.cp(path_from, path_to)
             return path
         except Exception as e:
             self.logger.error(
-                f"Unable to copy '{path_from}' to '{path_to}': {traceback.format_exc()}"
+                "Unable to copy '%s' to '%s': %s", path_from, path_to, traceback.format_exc()
+            )
+            raise e
+
+    def move_dir_contents(self, path_from: str, path_to: str) -> None:
+        """Move all files from source directory to destination directory.
+
+        Existing files in the destination directory are replaced atomically,
+        so readers never see partially written files.
+        """
+
+        self.logger.info("Moving contents of %s to %s.", path_from, path_to)
+
+        try:
+            self.create_dir(path_to)
+            for file in self.io.listdir(path_from):
+                self.io.move(str(Path(path_from) / file), str(Path(path_to) / file))
+        except Exception as e:
+            self.logger.error(
+                "Unable to move contents of '%s' to '%s': %s",
+                path_from,
+                path_to,
+                traceback.format_exc(),
             )
             raise e
 
-    async def store_upload_file(self, file: UploadFile, directory: str) -> tuple[str, str]:
-        """Store uploaded file in the provided directory."""
-        self.logger.info(f"Storing file {file.filename}.")
+    async def store_upload_file(
+        self, file: UploadFile, directory: str
+    ) -> tuple[str, str, bool]:
+        """Store uploaded file in the provided directory and add it to the file index.
+
+        Contents are stored once in the blob store shared by all users, files in the provided
+        directory are hard links to the blobs. Contents uploaded before are not written again.
+
+        Returns:
+            tuple[str, str, bool]: Path to the stored file, its hash and whether the file
+                was created (False if the same file was already stored in the directory).
+        """
+        self.logger.info("Storing file %s.", file.filename)
 
         try:
-            return await self.io.store_upload_file(file, directory)
+            blob_path, file_hash = await self.io.store_blob(file, self.get_blob_storage_path())
+            path = str(Path(directory) / f"{file_hash}_{file.filename}")
+            created = not self.io.path_exists(path)
+
+            try:
+                self.io.link(blob_path, path)
+            except FileNotFoundError:
+                # blob was released by a concurrent removal of its last file, store it again
+                await file.seek(0)
+                blob_path, _ = await self.io.store_blob(file, self.get_blob_storage_path())
+                self.io.link(blob_path, path)
+            index_path = str(Path(directory).parent / "index")
+
+            # the same file may have been uploaded before (and was just overwritten)
+            previous = self.io.readlink(str(Path(index_path) / file_hash))
+            if previous != str(Path("..") / "files" / Path(path).name):
+                self._record_usage(str(Path(directory).parent), files=self.io.file_size(path))
+
+            self._index_file(file_hash, Path(path).name, index_path)
+
+            if directory == self.get_file_storage_path():
+                # links share modification time of the blob, which may be old
+                self.record_guest_access("files", Path(path).name)
+
+            return path, file_hash, created
         except Exception as e:
-            self.logger.error(f"Error storing file {file.filename}: {traceback.format_exc()}")
+            self.logger.error("Error storing file %s: %s", file.filename, traceback.format_exc())
             raise e
 
     def remove_file(self, file_hash: str, user_id: str | None = None) -> None:
@@ -88,52 +159,144 @@ class IOService:
             e: Error removing file.
         """
 
-        self.logger.info(f"Removing file {file_hash}.")
+        self.logger.info("Removing file %s.", file_hash)
 
         try:
             path = self.get_filepath(file_hash, user_id)
             if path:
+                size = self.io.file_size(path)
                 self.io.rm(path)
+                self.record_usage(user_id, files=-size)
+                self._unindex_file(
+                    file_hash, Path(path).name, self.get_file_index_path(user_id)
+                )
+                self._release_blob(file_hash)
         except Exception as e:
-            self.logger.error(f"Error removing file {file_hash}: {traceback.format_exc()}")
+            self.logger.error("Error removing file %s: %s", file_hash, traceback.format_exc())
             raise e
 
-    def zip_charges(self, directory: str) -> str:
-        """Create archive from directory."""
+    def get_charges_archive(self, directory: str) -> tuple[str, list[tuple[str, str]]]:
+        """Get path to cached archive of output files in a directory and its entries.
 
-        self.logger.info(f"Creating archive from {directory}.")
+        Archives are cached in the '.archives' subdirectory under a name derived from
+        names, sizes and modification times of the archived files, so the cache is
+        invalidated whenever the output files change.
 
-        try:
-            archive_dir = Path(directory) / "archive"
-            self.io.mkdir(str(archive_dir))
+        Args:
+            directory (str): Directory with output files.
 
-            for extension in ["cif", "pqr", "txt", "mol2"]:
-                self.io.mkdir(str(archive_dir / extension))
+        Returns:
+            tuple[str, list[tuple[str, str]]]: Path to the (possibly not yet created) archive
+                and list of paths to files with their names in the archive.
+        """
 
-            for file in self.io.listdir(directory):
+        try:
+            entries = []
+            for file in sorted(self.io.listdir(directory)):
                 extension = file.rsplit(".", 1)[-1]
                 file_path = str(Path(directory) / file)
 
                 if extension in ["pqr", "txt", "mol2"]:
                     new_name = self.parse_filename(file)[-1]  # removing hash from filename
-                    self.io.cp(file_path, str(Path(archive_dir) / extension / new_name))
+                    entries.append((file_path, f"{extension}/{new_name}"))
                 elif extension == "cif":
-                    self.io.cp(file_path, str(Path(archive_dir) / extension))
+                    entries.append((file_path, f"cif/{file}"))
+
+            hasher = hashlib.sha256()
+            for file_path, name in entries:
+                size = self.io.file_size(file_path)
+                modified = self.io.last_modified(file_path).timestamp()
+                hasher.update(f"{name}\0{size}\0{modified}\n".encode())
+
+            archive_path = str(Path(directory) / ".archives" / f"{hasher.hexdigest()}.zip")
+
+            return archive_path, entries
+        except Exception as e:
+            self.logger.error("Error listing files of %s: %s", directory, traceback.format_exc())
+            raise e
+
+    def stream_charges_archive(
+        self, archive_path: str, entries: list[tuple[str, str]]
+    ) -> Iterator[bytes]:
+        """Stream archive with the provided entries and store it to cache once it is complete.
+
+        Args:
+            archive_path (str): Where to cache the archive.
+            entries (list[tuple[str, str]]): Paths to files and their names in the archive.
+
+        Returns:
+            Iterator[bytes]: Chunks of the archive.
+        """
+
+        self.logger.info("Creating archive %s.", archive_path)
+
+        cache_dir = str(Path(archive_path).parent)
+        self.create_dir(cache_dir)
 
-            return self.io.zip(str(archive_dir), str(archive_dir))
+        try:
+            yield from self.io.zip_stream(entries, archive_path)
         except Exception as e:
-            self.logger.error(f"Error creating archive from {directory}: {traceback.format_exc()}")
+            self.logger.error("Error creating archive %s: %s", archive_path, traceback.format_exc())
             raise e
 
+        # remove archives of previous versions of output files
+        for file in self.io.listdir(cache_dir):
+            file_path = str(Path(cache_dir) / file)
+            if file.endswith(".zip") and file_path != archive_path:
+                try:
+                    self.io.rm(file_path)
+                except Exception:
+                    self.logger.warn("Unable to remove outdated archive %s.", file_path)
+
     def listdir(self, directory: str) -> list[str]:
         """List directory contents."""
         return self.io.listdir(directory)
 
+    async def read_file(self, path: str) -> str:
+        """Read contents of a text file."""
+
+        return await self.io.read_file(path)
+
+    def read_lines(self, path: str) -> Iterator[bytes]:
+        """Lazily read lines of a file."""
+
+        return self.io.read_lines(path)
+
+    async def write_file(self, path: str, content: str) -> None:
+        """Write contents of a text file."""
+
+        await self.io.write_file(path, content)
+
+    def read_json(self, path: str) -> dict | None:
+        """Read json file written by 'update_json'."""
+
+        return self.io.read_json(path)
+
+    def update_json(self, path: str, update: Callable[[dict | None], dict]) -> dict:
+        """Atomically update json file (exclusively locked for all processes)."""
+
+        return self.io.update_json(path, update)
+
+    def last_modified(self, path: str) -> datetime.datetime:
+        """Get last modification time of a path."""
+
+        return self.io.last_modified(path)
+
     def path_exists(self, path: str) -> bool:
         """Check if path exists."""
 
         return self.io.path_exists(path)
 
+    def file_size(self, path: str) -> int:
+        """Get size of file in bytes."""
+
+        return self.io.file_size(path)
+
+    def dir_size(self, path: str) -> int:
+        """Get size of directory contents in bytes."""
+
+        return self.io.dir_size(path)
+
     def get_storage_path(self, user_id: str | None) -> str:
         """Get path to user storage."""
 
@@ -161,6 +324,47 @@ class IOService:
 
         return str(path)
 
+    def get_blob_storage_path(self) -> str:
+        """Get path to the content-addressed blob store shared by all users.
+
+        Blobs are stored as `<hash[:2]>/<hash>`. Files of users are hard links to the blobs,
+        so the link count of a blob is the number of its references plus one.
+        """
+
+        return str(self.workdir / "blobs")
+
+    def get_blob_pins_path(self, computation_id: str) -> str:
+        """Get path to pins of input files of a computation.
+
+        Pins are hard links (named by file hash) to input files of a computation, so that
+        contents of inputs stay stored (and output files can be generated) after the files
+        are removed by their owner. Pins are removed together with the computation.
+
+        Args:
+            computation_id (str): Id of computation.
+
+        Returns:
+            str: Path to the pins directory of the computation.
+        """
+
+        return str(Path(self.get_blob_storage_path()) / "pins" / computation_id)
+
+    def get_file_index_path(self, user_id: str | None = None) -> str:
+        """Get path to file index.
+
+        File index is a directory of symlinks named by file hash pointing to the stored files,
+        so that files can be looked up by hash without listing the whole file storage.
+
+        Args:
+            user_id (str | None, optional): Id of user. Defaults to None.
+
+        Returns:
+            str: Path to users file index if user_id is provided.
+                Path to guest file index if user_id is None.
+        """
+
+        return str(Path(self.get_storage_path(user_id)) / "index")
+
     def get_computations_path(self, user_id: str | None = None) -> str:
         """Get path to computations directory.
 
@@ -233,6 +437,72 @@ class IOService:
 
         return str(path)
 
+    def get_outputs_marker_path(self, computation_id: str, user_id: str | None = None) -> str:
+        """Get path to file marking that output files of a provided computation were generated.
+
+        Args:
+            computation_id (str): Id of the computation.
+            user_id (str | None, optional): Id of the user. Defaults to None.
+
+        Returns:
+            str: Path to the marker file.
+        """
+
+        return str(Path(self.get_computation_path(computation_id, user_id)) / "outputs.done")
+
+    def get_files_synced_marker_path(self, user_id: str) -> str:
+        """Get path to file marking that metadata of files of a user were synced to the database.
+
+        Args:
+            user_id (str): Id of the user.
+
+        Returns:
+            str: Path to the marker file.
+        """
+
+        return str(Path(self.get_storage_path(user_id)) / "files_synced.json")
+
+    def get_file_index_marker_path(self, user_id: str | None = None) -> str:
+        """Get path to file marking that all files of a user were indexed.
+
+        Args:
+            user_id (str | None, optional): Id of the user. Defaults to None.
+
+        Returns:
+            str: Path to the marker file.
+        """
+
+        return str(Path(self.get_storage_path(user_id)) / "files_indexed.json")
+
+    async def mark_outputs_generated(self, computation_id: str, user_id: str | None = None) -> None:
+        """Mark output files of a provided computation as generated."""
+
+        await self.io.write_file(self.get_outputs_marker_path(computation_id, user_id), "")
+
+    def outputs_generated(self, computation_id: str, user_id: str | None = None) -> bool:
+        """Check whether output files of a provided computation were generated."""
+
+        return self.io.path_exists(self.get_outputs_marker_path(computation_id, user_id))
+
+    def invalidate_outputs(self, computation_id: str, user_id: str | None = None) -> None:
+        """Remove generated output files of a provided computation (including cached archives),
+        so they are generated again from stored results on the next request.
+
+        Args:
+            computation_id (str): Id of the computation.
+            user_id (str | None, optional): Id of the user. Defaults to None.
+        """
+
+        marker_path = self.get_outputs_marker_path(computation_id, user_id)
+        if self.io.path_exists(marker_path):
+            self.io.rm(marker_path)
+
+        charges_path = self.get_charges_path(computation_id, user_id)
+        if self.io.path_exists(charges_path):
+            size = self.io.dir_size(charges_path)
+            self.io.rmdir(charges_path)
+            self.record_usage(user_id, computations=-size)
+
     def get_example_path(self, example_id: str) -> str:
         """Get path to example directory."""
         path = self.examples_dir / example_id
@@ -245,32 +515,29 @@ class IOService:
 
         inputs_path = self.get_inputs_path(computation_id, user_id)
         files_path = self.get_file_storage_path(user_id)
+        pins_path = self.get_blob_pins_path(computation_id)
         self.create_dir(inputs_path)
         self.create_dir(files_path)
+        self.create_dir(pins_path)
 
         for file_hash in file_hashes:
-            file_name = next(
-                (
-                    file
-                    for file in self.listdir(files_path)
-                    if self.parse_filename(file)[0] == file_hash
-                ),
-                None,
-            )
+            src_path = self.get_filepath(file_hash, user_id)
 
-            if not file_name:
+            if not src_path:
                 self.logger.warn(
-                    f"File with hash {file_hash} not found in {inputs_path}, skipping."
+                    "File with hash %s not found in %s, skipping.", file_hash, files_path
                 )
                 continue
 
-            src_path = str(Path(files_path) / file_name)
-            dst_path = str(Path(inputs_path) / file_name)
+            dst_path = str(Path(inputs_path) / Path(src_path).name)
+            pin_path = str(Path(pins_path) / file_hash)
             try:
-                self.io.symlink(src_path, dst_path)
+                # inputs point to pins, so they outlive removed files
+                self.io.link(src_path, pin_path)
+                self.io.symlink(pin_path, dst_path)
             except Exception as e:
                 self.logger.warn(
-                    f"Unable to create symlink from {src_path} to {dst_path}: {str(e)}"
+                    "Unable to create symlink from %s to %s: %s", src_path, dst_path, str(e)
                 )
 
     async def store_configs(
@@ -281,7 +548,7 @@ class IOService:
     ) -> None:
         """Store configs for computation to a json file."""
 
-        self.logger.info(f"Storing configs for computation. {computation_id}")
+        self.logger.info("Storing configs for computation. %s", computation_id)
 
         try:
             path = Path(self.get_computation_path(computation_id, user_id))
@@ -290,12 +557,16 @@ class IOService:
                 config_path, json.dumps([config.model_dump() for config in configs], indent=4)
             )
         except Exception as e:
-            self.logger.error(f"Unable to store configs: {traceback.format_exc()}")
+            self.logger.error("Unable to store configs: %s", traceback.format_exc())
             raise e
 
     def get_filepath(self, file_hash: str, user_id: str | None = None) -> str | None:
         """Get path to file with provided hash.
 
+        File is looked up in the file index. Files stored before the index existed
+        are indexed once per storage, afterwards a missing index entry means
+        that the file does not exist.
+
         Args:
             file_hash (str): File hash.
             user_id (str | None): User id.
@@ -304,16 +575,36 @@ class IOService:
             str: Path to file.
         """
 
+        if not self._is_hash_valid(file_hash):
+            return None
+
         try:
             path = Path(self.get_file_storage_path(user_id))
-            for file in self.listdir(str(path)):
-                curr_hash, _ = self.parse_filename(file)
-                if curr_hash == file_hash:
-                    return str(path / file)
+            index_path = Path(self.get_file_index_path(user_id))
 
-            return None
+            file_name = None
+
+            marker_path = self.get_file_index_marker_path(user_id)
+            if not self.io.path_exists(marker_path):
+                self._build_file_index(str(path), str(index_path))
+                self.io.update_json(
+                    marker_path,
+                    lambda _: {"indexed_at": datetime.datetime.now(datetime.timezone.utc).isoformat()},
+                )
+
+            link = self.io.readlink(str(index_path / file_hash))
+            if link is not None and self.io.path_exists(str(path / Path(link).name)):
+                file_name = Path(link).name
+
+            if file_name is None:
+                return None
+
+            if user_id is None:
+                self.record_guest_access("files", file_name)
+
+            return str(path / file_name)
         except Exception as e:
-            self.logger.error(f"Unable to get file path: {traceback.format_exc()}")
+            self.logger.error("Unable to get file path: %s", traceback.format_exc())
             raise e
 
     def get_last_modification(
@@ -333,7 +624,7 @@ class IOService:
             path = self.get_filepath(file_hash, user_id)
             return self.io.last_modified(path)
         except Exception as e:
-            self.logger.error(f"Unable to get last modification time: {traceback.format_exc()}")
+            self.logger.error("Unable to get last modification time: %s", traceback.format_exc())
             raise e
 
     def get_file_size(self, file_hash: str, user_id: str | None) -> int | None:
@@ -351,78 +642,86 @@ class IOService:
             path = self.get_filepath(file_hash, user_id)
             return self.io.file_size(path)
         except Exception as e:
-            self.logger.error(f"Unable to get file size: {traceback.format_exc()}")
+            self.logger.error("Unable to get file size: %s", traceback.format_exc())
             raise e
 
-    def free_guest_file_space(self, amount_to_free: int) -> None:
-        """Free guest file space.
+    def record_guest_access(self, kind: Literal["files", "computations"], name: str) -> None:
+        """Record access to a guest file or computation (used for LRU eviction).
+
+        Accesses are only kept in memory until collected by 'pop_guest_accesses'.
 
         Args:
-            amount_to_free (int): Amount to free in bytes.
+            kind (Literal["files", "computations"]): Kind of the accessed entry.
+            name (str): File name or computation id.
         """
 
-        path = self.get_file_storage_path()
+        self._guest_accesses[kind][name] = time.time()
 
-        self.logger.info(f"Freeing {amount_to_free} bytes of guest file space.")
+    def pop_guest_accesses(self) -> dict[str, dict[str, float]]:
+        """Returns accesses recorded since the last call.
 
-        available_to_free = self.io.dir_size(path)
-        has_to_free = self.guest_file_quota - available_to_free < amount_to_free
+        Returns:
+            dict[str, dict[str, float]]: Last access timestamps of entries of each kind.
+        """
 
-        if not has_to_free:
-            self.logger.info("Guest file space is sufficient. No need to free space.")
-            return
+        accesses, self._guest_accesses = self._guest_accesses, {"files": {}, "computations": {}}
+        return accesses
 
-        if available_to_free < amount_to_free:
-            # This case should not happen as max allowed file size is checked beforehand
-            self.logger.error(
-                f"Unable to free {amount_to_free} bytes of guest file space. "
-                + f"Only {available_to_free} bytes available."
-            )
-            raise ValueError("Not enough space to free.")
+    def remove_guest_file(self, file_name: str) -> int:
+        """Remove guest file with provided name.
 
-        files = sorted(self.listdir(path), key=lambda x: self.io.last_modified(str(Path(path) / x)))
+        Args:
+            file_name (str): Name of the file (including hash).
 
-        while amount_to_free > 0 and len(files) > 0:
-            file = files.pop(0)
-            file_path = str(Path(path) / file)
+        Raises:
+            e: Error removing file.
 
-            try:
-                amount_to_free -= self.io.file_size(file_path)
-                self.io.rm(file_path)
-            except Exception as e:
-                self.logger.error(f"Unable to delete file {file_path}: {traceback.format_exc()}")
-                raise e
+        Returns:
+            int: Number of freed bytes.
+        """
 
-    def free_guest_compute_space(self) -> None:
-        """Removes old computations to free guest compute space, if it exceeds the quota."""
+        file_path = str(Path(self.get_file_storage_path()) / file_name)
 
-        path = self.get_computations_path()
+        try:
+            size = self.io.file_size(file_path)
+            self.io.rm(file_path)
+            self.record_usage(None, files=-size)
+            file_hash = file_name.split("_", 1)[0]
+            self._unindex_file(file_hash, file_name, self.get_file_index_path())
+            self._release_blob(file_hash)
+
+            return size
+        except Exception as e:
+            self.logger.error("Unable to delete file %s: %s", file_path, traceback.format_exc())
+            raise e
 
-        available_to_free = self.io.dir_size(path)
-        amount_to_free = available_to_free - self.guest_compute_quota
+    def remove_guest_computation(self, computation_id: str) -> int:
+        """Remove guest computation with provided id.
 
-        if amount_to_free <= 0:
-            self.logger.info("Guest compute space is sufficient. No need to free space.")
-            return
+        Args:
+            computation_id (str): Computation id.
 
-        self.logger.info(f"Freeing {amount_to_free} bytes of guest compute space.")
+        Raises:
+            e: Error removing computation.
 
-        computations = sorted(
-            self.listdir(path), key=lambda x: self.io.last_modified(str(Path(path) / x))
-        )
+        Returns:
+            int: Number of freed bytes.
+        """
 
-        while amount_to_free > 0 and len(computations) > 0:
-            computation = computations.pop(0)
-            computation_path = str(Path(path) / computation)
+        computation_path = self.get_computation_path(computation_id)
 
-            try:
-                amount_to_free -= self.io.dir_size(computation_path)
-                self.io.rmdir(computation_path)
-            except Exception as e:
-                self.logger.error(
-                    f"Unable to delete computation {computation_path}: {traceback.format_exc()}"
-                )
-                raise e
+        try:
+            size = self.io.dir_size(computation_path)
+            self.io.rmdir(computation_path)
+            self.record_usage(None, computations=-size)
+            self._unpin_inputs(computation_id)
+
+            return size
+        except Exception as e:
+            self.logger.error(
+                "Unable to delete computation %s: %s", computation_path, traceback.format_exc()
+            )
+            raise e
 
     def delete_computation(self, computation_id: str, user_id: str) -> None:
         """Delete the provided computation from the filesystem.
@@ -435,9 +734,15 @@ class IOService:
             e: Error deleting computation.
         """
         try:
-            self.io.rmdir(self.get_computation_path(computation_id, user_id))
+            path = self.get_computation_path(computation_id, user_id)
+            size = self.io.dir_size(path)
+            self.io.rmdir(path)
+            self.record_usage(user_id, computations=-size)
+            self._unpin_inputs(computation_id)
         except Exception as e:
-            self.logger(f"Error deleting computation {computation_id}: {traceback.format_exc()}")
+            self.logger.error(
+                "Error deleting computation %s: %s", computation_id, traceback.format_exc()
+            )
             raise e
 
     def parse_filename(self, filename: str) -> Tuple[str, str]:
@@ -457,7 +762,7 @@ class IOService:
         parts = filename.split("_", 1)
 
         if (len(parts) != 2) or (len(parts[0]) != sha256_hash_length):
-            self.logger.error(f"Invalid filename format (<file_hash>_<file_name>): {filename}")
+            self.logger.error("Invalid filename format (<file_hash>_<file_name>): %s", filename)
             raise ValueError("Invalid filename format.")
 
         file_hash, file_name = parts
@@ -474,14 +779,88 @@ class IOService:
             Tuple[int, int, int]: Tuple with used space, available space and quota.
         """
 
-        storage_dir = Path(self.get_storage_path(user_id))
         quota = self.user_quota if user_id else self.guest_file_quota + self.guest_compute_quota
 
-        used_space = self.io.dir_size(storage_dir)
+        usage = self.get_usage(user_id)
+        used_space = usage["files"] + usage["computations"]
         available_space = quota - used_space
 
         return used_space, available_space, quota
 
+    def get_usage(self, user_id: str | None = None) -> dict[str, int]:
+        """Get storage space used by files and computations of a user (or guests).
+
+        Usage is read from a ledger which is updated whenever files or computations
+        are stored or removed, and periodically reconciled with the file system.
+
+        Args:
+            user_id (str | None, optional): User id. Defaults to None.
+
+        Returns:
+            dict[str, int]: Used space in bytes under the "files" and "computations" keys.
+        """
+
+        storage_path = self.get_storage_path(user_id)
+        usage_path = self._get_usage_path(storage_path)
+
+        usage = self.io.read_json(usage_path)
+        if usage is None:
+            # ledger does not exist yet, initialize it from the file system
+            usage = self.io.update_json(
+                usage_path, lambda current: current or self._scan_usage(storage_path)
+            )
+
+        return usage
+
+    def record_usage(
+        self, user_id: str | None = None, files: int = 0, computations: int = 0
+    ) -> None:
+        """Add change of used storage space of a user (or guests) to the ledger.
+
+        Args:
+            user_id (str | None, optional): User id. Defaults to None.
+            files (int, optional): Change of space used by files in bytes. Defaults to 0.
+            computations (int, optional): Change of space used by computations in bytes.
+                Defaults to 0.
+        """
+
+        self._record_usage(self.get_storage_path(user_id), files, computations)
+
+    def reconcile_usage(self, max_age: float = 0) -> None:
+        """Recompute ledgers of all users (and guests) from the file system.
+
+        Args:
+            max_age (float, optional): Ledgers reconciled less than 'max_age' seconds ago
+                (e.g. by another worker) are skipped. Defaults to 0.
+        """
+
+        user_ids = self.io.listdir(str(self.workdir / "user"))
+        storage_paths = [self.get_storage_path(None)] + [
+            self.get_storage_path(user_id) for user_id in user_ids
+        ]
+
+        for storage_path in storage_paths:
+            now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+
+            def reconcile(current: dict | None) -> dict:
+                if current is not None and current.get("reconciled_at", 0) > now - max_age:
+                    return current
+
+                usage = self._scan_usage(storage_path)
+                if current is not None and current != {**current, **usage}:
+                    self.logger.info("Reconciled storage usage of %s: %s.", storage_path, usage)
+
+                return {**usage, "reconciled_at": now}
+
+            try:
+                self.io.update_json(self._get_usage_path(storage_path), reconcile)
+            except Exception:
+                self.logger.error(
+                    "Unable to reconcile storage usage of %s: %s",
+                    storage_path,
+                    traceback.format_exc(),
+                )
+
     def ensure_upload_files_provided(self, files: list[UploadFile]) -> None:
         if len(files) == 0:
             raise BadRequestError(
@@ -525,10 +904,99 @@ class IOService:
                     detail="Unable to upload files. Quota exceeded. "
                     + f"Maximum storage space is {quota_mb} MB.",
                 )
-        else:
-            _, available, _ = self.get_quota()
-            if upload_size_b > available:
-                self.free_guest_file_space(upload_size_b)
+        # guest space is freed in the background (see 'GuestEvictionService')
+
+    def _index_file(self, file_hash: str, file_name: str, index_path: str) -> None:
+        self.create_dir(index_path)
+        # relative link, so that the index stays valid if the data directory is moved
+        self.io.replace_symlink(
+            str(Path("..") / "files" / file_name), str(Path(index_path) / file_hash)
+        )
+
+    def _build_file_index(self, files_path: str, index_path: str) -> None:
+        if not self.io.path_exists(files_path):
+            return
+
+        for file in self.listdir(files_path):
+            try:
+                file_hash, _ = self.parse_filename(file)
+            except ValueError:
+                continue
+
+            self._index_file(file_hash, file, index_path)
+
+    def _unindex_file(self, file_hash: str, file_name: str, index_path: str) -> None:
+        link_path = str(Path(index_path) / file_hash)
+        link = self.io.readlink(link_path)
+
+        # index may already point to a newer upload of the same file
+        if link is not None and Path(link).name == file_name:
+            self.io.rm(link_path)
+
+    def _get_usage_path(self, storage_path: str) -> str:
+        return str(Path(storage_path) / "usage.json")
+
+    def _scan_usage(self, storage_path: str) -> dict[str, int]:
+        return {
+            "files": self.io.dir_size(str(Path(storage_path) / "files")),
+            "computations": self.io.dir_size(str(Path(storage_path) / "computations")),
+        }
+
+    def _record_usage(self, storage_path: str, files: int = 0, computations: int = 0) -> None:
+        def update(current: dict | None) -> dict:
+            if current is None:
+                # scanned usage already contains the change
+                return self._scan_usage(storage_path)
+
+            return {
+                **current,
+                "files": max(0, current["files"] + files),
+                "computations": max(0, current["computations"] + computations),
+            }
+
+        try:
+            self.io.update_json(self._get_usage_path(storage_path), update)
+        except Exception:
+            # ledger is fixed by the next reconciliation
+            self.logger.warn(
+                "Unable to record storage usage of %s: %s", storage_path, traceback.format_exc()
+            )
+
+    def _release_blob(self, file_hash: str) -> None:
+        # blob is removed once no stored file links to it
+        blob_path = str(Path(self.get_blob_storage_path()) / file_hash[:2] / file_hash)
+
+        try:
+            if self.io.link_count(blob_path) == 1:
+                self.io.rm(blob_path)
+        except Exception:
+            self.logger.warn("Unable to release blob %s: %s", file_hash, traceback.format_exc())
+
+    def _unpin_inputs(self, computation_id: str) -> None:
+        # removes pins of a deleted computation and blobs no longer linked
+        pins_path = self.get_blob_pins_path(computation_id)
+
+        try:
+            if not self.io.path_exists(pins_path):
+                return
+
+            file_hashes = self.io.listdir(pins_path)
+            self.io.rmdir(pins_path)
+
+            for file_hash in file_hashes:
+                self._release_blob(file_hash)
+        except Exception:
+            self.logger.warn(
+                "Unable to unpin inputs of computation %s: %s",
+                computation_id,
+                traceback.format_exc(),
+            )
+
+    def _is_hash_valid(self, file_hash: str) -> bool:
+        sha256_hash_length = 64
+        return len(file_hash) == sha256_hash_length and all(
+            c in "0123456789abcdef" for c in file_hash
+        )
 
     def _is_ext_valid(self, filename: str) -> bool:
         return any(filename.endswith(f".{ext}") for ext in ALLOWED_FILE_TYPES)
@@ -7,28 +7,34 @@ class LoggerBase(ABC):
     """Service for logging"""
 
     @abstractmethod
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args: object) -> None:
         """Logs the provided message with 'info' level.
 
         Args:
             message (str): Text to be logged.
+            *args (object): Arguments merged into the message using '%' formatting,
+                only when the message is logged.
         """
         raise NotImplementedError()
 
     @abstractmethod
-    def warn(self, message: str) -> None:
+    def warn(self, message: str, *args: object) -> None:
         """Logs the provided message with 'warning' level.
 
         Args:
             message (str): Text to be logged.
+            *args (object): Arguments merged into the message using '%' formatting,
+                only when the message is logged.
         """
         raise NotImplementedError()
 
     @abstractmethod
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args: object) -> None:
         """Logs the provided message with 'info' level.
 
         Args:
-            message (str): Text to be logged._
+            message (str): Text to be logged.
+            *args (object): Arguments merged into the message using '%' formatting,
+                only when the message is logged.
         """
         raise NotImplementedError()
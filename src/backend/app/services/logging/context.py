@@ -0,0 +1,7 @@
+"""Context of the currently handled request, attached to logged records."""
+
+from contextvars import ContextVar
+
+# id of the currently handled request (set by the logging middleware),
+# propagated to tasks and threads started by asyncio
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
@@ -30,11 +30,11 @@ class FileLogger(LoggerBase):
 
         self.logger = logging.getLogger(__name__)
 
-    def info(self, message: str) -> None:
-        return self.logger.info(message)
+    def info(self, message: str, *args: object) -> None:
+        return self.logger.info(message, *args)
 
-    def warn(self, message: str) -> None:
-        return self.logger.warning(message)
+    def warn(self, message: str, *args: object) -> None:
+        return self.logger.warning(message, *args)
 
-    def error(self, message: str) -> None:
-        return self.logger.error(message)
+    def error(self, message: str, *args: object) -> None:
+        return self.logger.error(message, *args)
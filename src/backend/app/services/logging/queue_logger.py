@@ -0,0 +1,166 @@
+"""Service for structured logging to file through a background writer thread."""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
+
+from dotenv import load_dotenv
+from services.logging.base import LoggerBase
+from services.logging.context import request_id
+
+load_dotenv()
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    """Parse sample rates of log levels.
+
+    Args:
+        value (str): Comma separated pairs of level and rate, e.g. 'INFO=0.1,WARNING=0.5'.
+
+    Raises:
+        ValueError: If a pair is malformed or a rate is not between 0 and 1.
+
+    Returns:
+        dict[str, float]: Fraction of logged records for each level.
+    """
+
+    rates = {}
+
+    for pair in filter(None, (pair.strip() for pair in value.split(","))):
+        level, _, rate = pair.partition("=")
+        level = level.strip().upper()
+        rates[level] = float(rate)
+
+        if not 0 <= rates[level] <= 1:
+            raise ValueError(f"Sample rate of level '{level}' has to be between 0 and 1.")
+
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+
+        return json.dumps(entry, default=str)
+
+
+class BatchFileHandler(logging.FileHandler):
+    """File handler writing records in batches.
+
+    Records are collected until the queue of pending records is drained (or the batch is full)
+    and then written at once, so lines of processes appending to the same file do not interleave.
+    """
+
+    def __init__(self, filename: str, pending: queue.SimpleQueue, batch_size: int = 100):
+        super().__init__(filename, mode="a", encoding="utf-8")
+        self.pending = pending
+        self.batch_size = batch_size
+        self.batch: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.batch.append(self.format(record) + self.terminator)
+
+            if len(self.batch) >= self.batch_size or self.pending.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self.batch and self.stream:
+                self.stream.write("".join(self.batch))
+                self.batch.clear()
+
+            super().flush()
+        finally:
+            self.release()
+
+
+class QueueLogger(LoggerBase):
+    """Service for structured logging to file.
+
+    Records are only put into a queue by the calling thread. Writing them to the file
+    (as JSON lines with ids of requests) is done by a background thread, so logging
+    does not block the event loop. Messages of disabled or sampled out records are not formatted.
+    """
+
+    logdir = os.environ.get("ACC2_LOG_DIR")
+
+    def __init__(
+        self,
+        file_name: str = "logs.jsonl",
+        level: str = "INFO",
+        sample_rates: dict[str, float] | None = None,
+        sample: Callable[[], float] = random.random,
+    ) -> None:
+        super().__init__()
+
+        if not os.path.isdir(self.logdir):
+            os.makedirs(self.logdir)
+
+        self.sample_rates = {
+            logging.getLevelName(name.upper()): rate for name, rate in (sample_rates or {}).items()
+        }
+        self.sample = sample
+        self.closed = False
+
+        self.queue = queue.SimpleQueue()
+        self.handler = BatchFileHandler(os.path.join(self.logdir, file_name), self.queue)
+        self.handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, self.handler)
+
+        self.logger = logging.getLogger(f"{__name__}.{file_name}")
+        self.logger.setLevel(level.upper())
+        self.logger.propagate = False
+        self.logger.handlers.clear()
+        self.logger.addHandler(QueueHandler(self.queue))
+
+        self.listener.start()
+        atexit.register(self.close)
+
+    def info(self, message: str, *args: object) -> None:
+        self._log(logging.INFO, message, args)
+
+    def warn(self, message: str, *args: object) -> None:
+        self._log(logging.WARNING, message, args)
+
+    def error(self, message: str, *args: object) -> None:
+        self._log(logging.ERROR, message, args)
+
+    def close(self) -> None:
+        """Write pending records and stop the writer thread."""
+
+        if self.closed:
+            return
+
+        self.closed = True
+        self.listener.stop()
+        self.handler.close()
+
+    def _log(self, level: int, message: str, args: tuple[object, ...]) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+
+        rate = self.sample_rates.get(level, 1.0)
+        if rate < 1.0 and self.sample() >= rate:
+            return
+
+        self.logger.log(level, message, *args, extra={"request_id": request_id.get()})
@@ -0,0 +1,68 @@
+"""Catalogue of methods and parameters available in ChargeFW2."""
+
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+from models.method import Method
+from models.parameters import Parameters
+
+from integrations.chargefw2.base import ChargeFW2Base
+
+
+class MethodRegistry:
+    """Immutable catalogue of available methods and their parameters.
+
+    Available methods and parameters do not change while the application is running,
+    so they are loaded from ChargeFW2 once (at startup) and shared by all requests.
+    Lookups by internal name are dictionary lookups.
+    """
+
+    def __init__(self, methods: Iterable[Method], parameters: Mapping[str, Iterable[Parameters]]):
+        self._methods = MappingProxyType({method.internal_name: method for method in methods})
+        self._parameters = MappingProxyType(
+            {
+                method: MappingProxyType({p.internal_name: p for p in parameters.get(method, [])})
+                for method in self._methods
+            }
+        )
+
+    @classmethod
+    def from_chargefw2(cls, chargefw2: ChargeFW2Base) -> "MethodRegistry":
+        """Load available methods and parameters from ChargeFW2.
+
+        Args:
+            chargefw2 (ChargeFW2Base): ChargeFW2 integration.
+
+        Returns:
+            MethodRegistry: Catalogue of available methods and parameters.
+        """
+
+        methods = chargefw2.get_available_methods()
+        parameters = {
+            method.internal_name: chargefw2.get_available_parameters(method.internal_name)
+            for method in methods
+            if method.has_parameters
+        }
+
+        return cls(methods, parameters)
+
+    @property
+    def methods(self) -> list[Method]:
+        """Available methods in order of ChargeFW2."""
+
+        return list(self._methods.values())
+
+    def has_method(self, method: str) -> bool:
+        """Check whether a method with the provided internal name is available."""
+
+        return method in self._methods
+
+    def get_parameters(self, method: str) -> list[Parameters]:
+        """Get parameters available for the provided method (empty if the method is unknown)."""
+
+        return list(self._parameters.get(method, {}).values())
+
+    def find_parameters(self, method: str, parameters: str) -> Parameters | None:
+        """Find parameters of the provided method by their internal name."""
+
+        return self._parameters.get(method, {}).get(parameters)
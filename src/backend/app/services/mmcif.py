@@ -1,5 +1,10 @@
+import asyncio
+import itertools
 import os
 import pathlib
+import re
+
+from concurrent.futures import ThreadPoolExecutor
 
 from gemmi import cif
 
@@ -10,21 +15,42 @@ from services.io import IOService
 from services.logging.base import LoggerBase
 
 
+CHARGES_META_PREFIX = "_sb_ncbr_partial_atomic_charges_meta."
+CHARGES_PREFIX = "_sb_ncbr_partial_atomic_charges."
+CHARGES_META_ATTRIBUTES = ["id", "type", "method"]
+CHARGES_ATTRIBUTES = ["type_id", "atom_id", "charge"]
+
+# start of charge categories in files written by ChargeFW2 (always at the end of the file)
+_CHARGES_START = re.compile(r"^(?:loop_\s*\n)?_sb_ncbr_partial_atomic_charges", re.MULTILINE)
+# anything that is not a charge category (other tags, blocks or frames)
+_NOT_CHARGES = re.compile(
+    r"^(?:_(?!sb_ncbr_partial_atomic_charges)|data_|save_|global_)", re.MULTILINE
+)
+
+
 class MmCIFService:
     """Service for handling mmCIF file operations."""
 
-    def __init__(self, logger: LoggerBase, io: IOService):
+    def __init__(self, logger: LoggerBase, io: IOService, max_workers: int = 4):
         self.logger = logger
         self.io = io
-
-    def write_to_mmcif(
-        self, user_id: str | None, computation_id: str, calculations: list[CalculationResultDto]
+        self.executor = ThreadPoolExecutor(max_workers)
+
+    async def write_to_mmcif(
+        self,
+        user_id: str | None,
+        computation_id: str,
+        calculations: list[CalculationResultDto],
+        path: str | None = None,
     ) -> dict:
         """Write charges to mmcif files with names corresponding to the input molecules.
 
         Args:
-            data (dict): Data to write
+            user_id (str | None): User id owning the computation.
+            computation_id (str): Computation id.
             calculations (list[ChargeCalculationResult]): List of calculations to write.
+            path (str | None, optional): Directory with mmcif files.
+                Defaults to charges directory of the computation.
 
         Returns:
             dict: Dictionary with "molecules" and "configs" keys.
@@ -34,8 +60,22 @@ class MmCIFService:
 
         configs = data["configs"]
         molecules = list(data["molecules"])
-        for molecule in molecules:
-            self._write_molecule_to_mmcif(user_id, computation_id, molecule, data)
+        charges_path = path or self.io.get_charges_path(computation_id, user_id)
+        metadata = self._format_metadata(configs)
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self.executor,
+                    self._write_molecule_to_mmcif,
+                    os.path.join(charges_path, f"{molecule.lower()}{CHARGES_OUTPUT_EXTENSION}"),
+                    metadata,
+                    data["molecules"][molecule]["charges"],
+                )
+                for molecule in molecules
+            ]
+        )
 
         return {"molecules": molecules, "configs": configs}
 
@@ -96,43 +136,73 @@ class MmCIFService:
         return transformed
 
     def _write_molecule_to_mmcif(
-        self, user_id: str | None, computation_id: str, molecule: str, data: dict
-    ) -> str:
-        configs = data["configs"]
-        charges = data["molecules"][molecule]["charges"]
+        self, output_file_path: str, metadata: str, charges: list[list[float]]
+    ) -> None:
+        with open(output_file_path, "r", encoding="utf-8") as file:
+            content = file.read()
+
+        content = self._strip_charges(content)
+        if content is None:
+            # charges are not at the end of the file, fall back to parsing it
+            document = cif.read_file(output_file_path)
+            block = document.sole_block()
+            block.find_mmcif_category(CHARGES_META_PREFIX).erase()
+            block.find_mmcif_category(CHARGES_PREFIX).erase()
+            content = document.as_string()
+
+        with open(output_file_path, "w", encoding="utf-8") as file:
+            file.write(content.rstrip("\n"))
+            file.write("\n\n")
+            file.write(metadata)
+            file.write("\n")
+            file.write(self._format_charges(charges))
+
+    def _strip_charges(self, content: str) -> str | None:
+        """Removes charge categories from the end of a file written by ChargeFW2.
 
-        charges_path = self.io.get_charges_path(computation_id, user_id)
-        output_file_path = os.path.join(charges_path, f"{molecule.lower()}.fw2.cif")
+        Args:
+            content (str): Content of the mmCIF file.
 
-        document = cif.read_file(output_file_path)
-        block = document.sole_block()
+        Returns:
+            str | None: Content without charge categories or None if there are other
+                categories after the charges (the file has to be parsed).
+        """
 
-        sb_ncbr_partial_atomic_charges_meta_prefix = "_sb_ncbr_partial_atomic_charges_meta."
-        sb_ncbr_partial_atomic_charges_prefix = "_sb_ncbr_partial_atomic_charges."
-        sb_ncbr_partial_atomic_charges_meta_attributes = ["id", "type", "method"]
-        sb_ncbr_partial_atomic_charges_attributes = ["type_id", "atom_id", "charge"]
+        match = _CHARGES_START.search(content)
 
-        block.find_mmcif_category(sb_ncbr_partial_atomic_charges_meta_prefix).erase()
-        block.find_mmcif_category(sb_ncbr_partial_atomic_charges_prefix).erase()
+        if match is None:
+            return content
 
-        metadata_loop = block.init_loop(
-            sb_ncbr_partial_atomic_charges_meta_prefix,
-            sb_ncbr_partial_atomic_charges_meta_attributes,
-        )
+        if _NOT_CHARGES.search(content, match.end()) is not None:
+            return None
 
-        for type_id, config in enumerate(configs):
-            method_name = config["method"]
-            parameters_name = config["parameters"]
-            metadata_loop.add_row(
-                [f"{type_id + 1}", "'empirical'", f"'{method_name}/{parameters_name}'"]
-            )
+        return content[: match.start()]
 
-        charges_loop = block.init_loop(
-            sb_ncbr_partial_atomic_charges_prefix, sb_ncbr_partial_atomic_charges_attributes
+    def _format_metadata(self, configs: list[dict]) -> str:
+        header = "".join(
+            f"{CHARGES_META_PREFIX}{attribute}\n" for attribute in CHARGES_META_ATTRIBUTES
+        )
+        rows = "".join(
+            f"{type_id + 1} 'empirical' '{config['method']}/{config['parameters']}'\n"
+            for type_id, config in enumerate(configs)
         )
 
-        for type_id, charges in enumerate(charges):
-            for atom_id, charge in enumerate(charges):
-                charges_loop.add_row([f"{type_id + 1}", f"{atom_id + 1}", f"{charge: .4f}"])
+        return f"loop_\n{header}{rows}"
+
+    def _format_charges(self, charges: list[list[float]]) -> str:
+        header = "".join(f"{CHARGES_PREFIX}{attribute}\n" for attribute in CHARGES_ATTRIBUTES)
+        parts = ["loop_\n", header]
+
+        # format all rows of a config at once instead of formatting each atom separately
+        for type_id, config_charges in enumerate(charges, start=1):
+            row_format = f"{type_id} %d % .4f\n"
+            parts.append(
+                (row_format * len(config_charges))
+                % tuple(
+                    itertools.chain.from_iterable(
+                        zip(range(1, len(config_charges) + 1), config_charges)
+                    )
+                )
+            )
 
-        block.write_file(output_file_path)
+        return "".join(parts)
@@ -0,0 +1,239 @@
+"""Splitting of multi-molecule files into records of individual molecules."""
+
+import asyncio
+import hashlib
+import re
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+
+# SDF records end with a line containing only '$$$$'
+_SDF_DELIMITER = re.compile(r"^\$\$\$\$[ \t]*$", re.M)
+
+# MOL2 records start with a '@<TRIPOS>MOLECULE' line
+_MOL2_MOLECULE = re.compile(r"^@<TRIPOS>MOLECULE[ \t]*$", re.M)
+
+# mmCIF data blocks start with a 'data_<name>' line
+_CIF_BLOCK = re.compile(r"^data_(\S*)[ \t]*$", re.M)
+
+
+@dataclass(frozen=True)
+class MoleculeRecord:
+    """Record of a single molecule in a multi-molecule file.
+
+    Attributes:
+        name (str): Title of the molecule (as read by ChargeFW2).
+        fingerprint (str): SHA-256 of the normalized record. Records with the same
+            fingerprint describe the same molecule with the same atom order,
+            so their charges are interchangeable.
+        content (str): Original text of the record.
+    """
+
+    name: str
+    fingerprint: str
+    content: str
+
+
+def split_molecules(content: str, extension: str) -> list[MoleculeRecord] | None:
+    """Split contents of a multi-molecule file (SDF, MOL2, mmCIF) into records of molecules.
+
+    Args:
+        content (str): Contents of the file.
+        extension (str): Extension of the file (without dot).
+
+    Returns:
+        list[MoleculeRecord] | None: Records in order of the file or None if the file
+            can not be split (other format, single mmCIF block, malformed file,
+            missing or duplicate titles).
+    """
+
+    content = content.replace("\r", "")
+
+    match extension.lower():
+        case "sdf":
+            records = _split_sdf(content)
+        case "mol2":
+            records = _split_mol2(content)
+        case "cif" | "mmcif":
+            records = _split_cif(content)
+        case _:
+            return None
+
+    if not records:
+        return None
+
+    # charges are returned by molecule names, which have to identify the records
+    names = [record.name for record in records]
+    if "" in names or len(set(names)) != len(names):
+        return None
+
+    return records
+
+
+def has_multiple_blocks(lines: Iterable[bytes]) -> bool:
+    """Check whether an mmCIF file contains more than one data block, so it may be split.
+
+    Lines are consumed only until the second block is found.
+
+    Args:
+        lines (Iterable[bytes]): Lines of the file.
+
+    Returns:
+        bool: True if the file contains at least two data blocks.
+    """
+
+    blocks = 0
+
+    for line in lines:
+        if line.startswith(b"data_"):
+            blocks += 1
+
+            if blocks > 1:
+                return True
+
+    return False
+
+
+class SharedRecords:
+    """Records of files shared by all configs of a calculation.
+
+    Each file is split only once. Records of a file are released once they were
+    taken by all of its expected uses, so they are not kept for the whole calculation.
+    """
+
+    def __init__(
+        self,
+        split: Callable[[str], Awaitable[list[MoleculeRecord] | None]],
+        uses: Counter[str],
+    ):
+        """
+        Args:
+            split (Callable[[str], Awaitable[list[MoleculeRecord] | None]]): Splits file
+                with the provided path into records.
+            uses (Counter[str]): Number of times records of each file (by hash) are taken.
+        """
+
+        self.split = split
+        self.uses = uses
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def get(self, file_hash: str, file_path: str) -> list[MoleculeRecord] | None:
+        """Get records of a file, splitting it on first use.
+
+        Args:
+            file_hash (str): Hash of the file.
+            file_path (str): Path to the file.
+
+        Returns:
+            list[MoleculeRecord] | None: Records of the file or None if it can not be split.
+        """
+
+        if (task := self._tasks.get(file_hash)) is None:
+            task = self._tasks[file_hash] = asyncio.ensure_future(self.split(file_path))
+
+        self.uses[file_hash] -= 1
+        if self.uses[file_hash] <= 0:
+            self._tasks.pop(file_hash)
+
+        # other uses still wait for the records if this one is cancelled
+        return await asyncio.shield(task)
+
+
+def join_molecules(records: list[MoleculeRecord]) -> str:
+    """Join records back into contents of a file.
+
+    Args:
+        records (list[MoleculeRecord]): Records to join.
+
+    Returns:
+        str: Contents of a file with the provided records.
+    """
+
+    return "".join(record.content for record in records)
+
+
+def _split_sdf(content: str) -> list[MoleculeRecord] | None:
+    parts = _SDF_DELIMITER.split(content)
+    records = []
+
+    for i, part in enumerate(parts[:-1]):
+        if i > 0:
+            # newline terminating the previous delimiter
+            part = part.removeprefix("\n")
+
+        lines = part.split("\n")
+
+        if len(lines) < 4:
+            return None
+
+        # only the connection table (not data items) affects charges, the second line
+        # of the header holds program name and timestamp which differ between exports
+        end = next((n for n, line in enumerate(lines) if line.startswith("M  END")), None)
+        if end is None:
+            return None
+
+        structure = [lines[0], *lines[2 : end + 1]]
+        records.append(_record(lines[0].strip(), structure, part + "$$$$\n"))
+
+    if parts[-1].strip() != "":
+        # last record without the delimiter
+        return None
+
+    return records
+
+
+def _split_mol2(content: str) -> list[MoleculeRecord] | None:
+    starts = [match.start() for match in _MOL2_MOLECULE.finditer(content)]
+
+    if not starts or content[: starts[0]].strip() != "":
+        return None
+
+    records = []
+    for start, end in zip(starts, [*starts[1:], len(content)]):
+        part = content[start:end]
+        lines = part.split("\n")
+
+        if len(lines) < 2:
+            return None
+
+        records.append(_record(lines[1].strip(), lines, part))
+
+    return records
+
+
+def _split_cif(content: str) -> list[MoleculeRecord] | None:
+    matches = list(_CIF_BLOCK.finditer(content))
+
+    # single structures are not split
+    if len(matches) < 2:
+        return None
+
+    # comments may precede the first block
+    if any(
+        line.strip() != "" and not line.startswith("#")
+        for line in content[: matches[0].start()].split("\n")
+    ):
+        return None
+
+    records = []
+    ends = [match.start() for match in matches[1:]] + [len(content)]
+    for match, end in zip(matches, ends):
+        part = content[match.start() : end]
+        records.append(_record(match.group(1), part.split("\n"), part))
+
+    records[0] = MoleculeRecord(
+        name=records[0].name,
+        fingerprint=records[0].fingerprint,
+        content=content[: matches[0].start()] + records[0].content,
+    )
+
+    return records
+
+
+def _record(name: str, lines: list[str], content: str) -> MoleculeRecord:
+    normalized = "\n".join(line.rstrip() for line in lines if line.strip() != "")
+    fingerprint = hashlib.sha256(normalized.encode()).hexdigest()
+
+    return MoleculeRecord(name=name, fingerprint=fingerprint, content=content)
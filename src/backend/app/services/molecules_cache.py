@@ -0,0 +1,118 @@
+"""Cache of parsed molecules shared by calculations."""
+
+import asyncio
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from cachetools import LRUCache
+from chargefw2 import Molecules
+
+# (file_hash, read_hetatm, ignore_water, permissive_types)
+MoleculesKey = tuple[str, bool, bool, bool]
+
+# Parsed molecules take up more memory than the file they were loaded from.
+# Size of cached entries is estimated as file size multiplied by this factor.
+MOLECULES_SIZE_FACTOR = 4
+
+
+@dataclass
+class CachedMolecules:
+    """Parsed molecules together with their estimated size.
+
+    ChargeFW2 modifies molecules during calculation (e.g. assigns atom types),
+    so the lock has to be held while the molecules are being used. The modified state
+    does not affect results of later calculations with other methods or parameters
+    (see tests/integrations/test_chargefw2_local.py), so molecules are shared by all configs.
+    """
+
+    molecules: Molecules
+    size: int
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class MoleculesCache:
+    """LRU cache of parsed molecules bounded by their estimated size in bytes.
+
+    Concurrent requests for the same key are merged, so a file is parsed only once
+    even if multiple calculations request it at the same time.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: LRUCache[MoleculesKey, CachedMolecules] = LRUCache(
+            maxsize=max(max_size, 1), getsizeof=lambda entry: entry.size
+        )
+        self._pending: dict[MoleculesKey, asyncio.Future[CachedMolecules]] = {}
+
+    async def get(
+        self,
+        key: MoleculesKey,
+        file_size: int,
+        load: Callable[[], Awaitable[Molecules]],
+    ) -> CachedMolecules:
+        """Returns cached molecules or loads them using the provided function.
+
+        Args:
+            key (MoleculesKey): File hash and settings used for parsing.
+            file_size (int): Size of the parsed file in bytes.
+            load (Callable[[], Awaitable[Molecules]]): Function loading the molecules.
+
+        Returns:
+            CachedMolecules: Parsed molecules.
+        """
+
+        if (cached := self._cache.get(key)) is not None:
+            self.hits += 1
+            return cached
+
+        if (pending := self._pending.get(key)) is not None:
+            self.hits += 1
+
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+                # only the request loading the molecules was cancelled, load them again
+                return await self.get(key, file_size, load)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+
+        try:
+            entry = CachedMolecules(
+                molecules=await load(), size=file_size * MOLECULES_SIZE_FACTOR
+            )
+            future.set_result(entry)
+        except Exception as e:
+            future.set_exception(e)
+            # exception is re-raised below, avoid 'exception was never retrieved' warning
+            future.exception()
+            raise e
+        finally:
+            # loading was cancelled, waiters must not wait forever
+            if not future.done():
+                future.cancel()
+
+            del self._pending[key]
+
+        if 0 < entry.size <= self.max_size:
+            self._cache[key] = entry
+
+        return entry
+
+    def stats(self) -> dict[str, int]:
+        """Returns cache statistics (hits, misses, number of entries and their total size)."""
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._cache),
+            "size": int(self._cache.currsize),
+        }
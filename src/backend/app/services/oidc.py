@@ -1,10 +1,14 @@
 """OIDC service module."""
 
+import asyncio
 import os
+import time
+import traceback
+
+from typing import Awaitable, Callable
 
 import httpx
 
-from cachetools import TTLCache
 from dotenv import load_dotenv
 
 from jose import JWTError, jwt
@@ -12,14 +16,96 @@ from jose import JWTError, jwt
 from services.logging.base import LoggerBase
 
 
+class CachedDocument:
+    """JSON document fetched from the identity provider and cached for `ttl` seconds.
+
+    Concurrent requests for a missing or expired document share a single fetch.
+    Once the document is older than `refresh_after` seconds, it is refreshed
+    in the background, so requests are not waiting for the identity provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Awaitable[dict]],
+        logger: LoggerBase,
+        ttl: float = 3600,
+        refresh_after: float = 3000,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.logger = logger
+        self.ttl = ttl
+        self.refresh_after = refresh_after
+        self.timer = timer
+
+        self._value: dict | None = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh: asyncio.Task | None = None
+
+    async def get(self) -> dict:
+        """Get the cached document, fetching it if missing or expired.
+
+        Returns:
+            dict: The document.
+        """
+
+        if self._is_valid():
+            if self.timer() >= self._fetched_at + self.refresh_after and self._refresh is None:
+                self._refresh = asyncio.create_task(self._refresh_in_background())
+
+            return self._value
+
+        async with self._lock:
+            # fetched by another request while waiting for the lock
+            if not self._is_valid():
+                await self._load()
+
+            return self._value
+
+    async def close(self) -> None:
+        """Cancel the background refresh, if running."""
+
+        if self._refresh is not None:
+            self._refresh.cancel()
+            await asyncio.gather(self._refresh, return_exceptions=True)
+
+    def _is_valid(self) -> bool:
+        return self._value is not None and self.timer() < self._fetched_at + self.ttl
+
+    async def _load(self) -> None:
+        self.logger.info("Fetching OIDC %s.", self.name)
+        self._value = await self.fetch()
+        self._fetched_at = self.timer()
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            async with self._lock:
+                await self._load()
+        except Exception:
+            # expired document is fetched again on the next request
+            self.logger.warn("Unable to refresh OIDC %s: %s", self.name, traceback.format_exc())
+        finally:
+            self._refresh = None
+
+
 class OIDCService:
-    """Service for handling OIDC operations."""
+    """Service for handling OIDC operations.
 
-    def __init__(self, logger: LoggerBase):
+    Requests to the identity provider are sent using a single pooled client,
+    which has to be closed using `close` when the application stops.
+    """
+
+    def __init__(self, logger: LoggerBase, client: httpx.AsyncClient | None = None):
         self.logger = logger
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0), limits=httpx.Limits(max_keepalive_connections=10)
+        )
 
-        self.config_cache = TTLCache(maxsize=1, ttl=3600)
-        self.jwks_cache = TTLCache(maxsize=1, ttl=3600)
+        self.config = CachedDocument("configuration", self._fetch_config, logger)
+        self.jwks = CachedDocument("JWKs", self._fetch_jwks, logger)
 
         load_dotenv()
 
@@ -39,13 +125,7 @@ class OIDCService:
             dict: OIDC configuration.
         """
 
-        if "config" not in self.config_cache:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.discovery_url)
-                response.raise_for_status()
-                self.config_cache["config"] = response.json()
-
-        return self.config_cache.get("config", {})
+        return await self.config.get()
 
     async def get_jwks(self) -> dict:
         """Get the JWKs from the discovery endpoint or cache, if available.
@@ -54,16 +134,37 @@ class OIDCService:
             dict: JWKs.
         """
 
-        if "jwks" not in self.jwks_cache:
-            config = await self.get_oidc_config()
-            jwks_uri = config["jwks_uri"]
+        return await self.jwks.get()
+
+    async def exchange_code(self, code: str) -> httpx.Response:
+        """Exchange the authorization code for tokens at the token endpoint.
+
+        Args:
+            code (str): Authorization code received in the callback.
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(jwks_uri)
-                response.raise_for_status()
-                self.jwks_cache["jwks"] = response.json()
+        Returns:
+            httpx.Response: Response of the token endpoint.
+        """
+
+        config = await self.get_oidc_config()
+
+        return await self.client.post(
+            config["token_endpoint"],
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": self.redirect_url,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            auth=httpx.BasicAuth(username=self.client_id, password=self.client_secret),
+        )
 
-        return self.jwks_cache.get("jwks", {})
+    async def close(self) -> None:
+        """Stop background refreshes and close the HTTP client."""
+
+        await self.config.close()
+        await self.jwks.close()
+        await self.client.aclose()
 
     async def verify_token(self, token: str) -> dict | None:
         """Verify the token and return the claims.
@@ -109,12 +210,24 @@ class OIDCService:
             )
             return payload
         except JWTError as e:
-            self.logger.warn(f"Invalid token: {str(e)}")
+            self.logger.warn("Invalid token: %s", e)
             return None
         except Exception as e:
-            self.logger.error(f"Error verifying token: {str(e)}")
+            self.logger.error("Error verifying token: %s", e)
             return None
 
+    async def _fetch_config(self) -> dict:
+        response = await self.client.get(self.discovery_url)
+        response.raise_for_status()
+        return response.json()
+
+    async def _fetch_jwks(self) -> dict:
+        config = await self.get_oidc_config()
+
+        response = await self.client.get(config["jwks_uri"])
+        response.raise_for_status()
+        return response.json()
+
     def _ensure_env_set(self) -> None:
         if not self.base_url:
             raise EnvironmentError("OIDC_BASE_URL environment variable is not set")
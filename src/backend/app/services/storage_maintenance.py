@@ -0,0 +1,49 @@
+"""Service for periodic maintenance of the data directory."""
+
+import asyncio
+import traceback
+
+from services.io import IOService
+from services.logging.base import LoggerBase
+
+
+class StorageMaintenanceService:
+    """Service for periodic maintenance of the data directory.
+
+    Reconciles storage usage ledgers with the file system, so that changes which are
+    not recorded in the ledgers (e.g. small files created during calculations or files
+    removed manually) are eventually reflected in quotas. Every web server process runs
+    its own task, ledgers reconciled recently by another process are skipped.
+    """
+
+    def __init__(self, logger: LoggerBase, io: IOService, reconcile_interval: float = 3600.0):
+        self.logger = logger
+        self.io = io
+        self.reconcile_interval = reconcile_interval
+
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start maintenance task. Has to be called from a running event loop."""
+
+        self.logger.info("Starting storage maintenance.")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop maintenance task."""
+
+        self.logger.info("Stopping storage maintenance.")
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.io.reconcile_usage, self.reconcile_interval / 2)
+            except Exception:
+                self.logger.error("Unable to reconcile storage usage: %s", traceback.format_exc())
+
+            await asyncio.sleep(self.reconcile_interval)
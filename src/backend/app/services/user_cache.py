@@ -0,0 +1,82 @@
+"""Cache of users resolved from access tokens."""
+
+import hashlib
+import time
+
+from dataclasses import dataclass
+from typing import Callable
+
+from cachetools import TLRUCache
+
+from db.schemas.user import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """User loaded for an access token together with the verified claims of the token."""
+
+    claims: dict
+    user: User
+    expires_at: float
+
+
+class UserCache:
+    """Bounded cache of users resolved from access tokens.
+
+    A token is verified and its user loaded from the database once, next requests
+    with the same token are resolved by a dictionary lookup. Entries expire together
+    with the token (`exp` claim), at most `max_ttl` seconds after being stored,
+    and are removed on logout. Tokens are keyed by their SHA-256 digest.
+
+    The cache is not shared between gunicorn workers.
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, max_ttl: float = 300, timer: Callable[[], float] = time.time
+    ):
+        self.max_ttl = max_ttl
+        self.timer = timer
+        self._cache: TLRUCache[str, CachedUser] = TLRUCache(
+            maxsize=maxsize, ttu=lambda _key, value, _now: value.expires_at, timer=timer
+        )
+
+    def get(self, token: str) -> CachedUser | None:
+        """Get the user cached for the provided token.
+
+        Args:
+            token (str): Access token.
+
+        Returns:
+            CachedUser | None: Cached user or None if not cached or expired.
+        """
+
+        return self._cache.get(self._key(token))
+
+    def store(self, token: str, claims: dict, user: User) -> None:
+        """Cache the user loaded for a verified token.
+
+        Args:
+            token (str): Verified access token.
+            claims (dict): Claims of the token.
+            user (User): User identified by the token.
+        """
+
+        expires_at = self.timer() + self.max_ttl
+
+        if isinstance(exp := claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, exp)
+
+        # already expired entries are not stored
+        self._cache[self._key(token)] = CachedUser(claims=claims, user=user, expires_at=expires_at)
+
+    def invalidate(self, token: str) -> None:
+        """Remove the provided token from the cache.
+
+        Args:
+            token (str): Access token.
+        """
+
+        self._cache.pop(self._key(token), None)
+
+    def _key(self, token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
@@ -8,8 +8,10 @@ cd /acc2/app
 # run database migrations
 alembic upgrade head
 
-# use gunicorn with 4 workers
+# use gunicorn with 4 workers (unless WEB_CONCURRENCY is set)
+# WEB_CONCURRENCY is exported so that ACC2_MAX_WORKERS can be split between gunicorn workers
 # uvicorn.workers.UvicornWorker is used for async processing
 # setting timeout to 1 hour for long lasting computations
 # running on port 8000
-exec gunicorn --workers 4 --worker-class uvicorn.workers.UvicornWorker --timeout 6000 --bind 0.0.0.0:8000 main:web_app
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-4}"
+exec gunicorn --workers "$WEB_CONCURRENCY" --worker-class uvicorn.workers.UvicornWorker --timeout 6000 --bind 0.0.0.0:8000 main:web_app
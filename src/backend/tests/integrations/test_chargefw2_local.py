@@ -0,0 +1,38 @@
+from pathlib import Path
+import pytest
+
+chargefw2 = pytest.importorskip("chargefw2")
+
+if not hasattr(chargefw2, "calculate_charges"):
+    pytest.skip("ChargeFW2 bindings are not available.", allow_module_level=True)
+
+from app.integrations.chargefw2.chargefw2 import ChargeFW2Local  # noqa: E402
+
+
+EXAMPLE_FILE = (
+    Path(__file__).parents[2]
+    / "app"
+    / "examples"
+    / "phenols"
+    / "69dd177c7b8f98a5414f9fbc92e57e9c6da79b10b1b4b7296621631187adb18b_phenols.sdf.mol2"
+)
+
+
+class TestChargeFW2Local:
+    def test_reused_molecules(self, tmp_path) -> None:
+        """Test that molecules can be reused (e.g. when cached) for calculations with
+        different methods without affecting their results."""
+
+        local = ChargeFW2Local()
+        shared = local.molecules(str(EXAMPLE_FILE), True, False, True)
+        configs = [
+            (method.internal_name, parameters[0].internal_name if parameters else None)
+            for method, parameters in local.get_suitable_methods(shared)[:4]
+        ]
+
+        # calculate all configs with the same molecules, the first one again at the end
+        for method, parameters in [*configs, configs[0]]:
+            charges = local.calculate_charges(shared, method, parameters, str(tmp_path))
+            fresh = local.molecules(str(EXAMPLE_FILE), True, False, True)
+
+            assert charges == local.calculate_charges(fresh, method, parameters, str(tmp_path))
@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+
+import pytest
+
+from app.integrations.chargefw2.process import SharedCharges, release_discarded
+
+
+def dump_charges(charges: dict[str, list[float]]) -> SharedCharges:
+    return SharedCharges.dump(charges)
+
+
+class TestSharedCharges:
+    def test_dump_load(self) -> None:
+        charges = {"molecule1": [0.1, -0.2, 0.3], "molecule2": [], "molecule3": [1.5]}
+
+        shared = SharedCharges.dump(charges)
+        result = shared.load()
+
+        assert result == charges
+        assert list(result.keys()) == ["molecule1", "molecule2", "molecule3"]
+
+    def test_dump_load_empty(self) -> None:
+        charges = {"molecule1": []}
+
+        shared = SharedCharges.dump(charges)
+
+        assert shared.name is None
+        assert shared.load() == charges
+
+    def test_load_from_other_process(self) -> None:
+        charges = {"molecule1": [0.123456789, -0.987654321], "molecule2": [0.5]}
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            shared = executor.submit(dump_charges, charges).result()
+
+        assert shared.load() == charges
+
+    def test_release(self) -> None:
+        shared = SharedCharges.dump({"molecule1": [0.1, 0.2]})
+
+        shared.release()
+        shared.release()
+
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.name)
+
+    def test_release_discarded(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            future = executor.submit(dump_charges, {"molecule1": [0.1]})
+            future.add_done_callback(release_discarded)
+            shared = future.result()
+
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.name)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+
+from app.integrations.chargefw2 import chargefw2 as chargefw2_module
+from app.integrations.chargefw2.chargefw2 import ChargeFW2Local
+
+
+@pytest.fixture
+def installation(tmp_path, monkeypatch) -> Path:
+    # <prefix>/lib contains the bindings, <prefix>/share contains parameter files
+    bindings = tmp_path / "lib" / "chargefw2.so"
+    bindings.parent.mkdir()
+    bindings.write_bytes(b"bindings")
+    parameters = tmp_path / "share" / "parameters" / "eem.json"
+    parameters.parent.mkdir(parents=True)
+    parameters.write_text('{"kappa": 0.1}')
+
+    monkeypatch.setattr(chargefw2_module.chargefw2, "__file__", str(bindings), raising=False)
+
+    return tmp_path
+
+
+class TestChargeFW2Version:
+    def test_version_changes_with_parameters(self, installation: Path) -> None:
+        version = ChargeFW2Local().get_version()
+
+        assert version == ChargeFW2Local().get_version()
+
+        (installation / "share" / "parameters" / "eem.json").write_text('{"kappa": 0.2}')
+
+        assert ChargeFW2Local().get_version() != version
+
+    def test_version_changes_with_bindings(self, installation: Path) -> None:
+        version = ChargeFW2Local().get_version()
+
+        (installation / "lib" / "chargefw2.so").write_bytes(b"upgraded bindings")
+
+        assert ChargeFW2Local().get_version() != version
+
+    def test_version_computed_once(self, installation: Path) -> None:
+        local = ChargeFW2Local()
+        version = local.get_version()
+
+        (installation / "lib" / "chargefw2.so").write_bytes(b"upgraded bindings")
+
+        assert local.get_version() == version
@@ -1,11 +1,16 @@
 import datetime
+import hashlib
+from io import BytesIO
 import os
 from pathlib import Path
 import shutil
 import tempfile
 from typing import Any, Generator
+import zipfile
 import pytest
 
+from fastapi import UploadFile
+
 from app.integrations.io.io import IOLocal
 
 
@@ -108,6 +113,22 @@ class TestIOService:
             content = f.read()
         assert content == "test copy content"
 
+    def test_move(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        src_file = os.path.join(base_dir, "source.txt")
+        dst_file = os.path.join(base_dir, "destination.txt")
+
+        with open(src_file, "w") as f:
+            f.write("new content")
+        with open(dst_file, "w") as f:
+            f.write("old content")
+
+        io.move(src_file, dst_file)
+
+        assert not os.path.exists(src_file)
+        with open(dst_file, "r") as f:
+            assert f.read() == "new content"
+
     def test_symlink(self, io_service: tuple[IOLocal, Path]) -> None:
         io, base_dir = io_service
         src_file = os.path.join(base_dir, "symlink_source.txt")
@@ -130,6 +151,51 @@ class TestIOService:
             # Skipping on Windows
             pytest.skip("Symlinks not supported on this platform/environment")
 
+    def test_replace_symlink(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        old_file = os.path.join(base_dir, "old.txt")
+        new_file = os.path.join(base_dir, "new.txt")
+        dst_link = os.path.join(base_dir, "link")
+
+        for path in [old_file, new_file]:
+            with open(path, "w") as f:
+                f.write(path)
+
+        io.replace_symlink(old_file, dst_link)
+        io.replace_symlink(new_file, dst_link)
+
+        assert os.readlink(dst_link) == new_file
+        assert sorted(os.listdir(base_dir)) == ["link", "new.txt", "old.txt"]
+
+    def test_link(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        src_file = os.path.join(base_dir, "source.txt")
+        dst_file = os.path.join(base_dir, "dest.txt")
+
+        with open(src_file, "w") as f:
+            f.write("test content")
+
+        io.link(src_file, dst_file)
+        io.link(src_file, dst_file)
+
+        assert os.path.samefile(src_file, dst_file)
+        assert io.link_count(src_file) == 2
+        assert io.link_count(os.path.join(base_dir, "nonexistent")) == 0
+        assert sorted(os.listdir(base_dir)) == ["dest.txt", "source.txt"]
+
+    def test_readlink(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        src_file = os.path.join(base_dir, "readlink_source.txt")
+        dst_link = os.path.join(base_dir, "readlink_dest.txt")
+
+        with open(src_file, "w") as f:
+            f.write("test content")
+        os.symlink(src_file, dst_link)
+
+        assert io.readlink(dst_link) == src_file
+        assert io.readlink(src_file) is None
+        assert io.readlink(os.path.join(base_dir, "nonexistent")) is None
+
     def test_zip(self, io_service: tuple[IOLocal, Path]) -> None:
         io, base_dir = io_service
         src_dir = os.path.join(base_dir, "dir_to_zip")
@@ -147,6 +213,53 @@ class TestIOService:
         assert result == f"{zip_dest}.zip"
         assert os.path.exists(result)
 
+    def test_zip_stream(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        src_file = os.path.join(base_dir, "hash_file.txt")
+        content = os.urandom(300 * 1024)
+
+        with open(src_file, "wb") as f:
+            f.write(content)
+
+        destination = os.path.join(base_dir, "archive.zip")
+        chunks = list(io.zip_stream([(src_file, "txt/file.txt")], destination))
+
+        assert len(chunks) > 1
+        with zipfile.ZipFile(BytesIO(b"".join(chunks))) as archive:
+            assert archive.namelist() == ["txt/file.txt"]
+            assert archive.read("txt/file.txt") == content
+
+        with open(destination, "rb") as f:
+            assert f.read() == b"".join(chunks)
+
+    def test_zip_stream_interrupted(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        src_file = os.path.join(base_dir, "file.txt")
+
+        with open(src_file, "wb") as f:
+            f.write(os.urandom(300 * 1024))
+
+        destination = os.path.join(base_dir, "archive.zip")
+        stream = io.zip_stream([(src_file, "file.txt")], destination)
+        next(stream)
+        stream.close()
+
+        assert os.listdir(base_dir) == ["file.txt"]
+
+    def test_update_json(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        path = os.path.join(base_dir, "storage", "usage.json")
+
+        assert io.read_json(path) is None
+
+        result = io.update_json(path, lambda current: {"files": 1} if current is None else {})
+        assert result == {"files": 1}
+
+        result = io.update_json(path, lambda current: {"files": current["files"] + 1})
+        assert result == {"files": 2}
+        assert io.read_json(path) == {"files": 2}
+        assert sorted(os.listdir(os.path.dirname(path))) == ["usage.json", "usage.json.lock"]
+
     def test_listdir(self, io_service: tuple[IOLocal, Path]) -> None:
         io, base_dir = io_service
 
@@ -160,6 +273,30 @@ class TestIOService:
 
         assert set(result) == {"subdir1", "subdir2", "file1.txt"}
 
+    @pytest.mark.asyncio
+    async def test_store_blob(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        blobs_dir = os.path.join(base_dir, "blobs")
+        content = b"line1\r\nline2\r\n"
+        file_hash = hashlib.sha256(b"line1\nline2\n").hexdigest()
+
+        path, result_hash = await io.store_blob(UploadFile(BytesIO(content)), blobs_dir)
+
+        assert result_hash == file_hash
+        assert path == os.path.join(blobs_dir, file_hash[:2], file_hash)
+        with open(path, "rb") as f:
+            assert f.read() == b"line1\nline2\n"
+
+        # same contents are not written again
+        os.link(path, os.path.join(base_dir, "user_file"))
+        modified = os.stat(path).st_mtime_ns
+        path_again, _ = await io.store_blob(UploadFile(BytesIO(content)), blobs_dir)
+
+        assert path_again == path
+        assert os.stat(path).st_mtime_ns == modified
+        assert os.stat(path).st_nlink == 2
+        assert os.listdir(os.path.join(blobs_dir, file_hash[:2])) == [file_hash]
+
     @pytest.mark.asyncio
     async def test_write_file(self, io_service: tuple[IOLocal, Path]) -> None:
         io, base_dir = io_service
@@ -175,6 +312,15 @@ class TestIOService:
             written_content = f.read()
         assert written_content == test_content
 
+    def test_read_lines(self, io_service: tuple[IOLocal, Path]) -> None:
+        io, base_dir = io_service
+        test_file = os.path.join(base_dir, "test_lines.cif")
+
+        with open(test_file, "w") as f:
+            f.write("data_1\n_atom_site.id 1\n")
+
+        assert list(io.read_lines(test_file)) == [b"data_1\n", b"_atom_site.id 1\n"]
+
     def test_path_exists(self, io_service: tuple[IOLocal, Path]) -> None:
         io, base_dir = io_service
         test_file = os.path.join(base_dir, "test_exists.txt")
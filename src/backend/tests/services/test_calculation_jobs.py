@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, Mock
+import uuid
+import pytest
+
+from api.v1.exceptions import BadRequestError
+from models.calculation import CalculationConfigDto
+from models.setup import AdvancedSettingsDto
+from db.schemas.user import User  # noqa: F401
+from db.schemas.calculation_job import CalculationJob
+from services.calculation_jobs import CalculationJobService
+
+
+@pytest.fixture
+def logger_mock():
+    return Mock()
+
+
+@pytest.fixture
+def job_repository_mock():
+    return Mock()
+
+
+@pytest.fixture
+def session_manager_mock():
+    mock = Mock()
+    session_mock = Mock()
+    context_manager = MagicMock()
+    context_manager.__enter__.return_value = session_mock
+    mock.session.return_value = context_manager
+    return mock
+
+
+@pytest.fixture
+def chargefw2_mock():
+    mock = Mock()
+    mock.run_calculation = AsyncMock()
+    return mock
+
+
+@pytest.fixture
+def service(logger_mock, job_repository_mock, session_manager_mock, chargefw2_mock):
+    return CalculationJobService(
+        logger=logger_mock,
+        job_repository=job_repository_mock,
+        session_manager=session_manager_mock,
+        chargefw2=chargefw2_mock,
+        workers=1,
+        poll_interval=0.01,
+    )
+
+
+@pytest.fixture
+def job():
+    return CalculationJob(
+        id=uuid.uuid4(),
+        computation_id=uuid.uuid4(),
+        user_id=None,
+        status="running",
+        settings=AdvancedSettingsDto().model_dump(),
+        file_hashes=["hash1", "hash2"],
+        configs=[{"method": "method1", "parameters": "params1"}],
+        processed=0,
+        total=2,
+        attempts=1,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+class TestCalculationJobService:
+    def test_submit(self, service, job_repository_mock, session_manager_mock):
+        """Test submitting a job stores it in the queue."""
+
+        session = session_manager_mock.session().__enter__()
+        computation_id = str(uuid.uuid4())
+        configs = [CalculationConfigDto(method="method1", parameters="params1")]
+
+        result = service.submit(
+            computation_id, AdvancedSettingsDto(), ["hash1", "hash2"], configs, None
+        )
+
+        job_repository_mock.store.assert_called_once()
+        stored = job_repository_mock.store.call_args[0][1]
+        assert job_repository_mock.store.call_args[0][0] == session
+        assert stored.status == "queued"
+        assert stored.file_hashes == ["hash1", "hash2"]
+        assert stored.configs == [{"method": "method1", "parameters": "params1"}]
+        assert stored.total == 2
+        assert result.status == "queued"
+        assert str(result.computation_id) == computation_id
+
+    def test_get_status_other_user(self, service, job_repository_mock, job):
+        """Test that jobs of other users are not returned."""
+
+        job.user_id = uuid.uuid4()
+        job_repository_mock.get_latest.return_value = job
+
+        assert service.get_status(str(job.computation_id), "other-user") is None
+        assert service.get_status(str(job.computation_id), str(job.user_id)) is not None
+
+    @pytest.mark.asyncio
+    async def test_run_job(self, service, job_repository_mock, chargefw2_mock, job):
+        """Test running a job reports progress and marks it as finished."""
+
+        async def run_calculation(*args, on_progress):
+            on_progress(1, 2)
+            on_progress(2, 2)
+
+        chargefw2_mock.run_calculation.side_effect = run_calculation
+
+        await service._run_job(job)
+
+        args = chargefw2_mock.run_calculation.call_args[0]
+        assert args[0] == str(job.computation_id)
+        assert args[2] == ["hash1", "hash2"]
+        assert args[3][0].method == "method1"
+        assert args[4] is None
+
+        # progress reported before the first write started is written once
+        updates = [call.kwargs for call in job_repository_mock.update.call_args_list]
+        assert updates[0] == {"processed": 2, "total": 2}
+        assert updates[1]["status"] == "finished"
+
+    @pytest.mark.asyncio
+    async def test_run_job_progress_off_loop(
+        self, service, job_repository_mock, chargefw2_mock, job
+    ):
+        """Test that progress is written in a thread and only the latest progress is queued."""
+
+        written = threading.Event()
+        release = threading.Event()
+
+        def update(session, job_id, **values):
+            if "processed" in values:
+                written.set()
+                release.wait(timeout=5)
+
+        job_repository_mock.update.side_effect = update
+
+        async def run_calculation(*args, on_progress):
+            on_progress(1, 3)
+            # event loop keeps running while the progress is being written
+            await asyncio.wait_for(asyncio.to_thread(written.wait, 5), timeout=1)
+            on_progress(2, 3)
+            on_progress(3, 3)
+            release.set()
+
+        chargefw2_mock.run_calculation.side_effect = run_calculation
+
+        await service._run_job(job)
+
+        updates = [call.kwargs for call in job_repository_mock.update.call_args_list]
+        assert updates[0] == {"processed": 1, "total": 3}
+        assert updates[1] == {"processed": 3, "total": 3}
+        assert updates[2]["status"] == "finished"
+
+    @pytest.mark.asyncio
+    async def test_run_job_failed(self, service, job_repository_mock, chargefw2_mock, job):
+        """Test that a failing job is marked as failed."""
+
+        chargefw2_mock.run_calculation.side_effect = BadRequestError(
+            status_code=400, detail="No suitable methods found."
+        )
+
+        await service._run_job(job)
+
+        update = job_repository_mock.update.call_args.kwargs
+        assert update["status"] == "failed"
+        assert update["error"] == "No suitable methods found."
+
+    @pytest.mark.asyncio
+    async def test_workers(self, service, job_repository_mock, chargefw2_mock, job):
+        """Test that started workers claim and run queued jobs."""
+
+        job_repository_mock.requeue_stale.return_value = 0
+        job_repository_mock.claim_next.side_effect = [job, None, None, None, None]
+
+        await service.start()
+        await asyncio.sleep(0.05)
+        await service.stop()
+
+        chargefw2_mock.run_calculation.assert_called_once()
+        job_repository_mock.requeue_stale.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_submit_from_thread_wakes_workers(
+        self, service, job_repository_mock, chargefw2_mock, job
+    ):
+        """Test that jobs submitted from other threads are claimed without waiting for polling."""
+
+        service.poll_interval = 10
+        job_repository_mock.requeue_stale.return_value = 0
+        times = {}
+        job_repository_mock.claim_next.side_effect = lambda *_: (
+            job if job_repository_mock.store.called and "run" not in times else None
+        )
+        chargefw2_mock.run_calculation.side_effect = lambda *_, **__: times.setdefault(
+            "run", time.monotonic()
+        )
+
+        def submit():
+            service.submit(str(uuid.uuid4()), AdvancedSettingsDto(), ["hash1"], None, None)
+            times["submit"] = time.monotonic()
+
+        await service.start()
+        await asyncio.sleep(0.01)
+
+        # the event loop is idle (nothing else wakes it up) while the job is submitted
+        thread = threading.Thread(target=submit)
+        thread.start()
+        await asyncio.sleep(0.5)
+        thread.join()
+        await asyncio.wait_for(service.stop(), timeout=1)
+
+        assert times["run"] - times["submit"] < 0.25
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, MagicMock
 from datetime import datetime
 
 from models.calculation import (
@@ -18,6 +18,8 @@ from db.schemas.calculation import (
     CalculationConfig,
     CalculationSet,
     CalculationSetStats,
+    decode_charges,
+    encode_charges,
 )
 from db.schemas.stats import (
     AtomTypeCount as AtomTypeCountModel,
@@ -57,6 +59,21 @@ def advanced_settings_repository_mock():
     return Mock()
 
 
+@pytest.fixture
+def molecule_charges_repository_mock():
+    return Mock()
+
+
+@pytest.fixture
+def suitable_methods_repository_mock():
+    return Mock()
+
+
+@pytest.fixture
+def best_parameters_repository_mock():
+    return Mock()
+
+
 @pytest.fixture
 def session_manager_mock():
     session = MagicMock()
@@ -77,6 +94,9 @@ def service(
     config_repository_mock,
     stats_repository_mock,
     advanced_settings_repository_mock,
+    molecule_charges_repository_mock,
+    suitable_methods_repository_mock,
+    best_parameters_repository_mock,
     session_manager_mock,
 ):
     return CalculationStorageService(
@@ -86,6 +106,9 @@ def service(
         config_repository=config_repository_mock,
         stats_repository=stats_repository_mock,
         advanced_settings_repository=advanced_settings_repository_mock,
+        molecule_charges_repository=molecule_charges_repository_mock,
+        suitable_methods_repository=suitable_methods_repository_mock,
+        best_parameters_repository=best_parameters_repository_mock,
         session_manager=session_manager_mock,
     )
 
@@ -203,39 +226,35 @@ class TestCalculationStorageService:
         session_manager_mock,
         set_repository_mock,
         sample_calculation_set,
+        sample_molecule_set_stats,
         stats_repository_mock,
     ):
         """Test get_calculations method returns a PagedList of CalculationSetPreviewDtos."""
 
-        set_repository_mock.get_all.return_value = PagedList(items=[sample_calculation_set])
-
-        molecule_set_stats = MoleculeSetStats(
-            {
-                "total_molecules": 10,
-                "total_atoms": 100,
-                "atom_type_counts": [
-                    {"symbol": "C", "count": 50},
-                    {"symbol": "H", "count": 30},
-                    {"symbol": "O", "count": 20},
-                ],
-            }
+        set_repository_mock.get_all.return_value = PagedList(
+            items=[sample_calculation_set], next_cursor="cursor"
+        )
+        sample_calculation_set.molecule_set_stats_associations[0].molecule_set = (
+            sample_molecule_set_stats
         )
 
-        with patch.object(service, "get_info", return_value=molecule_set_stats):
-            filters = CalculationSetFilters(
-                page=1, page_size=10, order_by="created_at", order="desc"
-            )
-            result = service.get_calculations(filters)
+        filters = CalculationSetFilters(page=1, page_size=10, order_by="created_at", order="desc")
+        result = service.get_calculations(filters)
 
-            set_repository_mock.get_all.assert_called_once_with(
-                session_manager_mock.session().__enter__(), filters
-            )
-            assert isinstance(result, PagedList)
-            assert len(result.items) == 1
-            assert isinstance(result.items[0], CalculationSetPreviewDto)
-            assert str(result.items[0].id) == "d55a7af3-d1ee-4884-bce0-805efd5e1e64"
-            assert len(result.items[0].files) == 1
-            assert "file1.mol" in result.items[0].files
+        set_repository_mock.get_all.assert_called_once_with(
+            session_manager_mock.session().__enter__(), filters
+        )
+        # stats are preloaded with calculation sets
+        stats_repository_mock.get.assert_not_called()
+        assert isinstance(result, PagedList)
+        assert result.next_cursor == "cursor"
+        assert len(result.items) == 1
+        assert isinstance(result.items[0], CalculationSetPreviewDto)
+        assert str(result.items[0].id) == "d55a7af3-d1ee-4884-bce0-805efd5e1e64"
+        assert len(result.items[0].files) == 1
+        assert "file1.mol" in result.items[0].files
+        assert result.items[0].files["file1.mol"].total_molecules == 10
+        assert len(result.items[0].files["file1.mol"].atom_type_counts) == 3
 
     def test_get_calculation_set(
         self,
@@ -282,6 +301,34 @@ class TestCalculationStorageService:
         assert len(store_arg.atom_type_counts) == 3
         assert result == molecule_set_stats
 
+    def test_store_suitable_methods(
+        self, service, session_manager_mock, suitable_methods_repository_mock
+    ):
+        """Test store_suitable_methods method stores methods of a file."""
+
+        methods = [(Mock(), [])]
+
+        service.store_suitable_methods("hash123", True, methods)
+
+        suitable_methods_repository_mock.store.assert_called_once_with(
+            session_manager_mock.session().__enter__(), "hash123", True, methods
+        )
+
+    def test_store_best_parameters(
+        self, service, session_manager_mock, best_parameters_repository_mock
+    ):
+        """Test store_best_parameters method stores best parameters of a file."""
+
+        service.store_best_parameters("hash123", "eem", True, None)
+
+        stored = best_parameters_repository_mock.store.call_args.args[1]
+        assert (stored.file_hash, stored.method, stored.permissive_types) == (
+            "hash123",
+            "eem",
+            True,
+        )
+        assert stored.parameters is None
+
     def test_store_calculation_results_new_set(
         self,
         service,
@@ -306,7 +353,7 @@ class TestCalculationStorageService:
         stats_repository_mock.get.return_value = MoleculeSetStatsModel(
             file_hash="hash123", total_molecules=10, total_atoms=100, atom_type_counts=[]
         )
-        calculation_repository_mock.get.return_value = None
+        calculation_repository_mock.get_many.return_value = {}
 
         service.store_calculation_results(
             "d55a7af3-d1ee-4884-bce0-805efd5e1e64",
@@ -353,7 +400,7 @@ class TestCalculationStorageService:
         stats_repository_mock.get.return_value = MoleculeSetStatsModel(
             file_hash="hash123", total_molecules=10, total_atoms=100, atom_type_counts=[]
         )
-        calculation_repository_mock.get.return_value = None
+        calculation_repository_mock.get_many.return_value = {}
 
         service.store_calculation_results(
             "d55a7af3-d1ee-4884-bce0-805efd5e1e64",
@@ -368,6 +415,48 @@ class TestCalculationStorageService:
         set_repository_mock.store.assert_called_once_with(session, sample_calculation_set)
         assert calculation_repository_mock.store.call_count == 1
 
+    def test_store_calculation_results_skips_existing(
+        self,
+        service,
+        session_manager_mock,
+        set_repository_mock,
+        calculation_repository_mock,
+        advanced_settings_repository_mock,
+        config_repository_mock,
+        stats_repository_mock,
+        sample_advanced_settings,
+        sample_advanced_settings_entity,
+        sample_calculation_result,
+        sample_calculation_config_entity,
+        sample_calculation_set,
+    ):
+        """Test store_calculation_results method does not store calculations already in DB."""
+
+        session = session_manager_mock.session().__enter__()
+
+        set_repository_mock.get.return_value = sample_calculation_set
+        advanced_settings_repository_mock.get.return_value = sample_advanced_settings_entity
+        config_repository_mock.get.return_value = sample_calculation_config_entity
+        stats_repository_mock.get.return_value = None
+        calculation_repository_mock.get_many.return_value = {
+            ("hash123", "method1", "params1"): Mock()
+        }
+
+        service.store_calculation_results(
+            "d55a7af3-d1ee-4884-bce0-805efd5e1e64",
+            sample_advanced_settings,
+            [sample_calculation_result],
+            "user123",
+        )
+
+        calculation_repository_mock.get_many.assert_called_once_with(
+            session,
+            ["hash123"],
+            [sample_calculation_result.config],
+            sample_advanced_settings,
+        )
+        calculation_repository_mock.store.assert_not_called()
+
     def test_setup_calculation(
         self,
         service,
@@ -410,29 +499,31 @@ class TestCalculationStorageService:
     ):
         """Test filter_existing_calculations method correctly filters calculations."""
 
-        # for the first file+config combination, return None (not in DB)
-        # for the second file+config combination, return an existing calculation
-        def mock_get_side_effect(session, filters):
-            if filters.hash == "hash123":
-                return None
-            else:
-                calculation = Calculation(
-                    file_name="file2.mol",
-                    file_hash="hash456",
-                    charges={},
-                    config=CalculationConfig(method="method1", parameters="params1"),
-                    advanced_settings=AdvancedSettings(
-                        read_hetatm=True, ignore_water=False, permissive_types=True
-                    ),
-                )
-                return calculation
-
-        calculation_repository_mock.get.side_effect = mock_get_side_effect
+        # the first file+config combination is not in DB
+        # the second file+config combination is an existing calculation
+        calculation = Calculation(
+            file_name="file2.mol",
+            file_hash="hash456",
+            charges={},
+            config=CalculationConfig(method="method1", parameters="params1"),
+            advanced_settings=AdvancedSettings(
+                read_hetatm=True, ignore_water=False, permissive_types=True
+            ),
+        )
+        calculation_repository_mock.get_many.return_value = {
+            ("hash456", "method1", "params1"): calculation
+        }
 
         to_calculate, cached = service.filter_existing_calculations(
             sample_advanced_settings, ["hash123", "hash456"], [sample_calculation_config]
         )
 
+        session = session_manager_mock.session().__enter__()
+        calculation_repository_mock.get_many.assert_called_once_with(
+            session, ["hash123", "hash456"], [sample_calculation_config], sample_advanced_settings
+        )
+        calculation_repository_mock.get.assert_not_called()
+
         assert len(to_calculate) == 1
         assert sample_calculation_config in to_calculate
         assert to_calculate[sample_calculation_config] == ["hash123"]
@@ -465,3 +556,32 @@ class TestCalculationStorageService:
         set_repository_mock.delete.assert_called_once_with(
             session, "d55a7af3-d1ee-4884-bce0-805efd5e1e64"
         )
+
+
+class TestCalculationCharges:
+    def test_encode_decode(self):
+        charges = {"molecule1": [0.123456789, -0.5], "molecule2": [], "molecule3": [1e-10]}
+
+        data, layout = encode_charges(charges)
+
+        assert len(data) == 3 * 8  # 3 doubles
+        assert layout == [["molecule1", 2], ["molecule2", 0], ["molecule3", 1]]
+        assert decode_charges(data, layout) == charges
+
+    def test_calculation_charges(self):
+        charges = {"molecule1": [0.1, -0.2], "molecule2": [0.3]}
+
+        calculation = Calculation(file_name="file1.mol", file_hash="hash123", charges=charges)
+
+        assert calculation.charges_data == encode_charges(charges)[0]
+        assert calculation.charges_layout == [["molecule1", 2], ["molecule2", 1]]
+        assert calculation.charges == charges
+
+    def test_calculation_charges_lazy_decoding(self):
+        charges = {"molecule1": [0.1, -0.2], "molecule2": [0.3]}
+        data, layout = encode_charges(charges)
+
+        calculation = Calculation(charges_data=data, charges_layout=layout)
+
+        assert calculation.charges == charges
+        assert calculation.charges is calculation.charges
@@ -1,7 +1,15 @@
+import asyncio
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Literal
 from unittest.mock import AsyncMock, Mock
 import pytest
 
+from api.v1.exceptions import BadRequestError
+from app.integrations.io.io import IOLocal
 from app.models.method import Method
 from app.models.parameters import Parameters
 from app.models.calculation import (
@@ -11,7 +19,26 @@ from app.models.calculation import (
 )
 from app.models.setup import AdvancedSettingsDto
 from app.models.suitable_methods import SuitableMethods
+from app.services import chargefw2 as chargefw2_module
 from app.services.chargefw2 import ChargeFW2Service
+from app.services.io import IOService
+from app.services.method_registry import MethodRegistry
+from app.services.molecule_records import split_molecules
+
+
+SDF = """mol1
+  program
+comment
+  1  0  0  0  0  0  0  0  0  0999 V2000
+M  END
+$$$$
+mol2
+  program
+comment
+  2  1  0  0  0  0  0  0  0  0999 V2000
+M  END
+$$$$
+"""
 
 
 @pytest.fixture
@@ -30,30 +57,61 @@ def io_mock():
     mock.parse_filename = Mock(side_effect=lambda f: (f.split("_")[0], f.split("_")[1]))
     mock.listdir = Mock(return_value=["hash1_file1.pdb", "hash2_file2.pdb"])
     mock.get_file_storage_path = Mock(return_value="/storage")
+    mock.get_filepath = Mock(
+        side_effect=lambda file_hash, user_id=None: {
+            "hash1": "/storage/hash1_file1.pdb",
+            "hash2": "/storage/hash2_file2.pdb",
+        }.get(file_hash)
+    )
     mock.get_inputs_path = Mock(return_value="/inputs")
     mock.get_charges_path = Mock(return_value="/charges")
     mock.create_dir = Mock()
+    mock.get_computation_path = Mock(return_value="/computation")
     mock.store_configs = AsyncMock()
+    mock.mark_outputs_generated = AsyncMock()
+    mock.outputs_generated = Mock(return_value=False)
     mock.path_exists = Mock(return_value=True)
+    mock.file_size = Mock(return_value=1024)
+    mock.dir_size = Mock(return_value=0)
     return mock
 
 
 @pytest.fixture
 def mmcif_service_mock():
-    return Mock()
+    mock = Mock()
+    mock.write_to_mmcif = AsyncMock()
+    return mock
 
 
 @pytest.fixture
 def calculation_storage_mock():
     mock = Mock()
     mock.get_calculation_set = Mock(return_value=None)
+    mock.get_suitable_methods = Mock(return_value={})
+    mock.get_best_parameters = Mock(return_value=None)
     return mock
 
 
 @pytest.fixture
-def service(chargefw2_mock, logger_mock, io_mock, mmcif_service_mock, calculation_storage_mock):
+def method_registry():
+    return MethodRegistry(
+        [get_method("method1", has_parameters=True), get_method("method2")],
+        {"method1": [get_parameters("param1"), get_parameters("param2")]},
+    )
+
+
+@pytest.fixture
+def service(
+    chargefw2_mock,
+    method_registry,
+    logger_mock,
+    io_mock,
+    mmcif_service_mock,
+    calculation_storage_mock,
+):
     return ChargeFW2Service(
         chargefw2=chargefw2_mock,
+        method_registry=method_registry,
         logger=logger_mock,
         io=io_mock,
         mmcif_service=mmcif_service_mock,
@@ -93,24 +151,17 @@ class TestChargeFW2Service:
     def test_get_available_methods(self, service, chargefw2_mock):
         """Test getting available methods."""
 
-        expected_methods = [get_method("method1"), get_method("method2")]
-        chargefw2_mock.get_available_methods.return_value = expected_methods
-
         result = service.get_available_methods()
 
-        assert result == expected_methods
-        chargefw2_mock.get_available_methods.assert_called_once()
+        assert result == [get_method("method1", has_parameters=True), get_method("method2")]
+        chargefw2_mock.get_available_methods.assert_not_called()
         service.logger.info.assert_called_once_with("Getting available methods.")
 
-    def test_get_available_methods_error(self, service, chargefw2_mock):
-        """Test handling exceptions when creating a directory."""
+    def test_is_method_available(self, service):
+        """Test checking whether a method is available."""
 
-        chargefw2_mock.get_available_methods.side_effect = Exception("Test error")
-
-        with pytest.raises(Exception, match="Test error"):
-            service.get_available_methods()
-
-        service.logger.error.assert_called_once()
+        assert service.is_method_available("method1")
+        assert not service.is_method_available("unknown")
 
     @pytest.mark.asyncio
     async def test_get_available_parameters(self, service, chargefw2_mock):
@@ -118,18 +169,17 @@ class TestChargeFW2Service:
 
         method = "method1"
         expected_params = [get_parameters("param1"), get_parameters("param2")]
-        chargefw2_mock.get_available_parameters.return_value = expected_params
 
         result = await service.get_available_parameters(method)
 
         assert result == expected_params
-        chargefw2_mock.get_available_parameters.assert_called_once_with(method)
+        chargefw2_mock.get_available_parameters.assert_not_called()
         service.logger.info.assert_called_once_with(
-            f"Getting available parameters for method {method}."
+            "Getting available parameters for method %s.", method
         )
 
     @pytest.mark.asyncio
-    async def test_get_best_parameters(self, service, chargefw2_mock):
+    async def test_get_best_parameters(self, service, chargefw2_mock, calculation_storage_mock):
         """Test getting best parameters."""
 
         method = "method1"
@@ -140,11 +190,91 @@ class TestChargeFW2Service:
         service.read_molecules = AsyncMock(return_value=molecules_mock)
         chargefw2_mock.get_best_parameters.return_value = expected_params
 
-        result = await service.get_best_parameters(method, file_path)
+        result = await service.get_best_parameters(method, "hash1", file_path)
 
         assert result == expected_params
         service.read_molecules.assert_called_once_with(file_path)
         chargefw2_mock.get_best_parameters.assert_called_once_with(molecules_mock, method, True)
+        calculation_storage_mock.get_best_parameters.assert_called_once_with(
+            "hash1", method, True
+        )
+        calculation_storage_mock.store_best_parameters.assert_called_once_with(
+            "hash1", method, True, "best_params"
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_best_parameters_stored(
+        self, service, chargefw2_mock, calculation_storage_mock
+    ):
+        """Test that stored best parameters are returned without parsing the file."""
+
+        calculation_storage_mock.get_best_parameters.return_value = Mock(parameters="param2")
+        service.read_molecules = AsyncMock()
+
+        result = await service.get_best_parameters("method1", "hash1", "/path/to/file.pdb", False)
+
+        assert result == get_parameters("param2")
+        service.read_molecules.assert_not_called()
+        chargefw2_mock.get_best_parameters.assert_not_called()
+        calculation_storage_mock.store_best_parameters.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_best_parameters_stored_removed(
+        self, service, chargefw2_mock, calculation_storage_mock
+    ):
+        """Test that stored parameters removed from ChargeFW2 are found and stored again."""
+
+        calculation_storage_mock.get_best_parameters.return_value = Mock(parameters="removed")
+        service.read_molecules = AsyncMock(return_value=Mock())
+        chargefw2_mock.get_best_parameters.return_value = get_parameters("param1")
+
+        result = await service.get_best_parameters("method1", "hash1", "/path/to/file.pdb")
+
+        assert result == get_parameters("param1")
+        chargefw2_mock.get_best_parameters.assert_called_once()
+        calculation_storage_mock.store_best_parameters.assert_called_once_with(
+            "hash1", "method1", True, "param1"
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_best_parameters_stored_none(
+        self, service, chargefw2_mock, calculation_storage_mock
+    ):
+        """Test that files without suitable parameters are not parsed again."""
+
+        calculation_storage_mock.get_best_parameters.return_value = Mock(parameters=None)
+        service.read_molecules = AsyncMock()
+
+        result = await service.get_best_parameters("method1", "hash1", "/path/to/file.pdb")
+
+        assert result is None
+        service.read_molecules.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_database_access_does_not_block_event_loop(
+        self, service, calculation_storage_mock
+    ):
+        """Test that slow database access does not delay other requests."""
+
+        def slow_query(*args):
+            time.sleep(0.2)
+            return Mock(parameters=None)
+
+        calculation_storage_mock.get_best_parameters.side_effect = slow_query
+        latencies = []
+
+        async def cheap_request():
+            for _ in range(10):
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(
+            *[service.get_best_parameters("method1", f"hash{i}", "/path") for i in range(4)],
+            cheap_request(),
+        )
+
+        assert max(latencies) < 0.1
 
     @pytest.mark.asyncio
     async def test_read_molecules(self, service, chargefw2_mock):
@@ -158,7 +288,7 @@ class TestChargeFW2Service:
 
         assert result == molecules_mock
         chargefw2_mock.molecules.assert_called_once_with(file_path, True, False, True)
-        service.logger.info.assert_called_once_with(f"Loading molecules from file {file_path}.")
+        service.logger.info.assert_called_once_with("Loading molecules from file %s.", file_path)
 
     @pytest.mark.asyncio
     async def test_get_suitable_methods(self, service):
@@ -177,7 +307,7 @@ class TestChargeFW2Service:
         assert result == mock_suitable_methods
         service._find_suitable_methods.assert_called_once_with(file_hashes, True, "user123")
         service.logger.info.assert_called_once_with(
-            f"Getting suitable methods for file hashes '{file_hashes}'"
+            "Getting suitable methods for file hashes '%s'", file_hashes
         )
 
     @pytest.mark.asyncio
@@ -204,7 +334,7 @@ class TestChargeFW2Service:
         calculation_storage_mock.get_calculation_set.assert_called_once_with(computation_id)
         service._find_suitable_methods.assert_called_once()
         service.logger.info.assert_called_once_with(
-            f"Getting suitable methods for computation '{computation_id}'"
+            "Getting suitable methods for computation '%s'", computation_id
         )
 
     @pytest.mark.asyncio
@@ -237,6 +367,132 @@ class TestChargeFW2Service:
         assert len(result.parameters["method1"]) == 1
         assert result.parameters["method1"][0] == param1
 
+    @pytest.mark.asyncio
+    async def test_find_suitable_methods_concurrently(self, service, io_mock):
+        """Test that files are probed concurrently, limited by the number of workers."""
+
+        io_mock.get_filepath.side_effect = lambda file_hash, user_id=None: f"/storage/{file_hash}"
+        service.read_molecules = AsyncMock()
+        method1 = get_method("method1")
+        running = 0
+        max_running = 0
+
+        async def probe(*args):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return [(method1, [])]
+
+        service._run_in_executor = probe
+
+        result = await service._find_suitable_methods(["h1", "h2", "h3", "h4"], True, None)
+
+        assert result.methods == [method1]
+        assert max_running == 2
+
+    @pytest.mark.asyncio
+    async def test_find_suitable_methods_stops_early(self, service, io_mock):
+        """Test that files are not probed once no method is suitable for all files."""
+
+        io_mock.get_filepath.side_effect = lambda file_hash, user_id=None: f"/storage/{file_hash}"
+        service.read_molecules = AsyncMock()
+        service._run_in_executor = AsyncMock(
+            side_effect=[[(get_method("method1"), [])], [(get_method("method2"), [])]]
+        )
+
+        result = await service._find_suitable_methods(["h1", "h2", "h3"], True, None)
+
+        assert result.methods == []
+        assert service._run_in_executor.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_find_suitable_methods_stored(self, service, calculation_storage_mock):
+        """Test that stored suitable methods are used without parsing the files."""
+
+        method1 = get_method("method1")
+        param1 = get_parameters("param1")
+        calculation_storage_mock.get_suitable_methods.return_value = {
+            "hash1": [(method1, [param1])]
+        }
+        service.read_molecules = AsyncMock()
+        service._run_in_executor = AsyncMock(return_value=[(method1, [param1])])
+
+        result = await service._find_suitable_methods(["hash1", "hash2"], False, "user123")
+
+        assert result.methods == [method1]
+        calculation_storage_mock.get_suitable_methods.assert_called_once_with(
+            ["hash1", "hash2"], False
+        )
+        # only the second file is parsed and its methods are stored
+        service.read_molecules.assert_called_once_with(
+            "/storage/hash2_file2.pdb", True, False, False
+        )
+        calculation_storage_mock.store_suitable_methods.assert_called_once_with(
+            "hash2", False, [(method1, [param1])]
+        )
+
+    @pytest.mark.asyncio
+    async def test_precompute_suitable_methods(self, service, calculation_storage_mock):
+        """Test that suitable methods of an uploaded file are stored for default settings."""
+
+        method1 = get_method("method1")
+        service.read_molecules = AsyncMock()
+        service._run_in_executor = AsyncMock(return_value=[(method1, [])])
+
+        service.precompute_suitable_methods("hash1", "/storage/hash1_file1.pdb")
+        await service._precompute_tasks["hash1"]
+
+        calculation_storage_mock.store_suitable_methods.assert_called_once_with(
+            "hash1", True, [(method1, [])]
+        )
+        assert service._precompute_tasks == {}
+
+    @pytest.mark.asyncio
+    async def test_precompute_suitable_methods_in_background(
+        self, service, io_mock, calculation_storage_mock
+    ):
+        """Test that files are processed in the background and requests wait for them."""
+
+        method1 = get_method("method1")
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def run_in_executor(*_):
+            started.set()
+            await release.wait()
+            return [(method1, [])]
+
+        service.read_molecules = AsyncMock()
+        service._run_in_executor = AsyncMock(side_effect=run_in_executor)
+        io_mock.get_filepath.return_value = "/storage/hash1_file1.pdb"
+        calculation_storage_mock.get_suitable_methods.return_value = {}
+
+        # returns before the methods are found
+        service.precompute_suitable_methods("hash1", "/storage/hash1_file1.pdb")
+        await started.wait()
+
+        request = asyncio.create_task(service.get_suitable_methods(["hash1"], True))
+        await asyncio.sleep(0.01)
+        release.set()
+        result = await request
+
+        assert [method.internal_name for method in result.methods] == ["method1"]
+        service._run_in_executor.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_precompute_suitable_methods_error(self, service, calculation_storage_mock):
+        """Test that failing to find suitable methods does not fail the upload."""
+
+        service.read_molecules = AsyncMock(side_effect=RuntimeError("error"))
+
+        service.precompute_suitable_methods("hash1", "/storage/hash1_file1.pdb")
+        await service._precompute_tasks["hash1"]
+
+        calculation_storage_mock.store_suitable_methods.assert_not_called()
+        service.logger.warn.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_calculate_charges(self, service):
         """Test calculating charges."""
@@ -262,13 +518,175 @@ class TestChargeFW2Service:
         result = await service.calculate_charges(computation_id, settings, data, user_id)
 
         assert result == [result_dto]
-        service._calculate_charges.assert_called_once_with(
-            user_id, computation_id, settings, config, file_hashes
-        )
+        service._calculate_charges.assert_called_once()
+        *args, records = service._calculate_charges.call_args.args
+        assert args == [user_id, computation_id, settings, config, file_hashes, None]
+        assert records.uses == {"hash1": 1, "hash2": 1}
         service.io.store_configs.assert_called_once_with(
             computation_id, [result_dto.config], user_id
         )
 
+    @pytest.mark.asyncio
+    async def test_run_calculation(self, service, calculation_storage_mock, mmcif_service_mock):
+        """Test running the whole calculation with cached and new results."""
+
+        computation_id = "comp123"
+        user_id = "user123"
+        settings = AdvancedSettingsDto()
+
+        config = CalculationConfigDto(method="method1", parameters="param1")
+        cached = CalculationDto(file="file2.pdb", file_hash="hash2", charges={}, config=config)
+        calculated = CalculationDto(file="file1.pdb", file_hash="hash1", charges={}, config=config)
+        calculation_storage_mock.filter_existing_calculations.return_value = (
+            {config: ["hash1"]},
+            {config: [cached]},
+        )
+
+        async def calculate_charges(computation_id, settings, data, user_id, on_file_processed):
+            on_file_processed()
+            return [CalculationResultDto(config=config, calculations=[calculated])]
+
+        service.calculate_charges = AsyncMock(side_effect=calculate_charges)
+        service.save_charges = AsyncMock()
+        progress = Mock()
+
+        result = await service.run_calculation(
+            computation_id, settings, ["hash1", "hash2"], [config], user_id, progress
+        )
+
+        assert len(result) == 1
+        assert result[0].calculations == [calculated, cached]
+        assert progress.call_args_list == [((1, 2),), ((2, 2),)]
+        calculation_storage_mock.store_calculation_results.assert_called_once_with(
+            computation_id, settings, result, user_id
+        )
+        service.save_charges.assert_not_called()
+        mmcif_service_mock.write_to_mmcif.assert_not_called()
+        service.io.invalidate_outputs.assert_called_once_with(computation_id, user_id)
+        service.io.record_guest_access.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_run_calculation_no_suitable_methods(self, service):
+        """Test running calculation without configs when no method is suitable."""
+
+        service.get_computation_suitable_methods = AsyncMock(
+            return_value=SuitableMethods(methods=[], parameters={})
+        )
+
+        with pytest.raises(BadRequestError):
+            await service.run_calculation("comp123", AdvancedSettingsDto(), ["hash1"], None, None)
+
+    @pytest.mark.asyncio
+    async def test_ensure_outputs(
+        self, service, io_mock, calculation_storage_mock, mmcif_service_mock
+    ):
+        """Test generating output files on first request."""
+
+        computation_id = "comp123"
+        user_id = "user123"
+        results = [
+            CalculationResultDto(
+                config=CalculationConfigDto(method="method1", parameters="param1"),
+                calculations=[],
+            )
+        ]
+        calculation_storage_mock.get_calculation_set.return_value = Mock(
+            user_id=user_id, advanced_settings=AdvancedSettingsDto(read_hetatm=False)
+        )
+        calculation_storage_mock.get_calculation_results.return_value = results
+        service.save_charges = AsyncMock()
+
+        result = await service.ensure_outputs(computation_id, user_id)
+
+        assert result == "/charges"
+        settings, *args, tmp_dir = service.save_charges.call_args.args
+        assert settings.read_hetatm is False
+        assert args == [computation_id, results, user_id]
+        assert tmp_dir.startswith("/computation/charges.")
+        mmcif_service_mock.write_to_mmcif.assert_awaited_once_with(
+            user_id, computation_id, results, tmp_dir
+        )
+        io_mock.move_dir_contents.assert_called_once_with(tmp_dir, "/charges")
+        io_mock.record_usage.assert_called_once_with(user_id, computations=0)
+        io_mock.remove_dir.assert_called_once_with(tmp_dir)
+        io_mock.mark_outputs_generated.assert_awaited_once_with(computation_id, user_id)
+
+    @pytest.mark.asyncio
+    async def test_ensure_outputs_after_new_results(
+        self, service, tmp_path, calculation_storage_mock
+    ):
+        """Test that outputs (and archives) are generated again once new results are stored."""
+
+        computation_id = "comp123"
+        user_id = "user123"
+        io_service = IOService(IOLocal(), Mock())
+        io_service.workdir = tmp_path
+        io_service.create_dir(io_service.get_computation_path(computation_id, user_id))
+        service.io = io_service
+
+        stored: list[CalculationResultDto] = []
+        calculation_storage_mock.filter_existing_calculations.return_value = ({}, {})
+        calculation_storage_mock.store_calculation_results.side_effect = (
+            lambda _id, _settings, results, _user: stored.extend(results)
+        )
+        calculation_storage_mock.get_calculation_set.return_value = Mock(
+            user_id=user_id, advanced_settings=AdvancedSettingsDto()
+        )
+        calculation_storage_mock.get_calculation_results.side_effect = lambda _: list(stored)
+
+        async def save_charges(settings, computation_id, results, user_id, output_dir):
+            methods = ",".join(result.config.method for result in results)
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            (Path(output_dir) / f"{'a' * 64}_file.txt").write_text(methods)
+
+        service.save_charges = AsyncMock(side_effect=save_charges)
+
+        async def download() -> str:
+            charges_dir = await service.ensure_outputs(computation_id, user_id)
+            archive_path, entries = io_service.get_charges_archive(charges_dir)
+            list(io_service.stream_charges_archive(archive_path, entries))
+
+            with zipfile.ZipFile(archive_path) as archive:
+                return archive.read("txt/file.txt").decode()
+
+        for method in ["method1", "method2"]:
+            config = CalculationConfigDto(method=method, parameters=None)
+            service.calculate_charges = AsyncMock(
+                return_value=[CalculationResultDto(config=config, calculations=[])]
+            )
+            await service.run_calculation(
+                computation_id, AdvancedSettingsDto(), ["hash1"], [config], user_id
+            )
+
+            assert await download() == ",".join(result.config.method for result in stored)
+
+        assert await download() == "method1,method2"
+        assert service.save_charges.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_ensure_outputs_already_generated(self, service, io_mock):
+        """Test that output files are generated only once."""
+
+        io_mock.outputs_generated.return_value = True
+        service.save_charges = AsyncMock()
+
+        result = await service.ensure_outputs("comp123", "user123")
+
+        assert result == "/charges"
+        service.save_charges.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ensure_outputs_different_user(self, service, calculation_storage_mock):
+        """Test that output files of computations of other users are not generated."""
+
+        calculation_storage_mock.get_calculation_set.return_value = Mock(user_id="user456")
+        service.save_charges = AsyncMock()
+
+        with pytest.raises(FileNotFoundError):
+            await service.ensure_outputs("comp123", "user123")
+
+        service.save_charges.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_save_charges(self, service):
         """Test saving charges."""
@@ -298,6 +716,182 @@ class TestChargeFW2Service:
         assert service._run_in_executor.call_count == 2
         service.io.create_dir.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_save_charges_reuses_molecules(self, service):
+        """Test that molecules are parsed only once for multiple configs."""
+
+        computation_id = "comp123"
+        user_id = "user123"
+        settings = AdvancedSettingsDto()
+
+        config1 = CalculationConfigDto(method="method1", parameters="param1")
+        config2 = CalculationConfigDto(method="method2", parameters="param2")
+        results = [
+            CalculationResultDto(
+                config=config,
+                calculations=[
+                    CalculationDto(file="file1.pdb", file_hash="hash1", charges={}, config=config)
+                ],
+            )
+            for config in [config1, config2]
+        ]
+
+        service.read_molecules = AsyncMock(return_value=Mock())
+        service._run_in_executor = AsyncMock()
+
+        await service.save_charges(settings, computation_id, results, user_id)
+
+        assert service.read_molecules.call_count == 1
+        assert service._run_in_executor.call_count == 2
+        assert service.molecules_cache.hits == 1
+        assert service.molecules_cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_calculate_file_charges_reuses_molecules(
+        self, service, io_mock, calculation_storage_mock
+    ):
+        """Test that only molecules without stored charges are calculated."""
+
+        settings = AdvancedSettingsDto()
+        config = CalculationConfigDto(method="method1", parameters="param1")
+        records = split_molecules(SDF, "sdf")
+
+        io_mock.read_file = AsyncMock(return_value=SDF)
+        io_mock.write_file = AsyncMock()
+        calculation_storage_mock.get_molecule_charges.return_value = {
+            records[0].fingerprint: [0.5]
+        }
+        service.read_molecules = AsyncMock(return_value=Mock())
+        service._run_in_executor = AsyncMock(return_value={"mol2": [0.1, -0.1]})
+
+        result = await service._calculate_file_charges(
+            "comp123", None, settings, config, "hash1", "/storage/hash1_file1.sdf", "/charges"
+        )
+
+        assert result == {"mol1": [0.5], "mol2": [0.1, -0.1]}
+        assert io_mock.write_file.call_args.args[1] == records[1].content
+        service.read_molecules.assert_called_once()
+        assert io_mock.remove_dir.call_args.args[0].startswith("/computation/partial.")
+        calculation_storage_mock.store_molecule_charges.assert_called_once_with(
+            {records[1].fingerprint: [0.1, -0.1]}, config, settings
+        )
+
+    @pytest.mark.asyncio
+    async def test_calculate_file_charges_in_chunks(
+        self, service, io_mock, calculation_storage_mock
+    ):
+        """Test that large files are calculated in chunks and charges are merged in order."""
+
+        settings = AdvancedSettingsDto()
+        config = CalculationConfigDto(method="method1", parameters="param1")
+        records = split_molecules(SDF, "sdf")
+        service.chunk_size = 1
+
+        io_mock.read_file = AsyncMock(return_value=SDF)
+        io_mock.write_file = AsyncMock()
+        calculation_storage_mock.get_molecule_charges.return_value = {}
+        service.read_molecules = AsyncMock(return_value=Mock())
+        service._run_in_executor = AsyncMock(side_effect=[{"mol1": [0.5]}, {"mol2": [0.1, -0.1]}])
+
+        result = await service._calculate_file_charges(
+            "comp123", None, settings, config, "hash1", "/storage/hash1_file1.sdf", "/charges"
+        )
+
+        assert list(result.items()) == [("mol1", [0.5]), ("mol2", [0.1, -0.1])]
+        assert [call.args[1] for call in io_mock.write_file.call_args_list] == [
+            record.content for record in records
+        ]
+        assert service.read_molecules.call_count == 2
+        assert io_mock.remove_dir.call_count == 3
+        # output files of chunks are written to their own directories
+        output_dirs = [call.args[-1] for call in service._run_in_executor.call_args_list]
+        assert len(set(output_dirs)) == 2
+        assert all(output_dir.startswith("/computation/partial.") for output_dir in output_dirs)
+
+    @pytest.mark.asyncio
+    async def test_calculate_file_charges_single_block(self, service, io_mock):
+        """Test that single block mmCIF files are calculated without reading them whole."""
+
+        config = CalculationConfigDto(method="method1", parameters="param1")
+
+        io_mock.read_lines = Mock(return_value=iter([b"data_1ABC\n", b"_atom_site.id 1\n"]))
+        io_mock.read_file = AsyncMock()
+        service._calculate_molecules = AsyncMock(return_value={"1ABC": [0.5]})
+
+        result = await service._calculate_file_charges(
+            "comp123",
+            None,
+            AdvancedSettingsDto(),
+            config,
+            "hash1",
+            "/storage/hash1_file1.cif",
+            "/charges",
+        )
+
+        assert result == {"1ABC": [0.5]}
+        io_mock.read_lines.assert_called_once_with("/storage/hash1_file1.cif")
+        io_mock.read_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_calculate_file_charges_all_stored(
+        self, service, io_mock, calculation_storage_mock
+    ):
+        """Test that files with all molecules stored are not calculated."""
+
+        config = CalculationConfigDto(method="method1", parameters="param1")
+        records = split_molecules(SDF, "sdf")
+
+        io_mock.read_file = AsyncMock(return_value=SDF)
+        calculation_storage_mock.get_molecule_charges.return_value = {
+            records[0].fingerprint: [0.5],
+            records[1].fingerprint: [0.1, -0.1],
+        }
+        service._run_in_executor = AsyncMock()
+
+        result = await service._calculate_file_charges(
+            "comp123",
+            None,
+            AdvancedSettingsDto(),
+            config,
+            "hash1",
+            "/storage/hash1_file1.sdf",
+            "/charges",
+        )
+
+        assert result == {"mol1": [0.5], "mol2": [0.1, -0.1]}
+        service._run_in_executor.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_calculate_file_charges_unmatched_names(
+        self, service, io_mock, calculation_storage_mock
+    ):
+        """Test that files are calculated as a whole if charges can not be matched to molecules."""
+
+        config = CalculationConfigDto(method="method1", parameters="param1")
+        records = split_molecules(SDF, "sdf")
+        full_charges = {"first": [0.5], "second": [0.1, -0.1]}
+
+        io_mock.read_file = AsyncMock(return_value=SDF)
+        io_mock.write_file = AsyncMock()
+        calculation_storage_mock.get_molecule_charges.return_value = {
+            records[0].fingerprint: [0.5]
+        }
+        service.read_molecules = AsyncMock(return_value=Mock())
+        service._run_in_executor = AsyncMock(side_effect=[{"second": [0.1, -0.1]}, full_charges])
+
+        result = await service._calculate_file_charges(
+            "comp123",
+            None,
+            AdvancedSettingsDto(),
+            config,
+            "hash1",
+            "/storage/hash1_file1.sdf",
+            "/charges",
+        )
+
+        assert result == full_charges
+        calculation_storage_mock.store_molecule_charges.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_info(self, service):
         """Test getting info."""
@@ -323,7 +917,7 @@ class TestChargeFW2Service:
         }
         service.read_molecules.assert_called_once_with(file_path)
         molecules_mock.info.assert_called_once()
-        service.logger.info.assert_called_once_with(f"Getting info for file {file_path}.")
+        service.logger.info.assert_called_once_with("Getting info for file %s.", file_path)
 
     def test_get_calculation_molecules(self, service, io_mock):
         """Test getting calculation molecules."""
@@ -366,3 +960,63 @@ class TestChargeFW2Service:
             service.delete_calculation(computation_id, user_id)
 
         service.logger.error.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_calculate_molecules_cancelled_in_process(self, service, monkeypatch):
+        """Test that charges of a cancelled calculation running in a worker are released."""
+
+        started = threading.Event()
+        release = threading.Event()
+        shared_charges = Mock()
+
+        def calculate_charges(*_):
+            started.set()
+            release.wait(timeout=5)
+            return shared_charges
+
+        monkeypatch.setattr(chargefw2_module.process, "calculate_charges", calculate_charges)
+        service.process_executor = ThreadPoolExecutor(1)
+
+        task = asyncio.create_task(
+            service._calculate_molecules(
+                AdvancedSettingsDto(),
+                CalculationConfigDto(method="method1", parameters=None),
+                "/storage/hash1_file1.pdb",
+                "/charges",
+            )
+        )
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        release.set()
+        service.process_executor.shutdown(wait=True)
+
+        shared_charges.release.assert_called_once()
+        shared_charges.load.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_close(self, service, io_mock):
+        """Test that closing cancels background tasks and shuts down executors."""
+
+        async def run_in_executor(*_):
+            await asyncio.Event().wait()
+
+        service._run_in_executor = AsyncMock(side_effect=run_in_executor)
+        service.read_molecules = AsyncMock()
+        service.process_executor = Mock()
+
+        service.precompute_suitable_methods("hash1", "/storage/hash1_file1.pdb")
+        task = service._precompute_tasks["hash1"]
+        await asyncio.sleep(0)
+
+        await service.close()
+
+        assert task.cancelled()
+        assert service._precompute_tasks == {}
+        service.process_executor.shutdown.assert_called_once_with(wait=True, cancel_futures=True)
+
+        with pytest.raises(RuntimeError):
+            service.executor.submit(print)
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, Mock
+import pytest
+
+from db.schemas.user import User  # noqa: F401
+from db.schemas.stats import (
+    AtomTypeCount as AtomTypeCountModel,
+    MoleculeSetStats as MoleculeSetStatsModel,
+)
+from db.schemas.uploaded_file import UploadedFile
+from models.paging import PagedList
+from services.file_storage import FileStorageService
+
+
+FILE_HASH = "a" * 64
+
+
+@pytest.fixture
+def session_manager_mock():
+    session = MagicMock()
+
+    context_manager = MagicMock()
+    context_manager.__enter__.return_value = session
+
+    session_manager = Mock()
+    session_manager.session.return_value = context_manager
+    return session_manager
+
+
+@pytest.fixture
+def io_mock():
+    mock = Mock()
+    mock.get_file_storage_path.return_value = "/data/user/files"
+    mock.get_files_synced_marker_path.return_value = "/data/user/files_synced.json"
+    mock.path_exists.return_value = True
+    mock.parse_filename.side_effect = lambda name: tuple(name.split("_", 1))
+    mock.file_size.return_value = 100
+    mock.last_modified.return_value = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return mock
+
+
+@pytest.fixture
+def storage_service_mock():
+    mock = Mock()
+    mock.to_stats.return_value = None
+    return mock
+
+
+@pytest.fixture
+def file_repository_mock():
+    return Mock()
+
+
+@pytest.fixture
+def service(io_mock, session_manager_mock, storage_service_mock, file_repository_mock):
+    return FileStorageService(
+        Mock(), io_mock, session_manager_mock, storage_service_mock, file_repository_mock
+    )
+
+
+@pytest.fixture
+def sample_uploaded_file():
+    return UploadedFile(
+        user_id="user123",
+        file_hash=FILE_HASH,
+        file_name="file.cif",
+        size=100,
+        uploaded_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        molecule_set_id=FILE_HASH,
+        stats=MoleculeSetStatsModel(
+            file_hash=FILE_HASH,
+            total_molecules=1,
+            total_atoms=3,
+            atom_type_counts=[AtomTypeCountModel(symbol="C", count=3)],
+        ),
+    )
+
+
+class TestFileStorageService:
+    def test_get_files(
+        self, service, io_mock, file_repository_mock, storage_service_mock, sample_uploaded_file
+    ):
+        """Test that files are listed from stored metadata without touching the filesystem."""
+
+        file_repository_mock.get_all.return_value = PagedList(
+            items=[sample_uploaded_file], page=1, page_size=10, total_count=1
+        )
+
+        result = service.get_files("size", "desc", 1, 10, "file", "user123")
+
+        filters = file_repository_mock.get_all.call_args.args[1]
+        assert (filters.order_by, filters.order, filters.search) == ("size", "desc", "file")
+        storage_service_mock.to_stats.assert_called_once_with(sample_uploaded_file.stats)
+        io_mock.listdir.assert_not_called()
+        io_mock.get_file_size.assert_not_called()
+        assert result.total_count == 1
+        assert result.items[0].file_name == "file.cif"
+        assert result.items[0].size == 100
+
+    def test_get_files_syncs_existing_files(
+        self, service, io_mock, file_repository_mock, storage_service_mock, sample_uploaded_file
+    ):
+        """Test that metadata of files uploaded before are stored once, even if some exist."""
+
+        file_repository_mock.get_all.return_value = PagedList(
+            items=[sample_uploaded_file], page=1, page_size=10, total_count=2
+        )
+        # file uploaded after metadata were introduced
+        file_repository_mock.get_hashes.return_value = {"b" * 64}
+        io_mock.path_exists.side_effect = lambda path: not path.endswith("files_synced.json")
+        io_mock.listdir.return_value = [f"{FILE_HASH}_file.cif", f"{'b' * 64}_new.cif"]
+        storage_service_mock.get_info.return_value = None
+
+        result = service.get_files("uploaded_at", "desc", 1, 10, "", "user123")
+
+        stored = file_repository_mock.store.call_args.args[1]
+        file_repository_mock.store.assert_called_once()
+        assert (stored.file_hash, stored.file_name, stored.size) == (FILE_HASH, "file.cif", 100)
+        assert stored.molecule_set_id is None
+        assert io_mock.update_json.call_args.args[0] == "/data/user/files_synced.json"
+        assert result.total_count == 2
+
+    def test_get_files_synced_once(self, service, io_mock, file_repository_mock):
+        """Test that the file storage is not listed once files of the user were synced."""
+
+        file_repository_mock.get_all.return_value = PagedList(
+            items=[], page=1, page_size=10, total_count=0
+        )
+
+        service.get_files("uploaded_at", "desc", 1, 10, "", "user123")
+
+        io_mock.listdir.assert_not_called()
+        file_repository_mock.store.assert_not_called()
+
+    def test_store_file(self, service, file_repository_mock):
+        """Test that metadata of an uploaded file are stored."""
+
+        service.store_file(FILE_HASH, f"/data/user/files/{FILE_HASH}_file.cif", "user123")
+
+        stored = file_repository_mock.store.call_args.args[1]
+        assert (stored.user_id, stored.file_name, stored.size) == ("user123", "file.cif", 100)
+        assert stored.molecule_set_id == FILE_HASH
+
+    def test_store_file_guest(self, service, file_repository_mock):
+        """Test that metadata of guest files are not stored."""
+
+        service.store_file(FILE_HASH, f"/data/guest/files/{FILE_HASH}_file.cif", None)
+
+        file_repository_mock.store.assert_not_called()
+
+    def test_remove_file(self, service, io_mock, file_repository_mock, session_manager_mock):
+        """Test that a file is removed together with its metadata."""
+
+        service.remove_file(FILE_HASH, "user123")
+
+        io_mock.remove_file.assert_called_once_with(FILE_HASH, "user123")
+        file_repository_mock.delete.assert_called_once_with(
+            session_manager_mock.session().__enter__(), "user123", [FILE_HASH]
+        )
@@ -0,0 +1,107 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import Mock
+import pytest
+
+from app.integrations.io.io import IOLocal
+from app.services.guest_eviction import GuestEvictionService
+from app.services.io import IOService
+
+
+@pytest.fixture
+def io_service(tmp_path):
+    service = IOService(IOLocal(), Mock())
+    service.workdir = tmp_path
+    service.guest_file_quota = 1000
+    service.guest_compute_quota = 1000
+    return service
+
+
+@pytest.fixture
+def service(io_service):
+    return GuestEvictionService(Mock(), io_service, low_water_mark=0.6, batch_size=2)
+
+
+def create_file(io_service: IOService, name: str, size: int, modified: float) -> str:
+    path = Path(io_service.get_file_storage_path()) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (modified, modified))
+    return name
+
+
+def create_computation(io_service: IOService, computation_id: str, size: int) -> str:
+    path = Path(io_service.get_charges_path(computation_id))
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "mol.fw2.cif").write_bytes(b"x" * size)
+    return computation_id
+
+
+class TestGuestEvictionService:
+    def test_no_eviction_under_quota(self, service, io_service):
+        """Test that nothing is evicted when guest storage is under quota."""
+        now = time.time()
+        create_file(io_service, f"{'a' * 64}_file1.pdb", 400, now)
+
+        service.run_once()
+
+        assert len(io_service.listdir(io_service.get_file_storage_path())) == 1
+        metrics = service.get_metrics()
+        assert metrics["runs"] == 1
+        assert metrics["evicted_files"] == 0
+        assert metrics["files_bytes"] == 400
+
+    def test_evicts_least_recently_used_files(self, service, io_service):
+        """Test that least recently accessed files are evicted to the low-water mark."""
+        now = time.time()
+        files = [
+            create_file(io_service, f"{char * 64}_file.pdb", 300, now - 100 + i)
+            for i, char in enumerate("abcd")
+        ]
+
+        # oldest file was accessed recently
+        io_service.get_filepath("a" * 64)
+
+        service.run_once()
+
+        assert sorted(io_service.listdir(io_service.get_file_storage_path())) == [
+            files[0],
+            files[3],
+        ]
+        assert io_service.get_usage()["files"] == 600
+        metrics = service.get_metrics()
+        assert metrics["evicted_files"] == 2
+        assert metrics["freed_bytes"] == 600
+        assert metrics["tracked_files"] == 1  # only accessed files are tracked
+
+    def test_evicts_computations(self, service, io_service):
+        """Test that least recently accessed computations are evicted."""
+        create_computation(io_service, "comp1", 600)
+        create_computation(io_service, "comp2", 600)
+        io_service.update_json(
+            io_service._get_usage_path(io_service.get_storage_path(None)),
+            lambda _: {"files": 0, "computations": 1200},
+        )
+        io_service.record_guest_access("computations", "comp2")
+        io_service.record_guest_access("computations", "comp1")
+
+        service.run_once()
+
+        assert io_service.listdir(io_service.get_computations_path()) == ["comp1"]
+        assert service.get_metrics()["evicted_computations"] == 1
+
+    def test_skips_when_lease_is_held(self, service, io_service):
+        """Test that only one process evicts at a time."""
+        now = time.time()
+        create_file(io_service, f"{'a' * 64}_file.pdb", 2000, now)
+
+        io_service.update_json(
+            service._get_index_path(),
+            lambda _: {**service._empty_index(), "lease_until": now + 100},
+        )
+
+        service.run_once()
+
+        assert len(io_service.listdir(io_service.get_file_storage_path())) == 1
+        assert service.get_metrics()["runs"] == 0
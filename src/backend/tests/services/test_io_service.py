@@ -1,9 +1,13 @@
 import datetime
 import json
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import ANY, AsyncMock, Mock, patch
 import pytest
 
+from fastapi import UploadFile
+
+from app.integrations.io.io import IOLocal
 from app.models.calculation import CalculationConfigDto
 from app.services.io import IOService
 
@@ -15,7 +19,13 @@ def async_io_mock():
 
 @pytest.fixture
 def io_mock():
-    return Mock()
+    mock = Mock()
+    mock.readlink.return_value = None
+    mock.file_size.return_value = 0
+    mock.dir_size.return_value = 0
+    mock.read_json.return_value = None
+    mock.update_json.side_effect = lambda path, update: update(mock.read_json(path))
+    return mock
 
 
 @pytest.fixture
@@ -92,6 +102,44 @@ class TestIOService:
 
         logger_mock.error.assert_called_once()
 
+    def test_move_dir_contents(self, io_service, io_mock):
+        """Test moving contents of a directory."""
+        io_mock.listdir.return_value = ["mol1.fw2.cif", "mol1.pqr"]
+
+        io_service.move_dir_contents("/tmp/charges", "/charges")
+
+        assert io_mock.move.call_args_list == [
+            (("/tmp/charges/mol1.fw2.cif", "/charges/mol1.fw2.cif"),),
+            (("/tmp/charges/mol1.pqr", "/charges/mol1.pqr"),),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_outputs_marker(self, async_io_service, async_io_mock):
+        """Test marking output files of a computation as generated."""
+        async_io_service.workdir = Path("/workdir")
+        async_io_mock.path_exists = Mock(return_value=True)
+
+        await async_io_service.mark_outputs_generated("comp123", "user123")
+
+        marker = "/workdir/user/user123/computations/comp123/outputs.done"
+        async_io_mock.write_file.assert_awaited_once_with(marker, "")
+        assert async_io_service.outputs_generated("comp123", "user123")
+        async_io_mock.path_exists.assert_called_once_with(marker)
+
+    def test_invalidate_outputs(self, io_service, io_mock):
+        """Test removing generated output files of a computation."""
+        io_service.workdir = Path("/workdir")
+        io_mock.path_exists.return_value = True
+        io_mock.dir_size.return_value = 100
+
+        with patch.object(io_service, "record_usage") as record_usage:
+            io_service.invalidate_outputs("comp123", "user123")
+
+        computation_path = "/workdir/user/user123/computations/comp123"
+        io_mock.rm.assert_called_once_with(f"{computation_path}/outputs.done")
+        io_mock.rmdir.assert_called_once_with(f"{computation_path}/charges")
+        record_usage.assert_called_once_with("user123", computations=-100)
+
     def test_remove_file(self, io_service, io_mock, logger_mock, test_data):
         """Test removing a file."""
         filepath = f"/test/path/{test_data['filename']}"
@@ -101,6 +149,20 @@ class TestIOService:
             io_mock.rm.assert_called_once_with(filepath)
             logger_mock.info.assert_called_once()
 
+    def test_remove_file_unindexes(self, io_service, io_mock, test_data):
+        """Test that removed file is removed from the index."""
+        file_hash = test_data["file_hash"]
+        user_id = test_data["user_id"]
+        filename = f"{file_hash}_test_file.txt"
+        filepath = f"/test/path/{filename}"
+        io_mock.readlink.return_value = f"../files/{filename}"
+
+        with patch.object(io_service, "get_filepath", return_value=filepath):
+            io_service.remove_file(file_hash, user_id)
+
+            link_path = str(Path(io_service.get_file_index_path(user_id)) / file_hash)
+            assert io_mock.rm.call_args_list == [((filepath,),), ((link_path,),)]
+
     def test_remove_file_not_found(self, io_service, io_mock, test_data):
         """Test handling when file to remove is not found."""
         with patch.object(io_service, "get_filepath", return_value=None):
@@ -119,41 +181,61 @@ class TestIOService:
 
             logger_mock.error.assert_called_once()
 
-    def test_zip_charges(self, io_service, io_mock):
-        """Test creating an archive from directory."""
+    def test_get_charges_archive(self, io_service, io_mock):
+        """Test getting cached archive path and entries of a directory."""
         directory = "/test/directory"
-        archive_path = "/test/directory/archive"
-        expected_result = f"{archive_path}.zip"
+        file_hash = "a" * 64
 
         io_mock.listdir.return_value = [
-            "hash1_file1.pqr",
-            "hash1_file2.txt",
-            "hash1_file3.mol2",
-            "hash1_file4.cif",
+            f"{file_hash}_file1.pqr",
+            f"{file_hash}_file2.txt",
+            f"{file_hash}_file3.mol2",
+            "file4.fw2.cif",
+            "config.json",
+            ".archives",
+        ]
+        io_mock.file_size.return_value = 10
+        io_mock.last_modified.return_value = datetime.datetime(2025, 1, 1)
+
+        archive_path, entries = io_service.get_charges_archive(directory)
+
+        assert archive_path.startswith("/test/directory/.archives/")
+        assert archive_path.endswith(".zip")
+        assert entries == [
+            (f"/test/directory/{file_hash}_file1.pqr", "pqr/file1.pqr"),
+            (f"/test/directory/{file_hash}_file2.txt", "txt/file2.txt"),
+            (f"/test/directory/{file_hash}_file3.mol2", "mol2/file3.mol2"),
+            ("/test/directory/file4.fw2.cif", "cif/file4.fw2.cif"),
         ]
-        io_mock.zip.return_value = expected_result
+        io_mock.cp.assert_not_called()
 
-        with patch.object(io_service, "parse_filename", return_value=("hash", "filename")):
-            result = io_service.zip_charges(directory)
+        # archive is invalidated when output files change
+        io_mock.last_modified.return_value = datetime.datetime(2025, 1, 2)
+        assert io_service.get_charges_archive(directory)[0] != archive_path
 
-            assert io_mock.mkdir.call_count == 5  # archive dir + 4 extension dirs
+    def test_get_charges_archive_exception(self, io_service, io_mock, logger_mock):
+        """Test handling exceptions when listing archived files."""
+        io_mock.listdir.side_effect = Exception("Failed to list directory")
 
-            assert io_mock.cp.call_count == len(io_mock.listdir.return_value)
+        with pytest.raises(Exception):
+            io_service.get_charges_archive("/test/directory")
 
-            io_mock.zip.assert_called_once_with(archive_path, archive_path)
-            assert result == expected_result
+        logger_mock.error.assert_called_once()
 
-    def test_zip_charges_exception(self, io_service, io_mock, logger_mock):
-        """Test handling exceptions when creating an archive."""
-        directory = "/test/directory"
-        io_mock.path_exists.return_value = False
+    def test_stream_charges_archive(self, io_service, io_mock):
+        """Test streaming an archive and removing outdated cached archives."""
+        archive_path = "/test/directory/.archives/new.zip"
+        entries = [("/test/directory/file.fw2.cif", "cif/file.fw2.cif")]
 
-        io_mock.mkdir.side_effect = Exception("Failed to create directory")
+        io_mock.path_exists.return_value = True
+        io_mock.zip_stream.return_value = iter([b"chunk1", b"chunk2"])
+        io_mock.listdir.return_value = ["old.zip", "new.zip", "new.zip.1234.tmp"]
 
-        with pytest.raises(Exception):
-            io_service.zip_charges(directory)
+        result = b"".join(io_service.stream_charges_archive(archive_path, entries))
 
-        logger_mock.error.assert_called_once()
+        assert result == b"chunk1chunk2"
+        io_mock.zip_stream.assert_called_once_with(entries, archive_path)
+        io_mock.rm.assert_called_once_with("/test/directory/.archives/old.zip")
 
     def test_listdir(self, io_service, io_mock):
         """Test listing directory contents."""
@@ -295,15 +377,18 @@ class TestIOService:
             patch.object(io_service, "get_inputs_path", return_value=inputs_path),
             patch.object(io_service, "get_file_storage_path", return_value=files_path),
         ):
-            io_mock.listdir.return_value = [test_data["filename"]]
-            with patch.object(
-                io_service, "parse_filename", return_value=(test_data["file_hash"], "test_file.txt")
-            ):
-                io_service.prepare_inputs(user_id, computation_id, file_hashes)
+            io_mock.readlink.return_value = f"../files/{test_data['filename']}"
+            io_mock.path_exists.return_value = True
 
-                src_path = str(Path(files_path) / test_data["filename"])
-                dst_path = str(Path(inputs_path) / test_data["filename"])
-                io_mock.symlink.assert_called_once_with(src_path, dst_path)
+            io_service.prepare_inputs(user_id, computation_id, file_hashes)
+
+            src_path = str(Path(files_path) / test_data["filename"])
+            dst_path = str(Path(inputs_path) / test_data["filename"])
+            pin_path = str(
+                Path(io_service.get_blob_pins_path(computation_id)) / test_data["file_hash"]
+            )
+            io_mock.link.assert_called_once_with(src_path, pin_path)
+            io_mock.symlink.assert_called_once_with(pin_path, dst_path)
 
     def test_prepare_inputs_file_not_found(self, io_service, io_mock, logger_mock, test_data):
         """Test preparing inputs when file is not found."""
@@ -317,7 +402,7 @@ class TestIOService:
             patch.object(io_service, "get_inputs_path", return_value=inputs_path),
             patch.object(io_service, "get_file_storage_path", return_value=files_path),
         ):
-            io_mock.listdir.return_value = []
+            io_mock.path_exists.return_value = True
 
             io_service.prepare_inputs(user_id, computation_id, file_hashes)
 
@@ -362,38 +447,82 @@ class TestIOService:
             logger_mock.error.assert_called_once()
 
     def test_get_filepath(self, io_service, io_mock, test_data):
-        """Test getting filepath for a file hash."""
+        """Test getting filepath of an indexed file without listing the storage."""
+        file_hash = test_data["file_hash"]
+        filename = f"{file_hash}_test_file.txt"
+
+        storage_path = "/test/files/path"
+        with patch.object(io_service, "get_file_storage_path", return_value=storage_path):
+            io_mock.readlink.return_value = f"../files/{filename}"
+            io_mock.path_exists.return_value = True
+
+            result = io_service.get_filepath(file_hash, test_data["user_id"])
+
+            assert result == str(Path(storage_path) / filename)
+            io_mock.listdir.assert_not_called()
+
+    def test_get_filepath_builds_index(self, io_service, io_mock, test_data):
+        """Test that files stored before the index existed are indexed once."""
         file_hash = test_data["file_hash"]
         user_id = test_data["user_id"]
-        filename = test_data["filename"]
+        filename = f"{file_hash}_test_file.txt"
+        marker_path = io_service.get_file_index_marker_path(user_id)
+        index_path = io_service.get_file_index_path(user_id)
+
+        links = {}
+        io_mock.replace_symlink.side_effect = lambda src, dst: links.update({dst: src})
+        io_mock.readlink.side_effect = links.get
+        io_mock.path_exists.side_effect = lambda path: path != marker_path
+        io_mock.listdir.return_value = [filename, "invalid.txt"]
 
         storage_path = "/test/files/path"
         with patch.object(io_service, "get_file_storage_path", return_value=storage_path):
-            io_mock.listdir.return_value = [filename]
+            result = io_service.get_filepath(file_hash, user_id)
+
+        assert result == str(Path(storage_path) / filename)
+        io_mock.replace_symlink.assert_called_once_with(
+            str(Path("..") / "files" / filename), str(Path(index_path) / file_hash)
+        )
+        io_mock.update_json.assert_called_once_with(marker_path, ANY)
 
-            with patch.object(
-                io_service, "parse_filename", return_value=(file_hash, "test_file.txt")
-            ):
-                result = io_service.get_filepath(file_hash, user_id)
+    def test_get_filepath_invalid_hash(self, io_service, io_mock):
+        """Test that invalid hashes are not looked up."""
+        result = io_service.get_filepath("../../etc/passwd")
 
-                expected_path = str(Path(storage_path) / filename)
-                assert result == expected_path
+        assert result is None
+        io_mock.readlink.assert_not_called()
+        io_mock.listdir.assert_not_called()
 
     def test_get_filepath_not_found(self, io_service, io_mock, logger_mock, test_data):
-        """Test getting filepath when file hash is not found."""
+        """Test that a file missing from a built index is not searched for."""
         file_hash = test_data["file_hash"]
         user_id = test_data["user_id"]
 
         storage_path = "/test/files/path"
         with patch.object(io_service, "get_file_storage_path", return_value=storage_path):
-            io_mock.listdir.return_value = ["other_hash_file.txt"]
+            io_mock.path_exists.return_value = True
 
-            with patch.object(
-                io_service, "parse_filename", return_value=("other_hash", "file.txt")
-            ):
-                result = io_service.get_filepath(file_hash, user_id)
+            result = io_service.get_filepath(file_hash, user_id)
 
-                assert result is None
+            assert result is None
+            io_mock.listdir.assert_not_called()
+            io_mock.update_json.assert_not_called()
+
+    def test_get_filepath_deleted(self, io_service, io_mock, test_data):
+        """Test getting filepath when indexed file no longer exists."""
+        file_hash = test_data["file_hash"]
+        filename = f"{file_hash}_test_file.txt"
+        marker_path = io_service.get_file_index_marker_path(test_data["user_id"])
+
+        storage_path = "/test/files/path"
+        with patch.object(io_service, "get_file_storage_path", return_value=storage_path):
+            io_mock.readlink.return_value = f"../files/{filename}"
+            io_mock.path_exists.side_effect = lambda path: path == marker_path
+
+            result = io_service.get_filepath(file_hash, test_data["user_id"])
+
+            assert result is None
+            io_mock.listdir.assert_not_called()
 
     def test_get_filepath_exception(self, io_service, io_mock, logger_mock, test_data):
         """Test handling exceptions when getting filepath."""
@@ -402,7 +531,8 @@ class TestIOService:
 
         storage_path = "/test/files/path"
         with patch.object(io_service, "get_file_storage_path", return_value=storage_path):
-            io_mock.listdir.side_effect = Exception("Failed to list directory")
+            io_mock.path_exists.return_value = True
+            io_mock.readlink.side_effect = Exception("Failed to read link")
 
             with pytest.raises(Exception):
                 io_service.get_filepath(file_hash, user_id)
@@ -467,97 +597,45 @@ class TestIOService:
 
             logger_mock.error.assert_called_once()
 
-    def test_free_guest_file_space_no_need(self, io_service, io_mock, logger_mock):
-        """Test freeing guest file space when there's enough space."""
-        path = "/test/guest/files"
-        amount_to_free = 1000
-
-        with patch.object(io_service, "get_file_storage_path", return_value=path):
-            # sufficient space
-            io_mock.dir_size.return_value = 1000  # currently using 1000 bytes
-            io_service.guest_file_quota = 10000
+    def test_remove_guest_file(self, io_service, io_mock):
+        """Test removing a guest file."""
+        io_service.workdir = Path("/workdir")
+        file_name = f"{'a' * 64}_file.pdb"
+        io_mock.file_size.return_value = 1000
+        io_mock.readlink.return_value = f"../files/{file_name}"
 
-            io_service.free_guest_file_space(amount_to_free)
+        result = io_service.remove_guest_file(file_name)
 
-            io_mock.rm.assert_not_called()
-            logger_mock.info.assert_called_with(
-                "Guest file space is sufficient. No need to free space."
-            )
+        assert result == 1000
+        io_mock.rm.assert_any_call(f"/workdir/guest/files/{file_name}")
+        io_mock.rm.assert_any_call(f"/workdir/guest/index/{'a' * 64}")
 
-    def test_free_guest_file_space_success(self, io_service, io_mock, logger_mock):
-        """Test successfully freeing guest file space."""
-        path = "/test/guest/files"
-        amount_to_free = 1000
-
-        with patch.object(io_service, "get_file_storage_path", return_value=path):
-            # insufficient space
-            io_mock.dir_size.return_value = 2000  # currently using 2000 bytes
-            io_service.guest_file_quota = 2500
-
-            files = ["file1.txt", "file2.txt"]
-            io_mock.listdir.return_value = files
-            io_mock.last_modified.side_effect = [
-                datetime.datetime(2023, 1, 1),  # file1 is older
-                datetime.datetime(2023, 1, 2),  # file2 is newer
-            ]
-            io_mock.file_size.return_value = 1000  # each file is 1000 bytes
-
-            io_service.free_guest_file_space(amount_to_free)
-
-            # oldest file was deleted
-            io_mock.rm.assert_called_once_with(str(Path(path) / "file1.txt"))
-
-    def test_free_guest_file_space_not_enough_space(self, io_service, io_mock, logger_mock):
-        """Test freeing guest file space when there's not enough space to free."""
-        path = "/test/guest/files"
-        amount_to_free = 3000
-
-        with patch.object(io_service, "get_file_storage_path", return_value=path):
-            # insufficient space
-            io_mock.dir_size.return_value = 2000  # currently using 2000 bytes
-            io_service.guest_file_quota = 1000  # quota is smaller than used space
-
-            with pytest.raises(ValueError, match="Not enough space to free."):
-                io_service.free_guest_file_space(amount_to_free)
-
-    def test_free_guest_compute_space_no_need(self, io_service, io_mock, logger_mock):
-        """Test freeing guest compute space when there's enough space."""
-        path = "/test/guest/computations"
-
-        with patch.object(io_service, "get_computations_path", return_value=path):
-            # insufficient space
-            io_mock.dir_size.return_value = 1000  # currently using 1000 bytes
-            io_service.guest_compute_quota = 2000
-
-            io_service.free_guest_compute_space()
-
-            # Check no computations were deleted
-            io_mock.rmdir.assert_not_called()
-            logger_mock.info.assert_called_with(
-                "Guest compute space is sufficient. No need to free space."
-            )
+    def test_remove_guest_computation(self, io_service, io_mock):
+        """Test removing a guest computation."""
+        io_service.workdir = Path("/workdir")
+        io_mock.dir_size.return_value = 1500
 
-    def test_free_guest_compute_space_success(self, io_service, io_mock, logger_mock):
-        """Test successfully freeing guest compute space."""
-        path = "/test/guest/computations"
+        result = io_service.remove_guest_computation("comp1")
 
-        with patch.object(io_service, "get_computations_path", return_value=path):
-            # insufficient space
-            io_mock.dir_size.return_value = 3000  # currently using 3000 bytes
-            io_service.guest_compute_quota = 2000
+        assert result == 1500
+        io_mock.rmdir.assert_any_call("/workdir/guest/computations/comp1")
+        io_mock.rmdir.assert_any_call("/workdir/blobs/pins/comp1")
 
-            computations = ["comp1", "comp2"]
-            io_mock.listdir.return_value = computations
-            io_mock.last_modified.side_effect = [
-                datetime.datetime(2023, 1, 1),  # comp1 is older
-                datetime.datetime(2023, 1, 2),  # comp2 is newer
-            ]
-            io_mock.dir_size.side_effect = [3000, 1500]
+    def test_guest_accesses(self, io_service, io_mock):
+        """Test recording accesses to guest files."""
+        io_service.workdir = Path("/workdir")
+        file_hash = "a" * 64
+        io_mock.readlink.return_value = f"../files/{file_hash}_file.pdb"
+        io_mock.path_exists.return_value = True
 
-            io_service.free_guest_compute_space()
+        io_service.get_filepath(file_hash)
+        io_service.get_filepath(file_hash, "user1")
+        io_service.record_guest_access("computations", "comp1")
 
-            # oldest computation was deleted
-            io_mock.rmdir.assert_called_once_with(str(Path(path) / "comp1"))
+        accesses = io_service.pop_guest_accesses()
+        assert list(accesses["files"]) == [f"{file_hash}_file.pdb"]
+        assert list(accesses["computations"]) == ["comp1"]
+        assert io_service.pop_guest_accesses() == {"files": {}, "computations": {}}
 
     def test_delete_computation(self, io_service, io_mock, test_data):
         """Test deleting a computation."""
@@ -568,7 +646,8 @@ class TestIOService:
         with patch.object(io_service, "get_computation_path", return_value=comp_path):
             io_service.delete_computation(computation_id, user_id)
 
-            io_mock.rmdir.assert_called_once_with(comp_path)
+            io_mock.rmdir.assert_any_call(comp_path)
+            io_mock.rmdir.assert_any_call(io_service.get_blob_pins_path(computation_id))
 
     def test_delete_computation_exception(self, io_service, io_mock, logger_mock, test_data):
         """Test handling exceptions when deleting a computation."""
@@ -622,7 +701,7 @@ class TestIOService:
         quota = 5000
 
         with patch.object(io_service, "get_storage_path", return_value=storage_path):
-            io_mock.dir_size.return_value = used_space
+            io_mock.read_json.return_value = {"files": 600, "computations": 400}
             io_service.user_quota = quota
 
             result_used, result_available, result_quota = io_service.get_quota(user_id)
@@ -639,7 +718,7 @@ class TestIOService:
         compute_quota = 3000
 
         with patch.object(io_service, "get_storage_path", return_value=storage_path):
-            io_mock.dir_size.return_value = used_space
+            io_mock.read_json.return_value = {"files": 600, "computations": 400}
             io_service.guest_file_quota = file_quota
             io_service.guest_compute_quota = compute_quota
 
@@ -649,6 +728,146 @@ class TestIOService:
             assert result_available == (file_quota + compute_quota) - used_space
             assert result_quota == file_quota + compute_quota
 
+    def test_get_quota_initializes_ledger(self, io_service, io_mock):
+        """Test that missing usage ledger is initialized from the file system."""
+        io_service.workdir = Path("/workdir")
+        io_service.user_quota = 5000
+        io_mock.dir_size.side_effect = [300, 200]
+
+        result = io_service.get_quota("user1")
+
+        assert result == (500, 4500, 5000)
+        assert io_mock.dir_size.call_args_list == [
+            (("/workdir/user/user1/files",),),
+            (("/workdir/user/user1/computations",),),
+        ]
+        assert io_mock.update_json.call_args.args[0] == "/workdir/user/user1/usage.json"
+
+    def test_record_usage(self, io_service, io_mock):
+        """Test recording change of used space."""
+        io_service.workdir = Path("/workdir")
+        io_mock.read_json.return_value = {"files": 1000, "computations": 500}
+
+        io_service.record_usage("user1", files=-1500, computations=100)
+
+        update = io_mock.update_json.call_args.args[1]
+        assert update({"files": 1000, "computations": 500}) == {
+            "files": 0,
+            "computations": 600,
+        }
+
+    @pytest.mark.asyncio
+    async def test_store_upload_file_records_usage(self, io_service, io_mock):
+        """Test that uploaded files are added to the ledger unless uploaded before."""
+        io_service.workdir = Path("/workdir")
+        directory = "/workdir/user/user1/files"
+        io_mock.store_blob = AsyncMock(return_value=("/workdir/blobs/ha/hash", "hash"))
+        io_mock.file_size.return_value = 100
+        io_mock.read_json.return_value = {"files": 1000, "computations": 0}
+
+        io_mock.path_exists.return_value = False
+        path, _, created = await io_service.store_upload_file(Mock(filename="file.pdb"), directory)
+
+        assert path == f"{directory}/hash_file.pdb"
+        assert created
+        io_mock.store_blob.assert_called_once_with(ANY, "/workdir/blobs")
+        io_mock.link.assert_called_once_with("/workdir/blobs/ha/hash", path)
+        io_mock.update_json.assert_called_once()
+        assert io_mock.update_json.call_args.args[0] == "/workdir/user/user1/usage.json"
+
+        io_mock.update_json.reset_mock()
+        io_mock.readlink.return_value = "../files/hash_file.pdb"
+        io_mock.path_exists.return_value = True
+
+        _, _, created = await io_service.store_upload_file(Mock(filename="file.pdb"), directory)
+
+        io_mock.update_json.assert_not_called()
+        assert not created
+
+    @pytest.mark.asyncio
+    async def test_store_upload_file_blob_released(self, io_service, io_mock):
+        """Test that a blob released by a concurrent removal is stored again."""
+        io_service.workdir = Path("/workdir")
+        directory = "/workdir/user/user1/files"
+        io_mock.store_blob = AsyncMock(return_value=("/workdir/blobs/ha/hash", "hash"))
+        io_mock.link.side_effect = [FileNotFoundError(), None]
+        file = Mock(filename="file.pdb", seek=AsyncMock())
+
+        path, _, _ = await io_service.store_upload_file(file, directory)
+
+        assert io_mock.store_blob.await_count == 2
+        file.seek.assert_awaited_once_with(0)
+        io_mock.link.assert_called_with("/workdir/blobs/ha/hash", path)
+
+    def test_remove_file_releases_blob(self, io_service, io_mock, test_data):
+        """Test that blob of a removed file is removed once no file links to it."""
+        io_service.workdir = Path("/workdir")
+        file_hash = test_data["file_hash"]
+        filepath = f"/test/path/{file_hash}_test_file.txt"
+        blob_path = f"/workdir/blobs/{file_hash[:2]}/{file_hash}"
+
+        with patch.object(io_service, "get_filepath", return_value=filepath):
+            io_mock.link_count.return_value = 2
+            io_service.remove_file(file_hash, test_data["user_id"])
+            assert ((blob_path,),) not in io_mock.rm.call_args_list
+
+            io_mock.link_count.return_value = 1
+            io_service.remove_file(file_hash, test_data["user_id"])
+            io_mock.rm.assert_called_with(blob_path)
+
+    @pytest.mark.asyncio
+    async def test_inputs_outlive_removed_files(self, tmp_path, logger_mock):
+        """Test that inputs of a computation are kept until the computation is deleted."""
+        io_service = IOService(IOLocal(), logger_mock)
+        io_service.workdir = tmp_path
+        io_service.create_dir(io_service.get_file_storage_path("user1"))
+
+        path, file_hash, _ = await io_service.store_upload_file(
+            UploadFile(BytesIO(b"content"), filename="file.pdb"),
+            io_service.get_file_storage_path("user1"),
+        )
+        blob_path = Path(io_service.get_blob_storage_path()) / file_hash[:2] / file_hash
+        io_service.create_dir(io_service.get_computation_path("comp1", "user1"))
+        io_service.prepare_inputs("user1", "comp1", [file_hash])
+
+        io_service.remove_file(file_hash, "user1")
+
+        input_path = Path(io_service.get_inputs_path("comp1", "user1")) / Path(path).name
+        assert input_path.read_bytes() == b"content"
+        assert blob_path.exists()
+
+        io_service.delete_computation("comp1", "user1")
+
+        assert not blob_path.exists()
+        assert not Path(io_service.get_blob_pins_path("comp1")).exists()
+
+    def test_reconcile_usage(self, io_service, io_mock):
+        """Test reconciling ledgers with the file system."""
+        io_service.workdir = Path("/workdir")
+        io_mock.listdir.return_value = ["user1"]
+        io_mock.dir_size.return_value = 100
+        io_mock.update_json.side_effect = lambda path, update: update(
+            {"files": 0, "computations": 0, "reconciled_at": 0}
+        )
+
+        io_service.reconcile_usage()
+
+        paths = [call.args[0] for call in io_mock.update_json.call_args_list]
+        assert paths == ["/workdir/guest/usage.json", "/workdir/user/user1/usage.json"]
+        assert io_mock.dir_size.call_count == 4
+
+    def test_reconcile_usage_skips_recent(self, io_service, io_mock):
+        """Test that recently reconciled ledgers are not scanned again."""
+        io_service.workdir = Path("/workdir")
+        io_mock.listdir.return_value = []
+        now = datetime.datetime.now().timestamp()
+        current = {"files": 0, "computations": 0, "reconciled_at": now}
+        io_mock.update_json.side_effect = lambda path, update: update(current)
+
+        io_service.reconcile_usage(max_age=60)
+
+        io_mock.dir_size.assert_not_called()
+
     def test_environment_variables(self, io_service):
         """Test that environment variables are properly loaded."""
         assert isinstance(io_service.workdir, Path)
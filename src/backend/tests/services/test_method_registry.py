@@ -0,0 +1,80 @@
+from unittest.mock import Mock
+import pytest
+
+from app.models.method import Method
+from app.models.parameters import Parameters
+from app.services.method_registry import MethodRegistry
+
+
+def get_method(internal_name: str, has_parameters: bool) -> Method:
+    return Method(
+        internal_name=internal_name,
+        name=internal_name,
+        full_name=internal_name,
+        publication=None,
+        type="3D",
+        has_parameters=has_parameters,
+    )
+
+
+def get_parameters(internal_name: str, method: str) -> Parameters:
+    return Parameters(
+        internal_name=internal_name, full_name=internal_name, method=method, publication=""
+    )
+
+
+@pytest.fixture
+def chargefw2_mock():
+    mock = Mock()
+    mock.get_available_methods.return_value = [
+        get_method("eem", True),
+        get_method("formal", False),
+    ]
+    mock.get_available_parameters.side_effect = lambda method: [
+        get_parameters(f"{method}_params1", method),
+        get_parameters(f"{method}_params2", method),
+    ]
+    return mock
+
+
+class TestMethodRegistry:
+    def test_from_chargefw2(self, chargefw2_mock):
+        """Test that methods and parameters are loaded from ChargeFW2 once."""
+
+        registry = MethodRegistry.from_chargefw2(chargefw2_mock)
+
+        assert [method.internal_name for method in registry.methods] == ["eem", "formal"]
+        assert [p.internal_name for p in registry.get_parameters("eem")] == [
+            "eem_params1",
+            "eem_params2",
+        ]
+        assert registry.get_parameters("formal") == []
+        # parameters are loaded only for methods having them
+        chargefw2_mock.get_available_parameters.assert_called_once_with("eem")
+
+    def test_lookups(self, chargefw2_mock):
+        """Test looking up methods and parameters by their internal names."""
+
+        registry = MethodRegistry.from_chargefw2(chargefw2_mock)
+
+        assert registry.has_method("eem")
+        assert not registry.has_method("unknown")
+        assert registry.find_parameters("eem", "eem_params2") == get_parameters(
+            "eem_params2", "eem"
+        )
+        assert registry.find_parameters("eem", "unknown") is None
+        assert registry.find_parameters("unknown", "eem_params1") is None
+        assert registry.get_parameters("unknown") == []
+
+    def test_immutable(self, chargefw2_mock):
+        """Test that the catalogue can not be modified through returned values."""
+
+        registry = MethodRegistry.from_chargefw2(chargefw2_mock)
+
+        registry.methods.clear()
+        registry.get_parameters("eem").clear()
+
+        assert len(registry.methods) == 2
+        assert len(registry.get_parameters("eem")) == 2
+        with pytest.raises(TypeError):
+            registry._methods["other"] = get_method("other", False)
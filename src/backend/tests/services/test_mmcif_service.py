@@ -0,0 +1,123 @@
+from unittest.mock import Mock
+import pytest
+
+from gemmi import cif
+
+from app.models.calculation import (
+    CalculationConfigDto,
+    CalculationDto,
+    CalculationResultDto,
+)
+from app.services.mmcif import MmCIFService
+
+
+STRUCTURE = """data_mol1
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.type_symbol
+HETATM 1 C
+HETATM 2 O
+"""
+
+CHARGES = """
+loop_
+_sb_ncbr_partial_atomic_charges_meta.id
+_sb_ncbr_partial_atomic_charges_meta.type
+_sb_ncbr_partial_atomic_charges_meta.method
+1 'empirical' 'eem/old'
+
+loop_
+_sb_ncbr_partial_atomic_charges.type_id
+_sb_ncbr_partial_atomic_charges.atom_id
+_sb_ncbr_partial_atomic_charges.charge
+1 1  0.5000
+1 2 -0.5000
+"""
+
+TRAILING = """
+loop_
+_chem_comp.id
+UNL
+"""
+
+
+@pytest.fixture
+def io_mock(tmp_path):
+    mock = Mock()
+    mock.get_charges_path.return_value = str(tmp_path)
+    return mock
+
+
+@pytest.fixture
+def service(io_mock):
+    return MmCIFService(Mock(), io_mock)
+
+
+@pytest.fixture
+def calculations():
+    def result(method: str, charges: list[float]) -> CalculationResultDto:
+        config = CalculationConfigDto(method=method, parameters="params")
+        return CalculationResultDto(
+            config=config,
+            calculations=[
+                CalculationDto(
+                    file="file.cif",
+                    file_hash="hash",
+                    charges={"MOL1": charges},
+                    config=config,
+                )
+            ],
+        )
+
+    return [result("eem", [0.12344, -0.12344]), result("qeq", [1.0, -1.0])]
+
+
+def read_charges(path) -> tuple[list, list]:
+    block = cif.read_file(str(path)).sole_block()
+    meta = block.find("_sb_ncbr_partial_atomic_charges_meta.", ["id", "method"])
+    charges = block.find("_sb_ncbr_partial_atomic_charges.", ["type_id", "atom_id", "charge"])
+
+    return (
+        [[row.str(0), row.str(1)] for row in meta],
+        [[int(row[0]), int(row[1]), float(row[2])] for row in charges],
+    )
+
+
+class TestWriteToMmcif:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "content", [STRUCTURE, STRUCTURE + CHARGES, STRUCTURE + CHARGES + TRAILING]
+    )
+    async def test_write_to_mmcif(self, service, calculations, tmp_path, content):
+        path = tmp_path / "mol1.fw2.cif"
+        path.write_text(content)
+
+        result = await service.write_to_mmcif(None, "computation", calculations)
+
+        assert result["molecules"] == ["MOL1"]
+        assert read_charges(path) == (
+            [["1", "eem/params"], ["2", "qeq/params"]],
+            [[1, 1, 0.1234], [1, 2, -0.1234], [2, 1, 1.0], [2, 2, -1.0]],
+        )
+
+        block = cif.read_file(str(path)).sole_block()
+        assert list(block.find_values("_atom_site.id")) == ["1", "2"]
+
+    def test_strip_charges(self, service):
+        assert service._strip_charges(STRUCTURE + CHARGES) == STRUCTURE + "\n"
+        assert service._strip_charges(STRUCTURE) == STRUCTURE
+
+    def test_strip_charges_not_at_end(self, service):
+        assert service._strip_charges(STRUCTURE + CHARGES + TRAILING) is None
+
+    def test_format_charges(self, service):
+        assert service._format_charges([[0.5, -0.25], [1.0]]) == (
+            "loop_\n"
+            "_sb_ncbr_partial_atomic_charges.type_id\n"
+            "_sb_ncbr_partial_atomic_charges.atom_id\n"
+            "_sb_ncbr_partial_atomic_charges.charge\n"
+            "1 1  0.5000\n"
+            "1 2 -0.2500\n"
+            "2 1  1.0000\n"
+        )
@@ -0,0 +1,116 @@
+import asyncio
+from collections import Counter
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.molecule_records import (
+    SharedRecords,
+    has_multiple_blocks,
+    join_molecules,
+    split_molecules,
+)
+
+
+SDF = """mol1
+  OpenBabel01012500003D
+comment
+  1  0  0  0  0  0  0  0  0  0999 V2000
+M  END
+> <ID>
+1
+
+$$$$
+mol2
+  OpenBabel01012500003D
+comment
+  2  1  0  0  0  0  0  0  0  0999 V2000
+M  END
+$$$$
+"""
+
+MOL2 = """@<TRIPOS>MOLECULE
+mol1
+ 1 0 0 0 0
+@<TRIPOS>ATOM
+      1 C           0.0000    0.0000    0.0000 C.3
+@<TRIPOS>MOLECULE
+mol2
+ 1 0 0 0 0
+@<TRIPOS>ATOM
+      1 O           0.0000    0.0000    0.0000 O.3
+"""
+
+CIF = """# generated
+data_MOL1
+_atom_site.id 1
+data_MOL2
+_atom_site.id 1
+"""
+
+
+class TestSplitMolecules:
+    @pytest.mark.parametrize(
+        "content, extension", [(SDF, "sdf"), (MOL2, "mol2"), (CIF.replace("MOL", "mol"), "cif")]
+    )
+    def test_split_molecules(self, content, extension):
+        records = split_molecules(content, extension)
+
+        assert [record.name for record in records] == ["mol1", "mol2"]
+        assert records[0].fingerprint != records[1].fingerprint
+        assert join_molecules(records) == content
+
+    def test_fingerprint_ignores_header_and_data(self):
+        """Test that program line and data items do not change fingerprints."""
+
+        exported = SDF.replace("OpenBabel01012500003D", "RDKit          3D").replace(
+            "> <ID>\n1\n\n", ""
+        )
+
+        assert [record.fingerprint for record in split_molecules(exported, "sdf")] == [
+            record.fingerprint for record in split_molecules(SDF, "sdf")
+        ]
+
+    @pytest.mark.parametrize(
+        "content, extension",
+        [
+            (SDF.replace("mol2\n", "mol1\n"), "sdf"),
+            (SDF.replace("mol2\n", "\n"), "sdf"),
+            (SDF.rstrip("$\n"), "sdf"),
+            ("data_mol1\n_atom_site.id 1\n", "cif"),
+            ("data_mol1\n", "pdb"),
+            ("header\n" + MOL2, "mol2"),
+        ],
+    )
+    def test_split_molecules_unsupported(self, content, extension):
+        """Test that files which can not be split are detected."""
+
+        assert split_molecules(content, extension) is None
+
+    def test_has_multiple_blocks(self):
+        """Test that lines are read only until the second data block is found."""
+
+        def lines():
+            yield b"# comment\n"
+            yield b"data_MOL1\n"
+            yield b"data_MOL2\n"
+            raise AssertionError("read past the second block")
+
+        assert has_multiple_blocks(lines())
+        assert not has_multiple_blocks([b"data_1ABC\n", b"_atom_site.id 1\n"])
+
+    @pytest.mark.asyncio
+    async def test_shared_records(self):
+        """Test that files are split once and records are released after the last use."""
+
+        records = split_molecules(SDF, "sdf")
+        split = AsyncMock(return_value=records)
+        shared = SharedRecords(split, Counter({"hash1": 2}))
+
+        results = await asyncio.gather(
+            shared.get("hash1", "/file1.sdf"), shared.get("hash1", "/file1.sdf")
+        )
+
+        assert results == [records, records]
+        split.assert_awaited_once_with("/file1.sdf")
+        assert shared._tasks == {}
@@ -0,0 +1,155 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+import pytest
+
+from app.services.molecules_cache import MOLECULES_SIZE_FACTOR, MoleculesCache
+
+
+class TestMoleculesCache:
+    @pytest.mark.asyncio
+    async def test_get_hit(self):
+        """Test that molecules are loaded only once for the same key."""
+
+        cache = MoleculesCache(1024 * 1024)
+        molecules = Mock()
+        load = AsyncMock(return_value=molecules)
+
+        first = await cache.get(("hash1", True, False, True), 100, load)
+        second = await cache.get(("hash1", True, False, True), 100, load)
+
+        assert first is second
+        assert first.molecules == molecules
+        assert first.size == 100 * MOLECULES_SIZE_FACTOR
+        load.assert_awaited_once()
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "entries": 1,
+            "size": 100 * MOLECULES_SIZE_FACTOR,
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_different_settings(self):
+        """Test that different settings are cached separately."""
+
+        cache = MoleculesCache(1024 * 1024)
+        load = AsyncMock(side_effect=[Mock(), Mock()])
+
+        first = await cache.get(("hash1", True, False, True), 100, load)
+        second = await cache.get(("hash1", True, True, True), 100, load)
+
+        assert first is not second
+        assert load.await_count == 2
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_get_concurrent(self):
+        """Test that concurrent requests for the same key load molecules once."""
+
+        cache = MoleculesCache(1024 * 1024)
+        load_count = 0
+
+        async def load():
+            nonlocal load_count
+            load_count += 1
+            await asyncio.sleep(0.01)
+            return Mock()
+
+        results = await asyncio.gather(
+            *[cache.get(("hash1", True, False, True), 100, load) for _ in range(3)]
+        )
+
+        assert load_count == 1
+        assert all(result is results[0] for result in results)
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_get_evicts_least_recently_used(self):
+        """Test that least recently used entries are evicted when the cache is full."""
+
+        cache = MoleculesCache(2 * 100 * MOLECULES_SIZE_FACTOR)
+        load = AsyncMock(side_effect=lambda: Mock())
+
+        await cache.get(("hash1", True, False, True), 100, load)
+        await cache.get(("hash2", True, False, True), 100, load)
+        await cache.get(("hash1", True, False, True), 100, load)
+        await cache.get(("hash3", True, False, True), 100, load)
+        await cache.get(("hash1", True, False, True), 100, load)
+
+        assert load.await_count == 3
+        assert cache.stats()["entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_too_large(self):
+        """Test that molecules larger than the cache are not stored."""
+
+        cache = MoleculesCache(10)
+        load = AsyncMock(side_effect=lambda: Mock())
+
+        await cache.get(("hash1", True, False, True), 100, load)
+        await cache.get(("hash1", True, False, True), 100, load)
+
+        assert load.await_count == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_get_error(self):
+        """Test that failed loads are not cached."""
+
+        cache = MoleculesCache(1024 * 1024)
+        load = AsyncMock(side_effect=[RuntimeError("Invalid file"), Mock()])
+
+        with pytest.raises(RuntimeError):
+            await cache.get(("hash1", True, False, True), 100, load)
+
+        await cache.get(("hash1", True, False, True), 100, load)
+
+        assert load.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_cancelled(self):
+        """Test that waiters load molecules again when the loading request is cancelled."""
+
+        cache = MoleculesCache(1024 * 1024)
+        started = asyncio.Event()
+        loaded = Mock()
+
+        async def slow_load():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def load():
+            return loaded
+
+        loading = asyncio.create_task(cache.get(("hash1", True, False, True), 100, slow_load))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get(("hash1", True, False, True), 100, load))
+        await asyncio.sleep(0)
+
+        loading.cancel()
+        result = await asyncio.wait_for(waiter, timeout=1)
+
+        assert result.molecules is loaded
+        assert loading.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_get_waiter_cancelled(self):
+        """Test that cancelling a waiter does not cancel loading of the molecules."""
+
+        cache = MoleculesCache(1024 * 1024)
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return Mock()
+
+        loading = asyncio.create_task(cache.get(("hash1", True, False, True), 100, load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get(("hash1", True, False, True), 100, load))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert (await loading).molecules is not None
@@ -0,0 +1,170 @@
+import asyncio
+from unittest.mock import Mock
+import httpx
+import pytest
+
+from services.oidc import CachedDocument, OIDCService
+
+
+DISCOVERY_URL = "https://idp.test/.well-known/openid-configuration"
+
+
+class StubIdentityProvider:
+    """Identity provider answering discovery, JWKs and token requests."""
+
+    def __init__(self):
+        self.requests: list[httpx.Request] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        # let concurrent requests reach the provider
+        await asyncio.sleep(0.01)
+
+        match request.url.path:
+            case "/.well-known/openid-configuration":
+                return httpx.Response(
+                    200,
+                    json={
+                        "issuer": "https://idp.test",
+                        "jwks_uri": "https://idp.test/jwks",
+                        "token_endpoint": "https://idp.test/token",
+                    },
+                )
+            case "/jwks":
+                return httpx.Response(200, json={"keys": []})
+            case "/token":
+                return httpx.Response(200, json={"access_token": "token"})
+
+        return httpx.Response(404)
+
+    def count(self, path: str) -> int:
+        return sum(1 for request in self.requests if request.url.path == path)
+
+
+@pytest.fixture
+def idp():
+    return StubIdentityProvider()
+
+
+@pytest.fixture
+def service(idp, monkeypatch):
+    monkeypatch.setenv("OIDC_BASE_URL", "https://acc2.test")
+    monkeypatch.setenv("OIDC_DISCOVERY_URL", DISCOVERY_URL)
+    monkeypatch.setenv("OIDC_REDIRECT_URL", "https://acc2.test/api/v1/auth/callback")
+    monkeypatch.setenv("OIDC_CLIENT_ID", "client")
+    monkeypatch.setenv("OIDC_CLIENT_SECRET", "secret")
+
+    return OIDCService(Mock(), httpx.AsyncClient(transport=httpx.MockTransport(idp)))
+
+
+class TestOIDCService:
+    @pytest.mark.asyncio
+    async def test_get_oidc_config_single_flight(self, service, idp):
+        """Test that concurrent requests fetch the configuration once."""
+
+        configs = await asyncio.gather(*[service.get_oidc_config() for _ in range(10)])
+
+        assert all(config["issuer"] == "https://idp.test" for config in configs)
+        assert idp.count("/.well-known/openid-configuration") == 1
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_get_jwks(self, service, idp):
+        """Test that JWKs are fetched from the discovered endpoint and cached."""
+
+        assert await service.get_jwks() == {"keys": []}
+        assert await service.get_jwks() == {"keys": []}
+
+        assert idp.count("/jwks") == 1
+        assert idp.count("/.well-known/openid-configuration") == 1
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_exchange_code(self, service, idp):
+        """Test that the code is exchanged for tokens at the token endpoint."""
+
+        response = await service.exchange_code("code")
+
+        assert response.json() == {"access_token": "token"}
+        request = idp.requests[-1]
+        assert request.url.path == "/token"
+        assert b"code=code" in request.content
+        assert request.headers["Authorization"].startswith("Basic ")
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_close(self, service):
+        """Test that the shared client is closed."""
+
+        await service.close()
+
+        assert service.client.is_closed
+
+
+class TestCachedDocument:
+    @pytest.mark.asyncio
+    async def test_refresh_in_background(self):
+        """Test that documents close to expiry are returned and refreshed in the background."""
+
+        now = 0.0
+        versions = iter([{"version": 1}, {"version": 2}])
+
+        async def fetch():
+            return next(versions)
+
+        document = CachedDocument(
+            "test", fetch, Mock(), ttl=100, refresh_after=50, timer=lambda: now
+        )
+
+        assert await document.get() == {"version": 1}
+
+        now = 60
+        assert await document.get() == {"version": 1}
+        await asyncio.sleep(0)  # let the refresh run
+
+        assert await document.get() == {"version": 2}
+
+    @pytest.mark.asyncio
+    async def test_expired_document_is_fetched(self):
+        """Test that expired documents are fetched before returning."""
+
+        now = 0.0
+        versions = iter([{"version": 1}, {"version": 2}])
+
+        async def fetch():
+            return next(versions)
+
+        document = CachedDocument(
+            "test", fetch, Mock(), ttl=100, refresh_after=50, timer=lambda: now
+        )
+
+        await document.get()
+        now = 100
+
+        assert await document.get() == {"version": 2}
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_document(self):
+        """Test that a failing background refresh keeps the cached document."""
+
+        now = 0.0
+        logger = Mock()
+        responses = iter([{"version": 1}])
+
+        async def fetch():
+            return next(responses)
+
+        document = CachedDocument(
+            "test", fetch, logger, ttl=100, refresh_after=50, timer=lambda: now
+        )
+
+        await document.get()
+        now = 60
+        await document.get()
+        await asyncio.sleep(0)
+
+        assert await document.get() == {"version": 1}
+        logger.warn.assert_called_once()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import pytest
+
+from services.logging.context import request_id
+from services.logging.queue_logger import QueueLogger, parse_sample_rates
+
+
+class Formatted:
+    """Argument counting how many times it was formatted."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "formatted"
+
+
+@pytest.fixture
+def create_logger(tmp_path, monkeypatch):
+    monkeypatch.setattr(QueueLogger, "logdir", str(tmp_path))
+    loggers = []
+
+    def create(**kwargs) -> QueueLogger:
+        loggers.append(QueueLogger(**kwargs))
+        return loggers[-1]
+
+    yield create
+
+    for logger in loggers:
+        logger.close()
+
+
+def read_records(logger: QueueLogger) -> list[dict]:
+    logger.close()
+
+    with open(logger.handler.baseFilename, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+class TestQueueLogger:
+    def test_writes_json_records(self, create_logger):
+        """Test that records are written as JSON lines."""
+        logger = create_logger()
+
+        logger.info("Storing %s files.", 3)
+        logger.warn("Warning")
+        logger.error("Error")
+
+        records = read_records(logger)
+
+        assert [(record["level"], record["message"]) for record in records] == [
+            ("INFO", "Storing 3 files."),
+            ("WARNING", "Warning"),
+            ("ERROR", "Error"),
+        ]
+        assert all(record["request_id"] is None for record in records)
+
+    @pytest.mark.asyncio
+    async def test_request_id(self, create_logger):
+        """Test that records contain id of the request, also when logged from threads."""
+        logger = create_logger()
+
+        async def handle(current_id: str):
+            request_id.set(current_id)
+            await asyncio.to_thread(logger.info, current_id)
+
+        await asyncio.gather(handle("request1"), handle("request2"))
+
+        records = read_records(logger)
+
+        assert sorted((record["message"], record["request_id"]) for record in records) == [
+            ("request1", "request1"),
+            ("request2", "request2"),
+        ]
+
+    def test_disabled_level_is_not_formatted(self, create_logger):
+        """Test that messages below the level are not formatted."""
+        logger = create_logger(level="WARNING")
+        argument = Formatted()
+
+        logger.info("Skipped %s", argument)
+        logger.warn("Logged %s", argument)
+
+        assert [record["message"] for record in read_records(logger)] == ["Logged formatted"]
+        assert argument.count == 1
+
+    def test_sampling(self, create_logger):
+        """Test that only a fraction of records of sampled levels is logged."""
+        samples = iter([0.05, 0.5, 0.95, 0.05])
+        logger = create_logger(sample_rates={"info": 0.1}, sample=lambda: next(samples))
+        argument = Formatted()
+
+        for i in range(4):
+            logger.info("Info %s %s", i, argument)
+        logger.error("Error")
+
+        assert [record["message"] for record in read_records(logger)] == [
+            "Info 0 formatted",
+            "Info 3 formatted",
+            "Error",
+        ]
+        assert argument.count == 2
+
+    def test_parse_sample_rates(self):
+        """Test parsing sample rates of levels."""
+        assert parse_sample_rates("") == {}
+        assert parse_sample_rates("info=0.1, WARNING=1") == {"INFO": 0.1, "WARNING": 1.0}
+
+        with pytest.raises(ValueError):
+            parse_sample_rates("INFO=2")
+
+        with pytest.raises(ValueError):
+            parse_sample_rates("INFO")
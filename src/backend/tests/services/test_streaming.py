@@ -0,0 +1,61 @@
+import json
+import math
+
+from fastapi.encoders import jsonable_encoder
+
+from api.v1.schemas.response import Response
+from api.v1.streaming import stream_calculation_results
+from models.calculation import CalculationConfigDto, CalculationDto, CalculationResultDto
+
+
+def create_results(charges: dict[str, list[float]]) -> list[CalculationResultDto]:
+    config = CalculationConfigDto(method="eem", parameters="params")
+    calculation = CalculationDto(file="file.sdf", file_hash="hash", charges=charges, config=config)
+
+    return [
+        CalculationResultDto(config=config, calculations=[calculation]),
+        CalculationResultDto(config=CalculationConfigDto(method="qeq"), calculations=[]),
+    ]
+
+
+def streamed(computation_id: str, results: list[CalculationResultDto]):
+    return json.loads(b"".join(stream_calculation_results(computation_id, results)))
+
+
+def non_streamed(computation_id: str, results: list[CalculationResultDto]):
+    return jsonable_encoder(Response(data={"computationId": computation_id, "results": results}))
+
+
+class TestStreamCalculationResults:
+    def test_same_as_response(self):
+        """Test that streamed results are the same as the non-streamed response."""
+
+        results = create_results({"mol1": [0.1, -0.25, 1e-12], "mol2": [], "mół \"3\"": [0.5]})
+
+        assert streamed("comp1", results) == non_streamed("comp1", results)
+
+    def test_empty(self):
+        """Test streaming results without calculations and charges."""
+
+        assert streamed("comp1", []) == non_streamed("comp1", [])
+        assert streamed("comp1", create_results({})) == non_streamed("comp1", create_results({}))
+
+    def test_nan(self):
+        """Test that non-finite charges are streamed as null."""
+
+        results = create_results({"mol1": [math.nan, 0.1, math.inf]})
+        expected = non_streamed("comp1", results)
+        expected["data"]["results"][0]["calculations"][0]["charges"]["mol1"] = [None, 0.1, None]
+
+        assert streamed("comp1", results) == expected
+
+    def test_chunks(self, monkeypatch):
+        """Test that large documents are yielded in multiple chunks."""
+
+        monkeypatch.setattr("api.v1.streaming.CHUNK_SIZE", 64)
+        results = create_results({f"mol{i}": [0.1] * 10 for i in range(10)})
+
+        chunks = list(stream_calculation_results("comp1", results))
+
+        assert len(chunks) > 1
+        assert json.loads(b"".join(chunks)) == non_streamed("comp1", results)
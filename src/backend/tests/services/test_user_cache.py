@@ -0,0 +1,89 @@
+from unittest.mock import Mock
+import pytest
+
+from services.user_cache import UserCache
+
+
+class FakeTimer:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def timer():
+    return FakeTimer()
+
+
+@pytest.fixture
+def cache(timer):
+    return UserCache(maxsize=2, max_ttl=300, timer=timer)
+
+
+class TestUserCache:
+    def test_store_and_get(self, cache):
+        """Test that users of stored tokens are returned together with their claims."""
+
+        user = Mock()
+        claims = {"sub": "openid", "exp": 2000}
+
+        cache.store("token", claims, user)
+
+        cached = cache.get("token")
+        assert cached.user is user
+        assert cached.claims == claims
+        assert cache.get("other") is None
+
+    def test_expires_with_token(self, cache, timer):
+        """Test that entries expire at the 'exp' claim of the token."""
+
+        cache.store("token", {"sub": "openid", "exp": 1100}, Mock())
+
+        timer.now = 1099
+        assert cache.get("token") is not None
+
+        timer.now = 1100
+        assert cache.get("token") is None
+
+    def test_expires_after_max_ttl(self, cache, timer):
+        """Test that entries of long-lived tokens expire after max_ttl."""
+
+        cache.store("token", {"sub": "openid", "exp": 100000}, Mock())
+
+        timer.now = 1299
+        assert cache.get("token") is not None
+
+        timer.now = 1300
+        assert cache.get("token") is None
+
+    def test_expired_token_is_not_stored(self, cache):
+        """Test that already expired tokens are not cached."""
+
+        cache.store("token", {"sub": "openid", "exp": 900}, Mock())
+
+        assert cache.get("token") is None
+
+    def test_invalidate(self, cache):
+        """Test that invalidated tokens are removed."""
+
+        cache.store("token", {"sub": "openid", "exp": 2000}, Mock())
+
+        cache.invalidate("token")
+        cache.invalidate("unknown")
+
+        assert cache.get("token") is None
+
+    def test_bounded(self, cache):
+        """Test that least recently used entries are evicted once the cache is full."""
+
+        for token in ["token1", "token2"]:
+            cache.store(token, {"sub": token, "exp": 2000}, Mock())
+
+        cache.get("token1")
+        cache.store("token3", {"sub": "token3", "exp": 2000}, Mock())
+
+        assert cache.get("token1") is not None
+        assert cache.get("token2") is None
+        assert cache.get("token3") is not None